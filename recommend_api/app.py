@@ -1,23 +1,140 @@
 # Flask application
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from recommender.hybrid import hybrid_recommend
 from recommender.utils import save_recommendations_to_db
 from recommender.utils import save_goal_recommendations
-from recommender.goal_recommender import recommend_goals_all_users
+from recommender.goal_recommender import recommend_goals_all_users, invalidate_user_goal_cache
+from recommender.goal_incremental import update_goals_incremental
+from recommender.store import RECOMMEND_SERVING_MODE, get_fresh_recommendations, \
+    remember_recommendations, invalidate_recommendations, clear_cached_recommendations
 import pandas as pd  # pd.Timestamp.now()를 위해 필요
-from recommender.utils import get_connection
+from recommender.collaborative import get_cf_model, invalidate_cf_model, refresh_cf_model
+from recommender.registry import registry
+from recommender.inference import InferenceQueueFull
+from recommender.jobs import get_job_manager, validate_job_params
+from recommender.candidates import invalidate_seen_books
+from recommender.catalogue import CATALOGUE_WATCH_SECONDS, reload_catalogue, watch_catalogue
+from recommender.sync import publish, subscribe
+from recommender.metrics import metrics, start_request, finish_request, server_timing, profiling_requested, \
+    SamplingProfiler, save_profile, get_profile, list_profiles
+import os
+import threading
+import time
+
+# 모델 로딩 방식: background(기본, 시작 직후 백그라운드 로드) / eager(시작 시 로드) / lazy(첫 요청 시 로드)
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background")
 
 app = Flask(__name__)
 
+
+def start_warm_up():
+    if MODEL_WARMUP == "eager":
+        registry.warm_up()
+    elif MODEL_WARMUP == "background":
+        threading.Thread(target=registry.warm_up, name="model-warmup", daemon=True).start()
+
+
+start_warm_up()
+
+
+def clear_user_caches():
+    clear_cached_recommendations()
+    invalidate_seen_books()
+    invalidate_user_goal_cache()
+
+
+# 다른 gunicorn 워커가 받은 갱신 훅을 이 워커에도 반영 (스탬프 확인 스레드는 gunicorn.conf.py post_fork에서 시작)
+subscribe("catalogue", reload_catalogue)
+subscribe("cf", invalidate_cf_model)
+subscribe("user_activity", clear_user_caches)
+
+# ---------------------------------------------------------
+# 🔹 요청별 단계 시간 측정 / 프로파일링 (X-Profile 헤더)
+# ---------------------------------------------------------
+@app.before_request
+def begin_request_metrics():
+    g.metrics_token = start_request()
+    g.request_start = time.perf_counter()
+    g.profiler = SamplingProfiler().start() if profiling_requested(request.headers.get("X-Profile")) else None
+
+
+@app.after_request
+def end_request_metrics(response):
+    if "metrics_token" not in g:
+        return response
+    seconds = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or "unknown"
+    profile_id = None
+    if g.profiler is not None:
+        profile_id = save_profile(g.profiler.stop(), endpoint, seconds)
+        response.headers["X-Profile-Id"] = profile_id
+    stages = finish_request(g.pop("metrics_token"), request.method, endpoint, request.path,
+                            response.status_code, seconds, profile_id)
+    response.headers["Server-Timing"] = server_timing(stages, seconds)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """ Prometheus 텍스트 형식 (?format=json: 단계별 p50/p95/p99 추정치) — 이 워커 프로세스의 집계 """
+    if request.args.get("format") == "json":
+        return jsonify({"pid": os.getpid(), "metrics": metrics.snapshot()})
+    return Response(metrics.prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route('/profiles', methods=['GET'])
+def profiles_list():
+    return jsonify(list_profiles())
+
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def profile_detail(profile_id):
+    """ collapsed stack 텍스트 (flamegraph.pl / speedscope에 그대로 입력) """
+    profile = get_profile(profile_id)
+    if profile is None:
+        return jsonify({"status": "error", "message": f"프로파일 없음: {profile_id}"}), 404
+    return Response(profile["collapsed"], mimetype="text/plain")
+
+
+@app.errorhandler(InferenceQueueFull)
+def inference_queue_full(e):
+    print("⚠️ 추론 대기열 초과:", e)
+    return jsonify({"status": "error", "message": str(e)}), 503
+
+
 @app.route('/')
 def index():
     return "📚 Recommendation API is running!"
 
+
+# ---------------------------------------------------------
+# 🔹 준비 상태 (모델/인덱스 로드 완료 여부)
+# ---------------------------------------------------------
+@app.route('/ready', methods=['GET'])
+def ready():
+    is_ready = registry.is_ready()
+    return jsonify({"ready": is_ready, "models": registry.status()}), (200 if is_ready else 503)
+
 @app.route('/recommend/books', methods=['POST'])
 def recommend_books():
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     user_id = data.get("user_id")
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": f"user_id(정수)가 필요합니다: {user_id!r}"}), 400
+
+    # 🔹 야간 배치 등으로 저장된 추천이 신선하면 그대로 반환 ({"refresh": true}면 재계산)
+    if RECOMMEND_SERVING_MODE == "read_through" and not data.get("refresh"):
+        try:
+            stored = get_fresh_recommendations(user_id)
+        except Exception as e:
+            # 조회 실패(스키마 미적용, DB 오류 등)는 재계산으로 대체
+            print("⚠️ 저장된 추천 조회 실패, 재계산:", e)
+            stored = None
+        if stored is not None:
+            return jsonify(stored)
 
     # 🔹 recent_books를 DB에서 자동으로 불러오기
     from recommender.utils import get_recent_books_from_db
@@ -27,28 +144,42 @@ def recommend_books():
 
     results = hybrid_recommend(user_id, recent_books, alpha=0.8)
     save_recommendations_to_db(user_id, results)
+    remember_recommendations(user_id, results)
     return jsonify(results)
 
 
+# ---------------------------------------------------------
+# 🔹 새 독서 활동 발생 시 저장/캐시된 추천 무효화
+# ---------------------------------------------------------
+@app.route('/recommend/invalidate', methods=['POST'])
+def invalidate_user_recommendations():
+    """
+    ✅ Request: {"user_id": 12}
+    책 추천(book_recommend + 캐시), 읽은 책 목록 캐시, 사용자 목표 추천 캐시를 무효화
+    """
+    user_id = (request.get_json(silent=True) or {}).get("user_id")
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": f"user_id(정수)가 필요합니다: {user_id!r}"}), 400
+    try:
+        invalidate_recommendations(user_id)
+        invalidate_seen_books(user_id)
+        invalidate_user_goal_cache(user_id)
+        publish("user_activity")
+        return jsonify({"status": "success", "user_id": user_id}), 200
+    except Exception as e:
+        print("❌ 추천 무효화 오류:", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 # ✅ 전체 사용자 추천 (한 번에 DB 저장)
 @app.route('/recommend/books/all', methods=['GET'])
 def recommend_books_all():
     try:
-        conn, server = get_connection()
-        df_users = pd.read_sql("SELECT DISTINCT user_id FROM reading_logs;", conn)
-        conn.close(); server.stop()
-
-        from recommender.utils import get_recent_books_from_db
-        from recommender.hybrid import hybrid_recommend
-
-        all_results = {}
-        for user_id in df_users["user_id"]:
-            recent_books = get_recent_books_from_db(user_id, limit=3)
-            if not recent_books:
-                continue
-            results = hybrid_recommend(user_id, recent_books, alpha=0.8)
-            save_recommendations_to_db(user_id, results)
-            all_results[user_id] = results
+        from recommender.batch import recommend_books_all_users
+
+        all_results = recommend_books_all_users(limit=3, alpha=0.8)
 
         return jsonify({
             "status": "success",
@@ -61,13 +192,81 @@ def recommend_books_all():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+# ---------------------------------------------------------
+# 🔹 카탈로그 증분 반영 후 파일 다시 로드 (scripts.ingest_catalogue)
+# ---------------------------------------------------------
+@app.route('/catalogue/reload', methods=['POST'])
+def catalogue_reload():
+    try:
+        reload_catalogue()
+        publish("catalogue")
+        return jsonify({"status": "success", "models": registry.status()}), 200
+    except Exception as e:
+        print("❌ 카탈로그 다시 로드 오류:", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+# ---------------------------------------------------------
+# 🔹 CF 모델 갱신 훅 (새 리뷰 증분 반영 / 전체 재빌드)
+# ---------------------------------------------------------
+@app.route('/recommend/cf/reviews', methods=['POST'])
+def cf_add_reviews():
+    """
+    ✅ 새 리뷰 목록을 받아 메모리 CF 모델에 증분 반영
+    Request: {"reviews": [{"user_id": 1, "book_id": 10, "rating": 4.5, "title": ..., ...}]}
+    """
+    try:
+        reviews = (request.get_json() or {}).get("reviews", [])
+        get_cf_model().add_reviews(reviews)
+        # 다른 워커는 DB에서 다시 빌드 (리뷰는 이미 reviews 테이블에 저장된 상태라고 가정)
+        publish("cf")
+        return jsonify({"status": "success", "review_count": len(reviews)}), 200
+    except Exception as e:
+        print("❌ CF 리뷰 반영 오류:", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route('/recommend/cf/refresh', methods=['POST'])
+def cf_refresh():
+    """
+    ✅ CF 모델 무효화(?lazy=1) 또는 즉시 재빌드
+    """
+    try:
+        lazy = request.args.get("lazy") == "1"
+        if lazy:
+            invalidate_cf_model()
+        else:
+            refresh_cf_model()
+        publish("cf")
+        return jsonify({"status": "success", "lazy": lazy}), 200
+    except Exception as e:
+        print("❌ CF 모델 갱신 오류:", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 
 # ---------------------------------------------------------
 # 🔹 전체 사용자 목표 추천 + DB 저장
 # ---------------------------------------------------------
 @app.route('/recommend/goals/all', methods=['GET'])
 def recommend_goals_all():
+    """
+    ✅ ?mode=full (기본): 전체 사용자 재계산 후 저장
+       ?mode=incremental: 새 로그/바뀐 목표가 있는 사용자만 재계산, 나머지는 독서 중단 정보만 갱신 (&rebuild=1: 상태 재생성)
+    """
     try:
+        if request.args.get("mode", "full") == "incremental":
+            print("🚀 목표 추천 증분 계산 시작...")
+            results = update_goals_incremental(rebuild=request.args.get("rebuild") == "1")
+            return jsonify({
+                "status": "success",
+                "mode": "incremental",
+                "user_count": len(results["inactivity_df"]),
+                "recomputed_count": len(results["recommendations"]),
+                "inactivity_refreshed": results["refreshed_users"],
+                "inactive_count": int(results["inactivity_df"]["inactive"].sum()),
+                "timestamp": pd.Timestamp.now(tz='Asia/Seoul').strftime("%Y-%m-%d %H:%M:%S")
+            }), 200
+
         print("🚀 목표 추천 계산 시작...")
         results = recommend_goals_all_users()
 
@@ -85,10 +284,67 @@ def recommend_goals_all():
         }
         return jsonify(rec_summary), 200
 
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         print("❌ 오류 발생:", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# ---------------------------------------------------------
+# 🔹 전체 사용자 배치 작업 (비동기 job)
+# ---------------------------------------------------------
+JOB_PARAM_KEYS = {"books": ("limit", "alpha", "chunk_size"), "goals": ("chunk_size", "mode")}
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    ✅ Request: {"kind": "books" | "goals", "limit": 3, "alpha": 0.8, "chunk_size": 256}
+             goals: {"mode": "full" | "incremental"} (그 외 mode는 400)
+    Response(202): {"job_id": ..., "status": "pending", ...}
+    """
+    try:
+        data = request.get_json() or {}
+        kind = data.get("kind")
+        params = {k: data[k] for k in JOB_PARAM_KEYS.get(kind, ()) if k in data}
+        validate_job_params(kind, params)
+        job = get_job_manager().submit(kind, params)
+        return jsonify(job.to_dict()), 202
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify([job.to_dict() for job in get_job_manager().list()]), 200
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"작업 없음: {job_id}"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    try:
+        return jsonify(get_job_manager().cancel(job_id).to_dict()), 200
+    except KeyError:
+        return jsonify({"status": "error", "message": f"작업 없음: {job_id}"}), 404
+
+
+@app.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    try:
+        return jsonify(get_job_manager().resume(job_id).to_dict()), 202
+    except KeyError:
+        return jsonify({"status": "error", "message": f"작업 없음: {job_id}"}), 404
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+
+
 # ---------------------------------------------------------
 # 🔹 특정 사용자 목표 추천 (조회만, DB 저장 X)
 # ---------------------------------------------------------
@@ -98,30 +354,10 @@ def recommend_goal_for_user(user_id):
     ✅ 특정 사용자의 목표 추천만 계산해서 즉시 반환
     """
     try:
-        from recommender.goal_recommender import load_data, preprocess_logs, \
-            recommend_goals_for_user, rule_based_time_recommendation, \
-            recommend_weekly_mission, detect_inactivity
-
-        df_logs, df_goals = load_data()
-        logs = preprocess_logs(df_logs)
-        goals = df_goals.copy()
-
-        df_user_logs = logs[logs["user_id"] == user_id]
-        df_user_goals = goals[goals["user_id"] == user_id]
+        from recommender.goal_recommender import recommend_goals_single_user
 
-        goal_pred = recommend_goals_for_user(user_id, goals)
-        rule_rec = rule_based_time_recommendation(df_user_logs)
-        mission = recommend_weekly_mission(df_user_logs, df_user_goals)
-        inactivity = detect_inactivity(logs)
-        inactive_info = inactivity[inactivity["user_id"] == user_id].to_dict("records")
-
-        return jsonify({
-            "user_id": user_id,
-            "goal_prediction": goal_pred,
-            "rule_recommendation": rule_rec,
-            "mission_recommendation": mission,
-            "inactivity": inactive_info
-        }), 200
+        use_cache = request.args.get("no_cache") != "1"
+        return jsonify(recommend_goals_single_user(user_id, use_cache=use_cache)), 200
 
     except Exception as e:
         print("❌ 사용자 추천 오류:", e)
@@ -129,6 +365,9 @@ def recommend_goal_for_user(user_id):
 
 
 if __name__ == '__main__':
+    # gunicorn에서는 post_fork에서 워커마다 시작
+    if CATALOGUE_WATCH_SECONDS > 0:
+        watch_catalogue(CATALOGUE_WATCH_SECONDS)
     app.run(host='0.0.0.0', port=8000)
     
 
@@ -0,0 +1,47 @@
+## Gunicorn 설정 (운영 서빙)
+#
+# 실행: gunicorn -c gunicorn.conf.py app:app
+# - gthread 워커: 워커 프로세스마다 스레드 풀로 요청 처리 (DB/모델 대기 중에도 다른 요청 처리)
+# - preload_app: 마스터에서 모델/인덱스를 한 번 로드한 뒤 fork → 워커끼리 메모리 페이지 공유
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_WORKERS", max(2, multiprocessing.cpu_count() // 2)))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# 배치 작업(/jobs)이 웹 워커 스레드에서 실행되므로 요청 수 기반 워커 재시작은 기본으로 끔
+# (재시작되면 실행 중인 작업이 중단됨 → jobs의 heartbeat로 failed 처리 후 resume 필요)
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "200")) if max_requests else 0
+preload_app = os.getenv("WEB_PRELOAD", "1") == "1"
+accesslog = "-"
+errorlog = "-"
+
+# fork 전에 백그라운드 스레드로 로드하면 잠금 상태가 워커로 복사될 수 있으므로
+# preload 시에는 마스터에서 동기 로드
+# (마스터가 워밍업 중 연 DB 커넥션 / SSH 터널은 utils의 register_at_fork 훅이 워커에서 버리고 새로 연결)
+if preload_app:
+    os.environ.setdefault("MODEL_WARMUP", "eager")
+
+
+def post_fork(server, worker):
+    # 워커마다 torch 연산 스레드 수 제한 (워커 × 스레드가 코어 수를 넘지 않도록)
+    torch_threads = os.getenv("TORCH_NUM_THREADS")
+    if torch_threads:
+        import torch
+        torch.set_num_threads(int(torch_threads))
+
+    # 다른 워커가 받은 CF 갱신 / 캐시 무효화 / 카탈로그 reload 알림 확인
+    from recommender.sync import SYNC_POLL_SECONDS, watch_sync
+    if SYNC_POLL_SECONDS > 0:
+        watch_sync(SYNC_POLL_SECONDS)
+
+    # 카탈로그 파일 교체 감시 (스레드는 fork로 복사되지 않으므로 워커마다 시작)
+    from recommender.catalogue import CATALOGUE_WATCH_SECONDS, watch_catalogue
+    if CATALOGUE_WATCH_SECONDS > 0:
+        watch_catalogue(CATALOGUE_WATCH_SECONDS)
@@ -0,0 +1,17 @@
+-- ============================================================
+-- 🔹 read-through 서빙(RECOMMEND_SERVING_MODE=read_through)용 스키마 (MySQL, 1회 실행)
+-- 실행: mysql -h <DB_HOST> -u <DB_USER> -p <DB_NAME> < migrations/001_recommend_store.sql
+-- 적용 후 RECOMMEND_SERVING_MODE=read_through로 전환
+-- ============================================================
+
+-- 저장 시각 (INSERT에서 값을 주지 않으므로 DB 시계 기준 기본값)
+ALTER TABLE book_recommend
+    ADD COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX idx_book_recommend_user_created ON book_recommend (user_id, created_at);
+
+-- 사용자별 마지막 무효화 시각 (이보다 먼저 저장된 book_recommend 행은 신선하지 않음)
+CREATE TABLE IF NOT EXISTS recommend_invalidation (
+    user_id INT PRIMARY KEY,
+    invalidated_at DATETIME NOT NULL
+);
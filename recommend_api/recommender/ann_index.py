@@ -0,0 +1,121 @@
+## FAISS 인덱스 생성/로드 (Flat / IVF / HNSW / PQ)
+
+import faiss, numpy as np
+
+# 인덱스 종류 → faiss.index_factory 문자열 ({nlist}, {m}, {pq_m} 치환)
+# hnsw_pq는 index_factory("HNSW{m}_PQ{pq_m}", METRIC_INNER_PRODUCT)가 L2 인덱스를 만들므로 생성자로 직접 생성
+INDEX_TYPES = {
+    "flat": "Flat",                      # 전수 탐색 (기존 IndexFlatIP)
+    "ivf_flat": "IVF{nlist},Flat",       # 클러스터 nprobe개만 탐색
+    "ivf_pq": "IVF{nlist},PQ{pq_m}",     # IVF + 곱 양자화 (메모리 절감)
+    "hnsw": "HNSW{m}",                   # 그래프 기반 (학습 불필요)
+    "hnsw_pq": None,                     # HNSW + 곱 양자화 (IndexHNSWPQ)
+}
+
+
+def default_nlist(n):
+    """ IVF 클러스터 수: 대략 4·√n (최소 1, 학습 데이터의 1/39 이하) """
+    return int(max(1, min(4 * np.sqrt(n), n // 39 or 1)))
+
+
+def build_index(embeddings, index_type="flat", nlist=None, m=32, pq_m=None,
+                ef_construction=200, train_size=200_000, seed=42, ids=None):
+    """
+    ✅ 정규화된 임베딩으로 내적(코사인) 기반 인덱스 생성
+    - ivf_*: nlist 개 클러스터 학습 (최대 train_size개 샘플)
+    - *pq: pq_m개 서브벡터 × 8bit 코드 (기본: 차원/8)
+    - ids: 벡터별 id (카탈로그 행 번호) → add_with_ids / remove_ids로 증분 갱신 가능
+      (IVF는 자체 지원, flat / hnsw는 IDMap2로 감쌈)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 종류: {index_type} ({', '.join(INDEX_TYPES)})")
+
+    xb = np.ascontiguousarray(embeddings, dtype='float32')
+    n, dim = xb.shape
+    nlist = nlist or default_nlist(n)
+    pq_m = pq_m or max(1, dim // 8)
+    if dim % pq_m != 0:
+        raise ValueError(f"임베딩 차원({dim})은 pq_m({pq_m})으로 나누어 떨어져야 합니다.")
+
+    wrap_ids = ids is not None and not index_type.startswith("ivf")
+    if index_type == "hnsw_pq":
+        index = faiss.IndexHNSWPQ(dim, pq_m, m, 8, faiss.METRIC_INNER_PRODUCT)
+        if wrap_ids:
+            index = faiss.IndexIDMap2(index)
+    else:
+        factory = INDEX_TYPES[index_type].format(nlist=nlist, m=m, pq_m=pq_m)
+        if wrap_ids:
+            factory = "IDMap2," + factory
+        index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+    check_metric(index)
+
+    if index_type.startswith("hnsw"):
+        hnsw_index = faiss.downcast_index(index.index if wrap_ids else index)
+        hnsw_index.hnsw.efConstruction = ef_construction
+
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample = xb if n <= train_size else xb[rng.choice(n, train_size, replace=False)]
+        index.train(sample)
+
+    if ids is None:
+        index.add(xb)
+    else:
+        index.add_with_ids(xb, np.ascontiguousarray(ids, dtype='int64'))
+    return index
+
+
+def check_metric(index):
+    """ 검색 결과를 유사도(클수록 가까움)로 쓰므로 내적 인덱스만 허용 """
+    if index.metric_type != faiss.METRIC_INNER_PRODUCT:
+        raise ValueError(f"내적(METRIC_INNER_PRODUCT) 인덱스가 아닙니다 (metric_type={index.metric_type}). 인덱스를 다시 빌드하세요.")
+    return index
+
+
+def index_type_of(index):
+    """ 저장된 인덱스의 INDEX_TYPES 이름 추정 (재빌드용) """
+    inner = faiss.downcast_index(index.index) if isinstance(faiss.downcast_index(index), faiss.IndexIDMap) \
+        else faiss.downcast_index(index)
+    if faiss.try_extract_index_ivf(inner) is not None:
+        return "ivf_pq" if isinstance(inner, faiss.IndexIVFPQ) else "ivf_flat"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw_pq" if isinstance(inner, faiss.IndexHNSWPQ) else "hnsw"
+    return "flat"
+
+
+def supports_ids(index):
+    """ add_with_ids / remove_ids로 카탈로그 행 번호를 그대로 유지할 수 있는 인덱스인지 """
+    index = faiss.downcast_index(index)
+    return isinstance(index, faiss.IndexIDMap) or faiss.try_extract_index_ivf(index) is not None
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """ 로드 시점 검색 파라미터 설정 (해당 인덱스에 없는 파라미터는 무시) """
+    params = faiss.ParameterSpace()
+    if nprobe is not None:
+        try:
+            params.set_index_parameter(index, "nprobe", int(nprobe))
+        except RuntimeError:
+            pass
+    if ef_search is not None:
+        try:
+            params.set_index_parameter(index, "efSearch", int(ef_search))
+        except RuntimeError:
+            pass
+    return index
+
+
+def load_index(path, nprobe=None, ef_search=None, mmap=False):
+    """
+    ✅ 저장된 인덱스를 읽고 nprobe / efSearch 적용
+    mmap=True: IO_FLAG_MMAP으로 읽어 여러 워커가 페이지를 공유 (지원하지 않는 인덱스는 일반 로드)
+    """
+    if mmap:
+        try:
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            index = faiss.read_index(path)
+    else:
+        index = faiss.read_index(path)
+    check_metric(index)
+    return set_search_params(index, nprobe=nprobe, ef_search=ef_search)
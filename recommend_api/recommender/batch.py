@@ -0,0 +1,142 @@
+## 전체 사용자 책 추천 배치 파이프라인
+
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from recommender.collaborative import get_cf_model
+from recommender.candidates import load_seen_book_ids_for_all_users
+from recommender.hybrid import hybrid_recommend_batch
+from recommender.neighbours import HYBRID_SERVING_MODE
+from recommender.utils import get_recent_books_for_all_users, save_recommendations_bulk, \
+    save_goal_recommendations
+
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "256"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def remaining_users(user_ids, done_ranges, high_water=None):
+    """
+    ✅ 정렬된 user_ids 중 완료 구간 [lo, hi]에 속하지 않는 사용자 (구간 병합 + searchsorted)
+    - high_water: 처음 실행할 때의 최대 user_id → 그 뒤에 생긴 사용자는 제외 (재시작 범위 고정)
+    """
+    user_ids = np.sort(np.asarray(user_ids))
+    if high_water is not None:
+        user_ids = user_ids[user_ids <= high_water]
+    if not len(done_ranges) or not len(user_ids):
+        return user_ids.tolist()
+    merged = []
+    for lo, hi in sorted(done_ranges):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    los, his = np.array(merged).T
+    pos = np.searchsorted(los, user_ids, side='right') - 1
+    covered = (pos >= 0) & (user_ids <= his[np.maximum(pos, 0)])
+    return user_ids[~covered].tolist()
+
+
+def run_in_chunks(user_ids, process_chunk, chunk_size=BATCH_CHUNK_SIZE, workers=BATCH_WORKERS,
+                  done_ranges=(), on_chunk_done=None, should_stop=None, high_water=None):
+    """
+    ✅ 정렬된 user_ids를 chunk로 나눠 스레드 풀에서 process_chunk(chunk) 실행
+    - done_ranges: 이미 처리된 [첫 user_id, 마지막 user_id] 구간 → 건너뜀 (재시작용)
+    - high_water: 처음 실행할 때의 최대 user_id (재시작 시 그 이후 사용자는 처리하지 않음)
+    - on_chunk_done(chunk_range, n_users): chunk 완료 시 호출 (체크포인트/진행률)
+    - should_stop(): True면 새 chunk를 더 제출하지 않고 종료 (취소)
+    - 동시에 제출되는 chunk는 workers × 2개로 제한
+    반환: (처리한 사용자 수, 중단 여부)
+    """
+    user_ids = remaining_users(user_ids, done_ranges, high_water)
+    processed, stopped = 0, False
+    pending = {}
+
+    def finish(future):
+        nonlocal processed
+        chunk = pending.pop(future)
+        future.result()
+        processed += len(chunk)
+        if on_chunk_done:
+            on_chunk_done([chunk[0], chunk[-1]], len(chunk))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunks = iter(chunked(user_ids, chunk_size))
+        while True:
+            while not stopped and len(pending) < workers * 2:
+                # 남은 chunk가 없으면 취소 요청이 있어도 중단으로 보지 않음
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                if should_stop and should_stop():
+                    stopped = True
+                    break
+                pending[pool.submit(process_chunk, chunk)] = chunk
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                finish(future)
+    return processed, stopped
+
+
+def recommend_books_all_users(limit=3, alpha=0.8, chunk_size=BATCH_CHUNK_SIZE, workers=BATCH_WORKERS,
+                              done_ranges=(), on_start=None, on_chunk_done=None, should_stop=None,
+                              keep_results=True, high_water=None):
+    """
+    ✅ 전체 사용자 책 추천 + DB 저장
+    1) 최근 읽은 책: 전체 사용자 쿼리 1번
+    2) CF 모델: 1번 빌드 후 공유 (precomputed 서빙은 이웃 테이블만 사용하므로 빌드 안 함)
+       읽은 책(seen-set): 전체 사용자 쿼리 1번
+    3) 사용자 chunk 단위로 스레드 풀에 분배 (chunk마다 콘텐츠 배치 검색 1번)
+       - encode / FAISS 검색은 GIL을 놓으므로 스레드로 병렬화, 모델은 프로세스 1벌만 유지
+    4) chunk 결과를 bulk 저장
+    반환: {user_id: 추천 리스트} (keep_results=False면 빈 dict)
+    """
+    recent_by_user = get_recent_books_for_all_users(limit=limit)
+    print(f"📚 최근 읽은 책 불러오기 완료 ({len(recent_by_user)}명)")
+    if HYBRID_SERVING_MODE != "precomputed":
+        get_cf_model()
+    seen_by_user = load_seen_book_ids_for_all_users()
+
+    user_ids = [user_id for user_id, books in recent_by_user.items() if books]
+    if on_start:
+        on_start(len(user_ids), max(map(int, user_ids), default=None))
+
+    all_results = {}
+
+    def process_chunk(chunk):
+        results = hybrid_recommend_batch(
+            {user_id: recent_by_user[user_id] for user_id in chunk}, alpha=alpha, seen_by_user=seen_by_user
+        )
+        save_recommendations_bulk(results)
+        if keep_results:
+            all_results.update(results)
+
+    def report(chunk_range, n_users):
+        print(f"✅ 추천 진행: chunk {chunk_range} ({n_users}명)")
+        if on_chunk_done:
+            on_chunk_done(chunk_range, n_users)
+
+    run_in_chunks(user_ids, process_chunk, chunk_size, workers, done_ranges, report, should_stop, high_water)
+    return all_results
+
+
+def save_goals_all_users(results, chunk_size=BATCH_CHUNK_SIZE, done_ranges=(), on_start=None,
+                         on_chunk_done=None, should_stop=None, high_water=None):
+    """
+    ✅ recommend_goals_all_users() 결과를 사용자 chunk 단위로 저장 (체크포인트/취소 지원)
+    계산은 벡터화로 한 번에 끝나므로 저장만 chunk로 나눔
+    """
+    recommendations = results["recommendations"]
+    if on_start:
+        on_start(len(recommendations), max(map(int, recommendations), default=None))
+    return run_in_chunks(
+        list(recommendations),
+        lambda chunk: save_goal_recommendations({user_id: recommendations[user_id] for user_id in chunk}),
+        chunk_size, 1, done_ranges, on_chunk_done, should_stop, high_water
+    )
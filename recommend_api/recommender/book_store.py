@@ -0,0 +1,237 @@
+## 컬럼형 카탈로그 저장소 (mmap 문자열 컬럼 + 저정밀 임베딩)
+#
+# data/book_store/
+#   manifest.json                     현재 버전의 파일 목록 (마지막에 os.replace로 교체)
+#   <컬럼>.<버전>.bytes / .offsets.npy  UTF-8 문자열을 이어붙인 바이트 + 행별 시작 위치
+#   <플래그>.<버전>.npy                 bool 컬럼 (REMOVED: 카탈로그 증분 반영으로 인덱스에서 제거된 행)
+#   embeddings.<버전>.npy (+ .scale.npy) float32 / float16 / int8(행별 scale)
+
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+
+# API 응답에 필요한 필드 + 조회 테이블용 ISBN
+STORE_COLUMNS = ["BOOK_TITLE_NM", "AUTHR_NM", "COVER_URL", "PUBLISHER_NM", "KDC_NM", "ISBN_THIRTEEN_NO"]
+STORE_FLAGS = ["REMOVED"]
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+WRITE_CHUNK_ROWS = 65536
+
+
+def _manifest_path(path):
+    return os.path.join(path, "manifest.json")
+
+
+def _file_version(name):
+    """ "<컬럼>.<버전>.bytes" 등에서 버전 (버전 파일이 아니면 None) """
+    match = re.match(r"[^.]+\.(\d+)\.", name)
+    return match.group(1) if match else None
+
+
+def store_exists(path):
+    return os.path.exists(_manifest_path(path))
+
+
+def _open_bytes(path):
+    # 길이 0 파일은 mmap 불가
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+
+class StringColumn:
+    """ ✅ mmap 문자열 컬럼: 필요한 행만 잘라 디코딩 """
+
+    def __init__(self, data_path, offsets_path, null_path=None):
+        self.data = _open_bytes(data_path)
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        self.null = np.load(null_path, mmap_mode='r') if null_path else None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = self.offsets[rows].tolist(), self.offsets[rows + 1].tolist()
+        values = [self.data[s:e].tobytes().decode('utf-8') for s, e in zip(starts, ends)]
+        if self.null is not None:
+            values = [None if n else v for v, n in zip(values, self.null[rows].tolist())]
+        return values
+
+    def to_list(self):
+        return self.take(np.arange(len(self)))
+
+
+class EmbeddingStore:
+    """ ✅ 저정밀 임베딩 mmap: 행 인덱싱 시 float32로 복원 """
+
+    def __init__(self, path, scale_path=None):
+        self.data = np.load(path, mmap_mode='r')
+        self.scale = np.load(scale_path, mmap_mode='r') if scale_path else None
+        self.shape = self.data.shape
+        self.dtype = self.data.dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, rows):
+        vecs = np.asarray(self.data[rows], dtype=np.float32)
+        if self.scale is not None:
+            vecs *= np.asarray(self.scale[rows], dtype=np.float32)[..., None]
+        return vecs
+
+
+class BookStore:
+    """
+    ✅ book_meta.pkl 대신 필요한 컬럼만 mmap으로 여는 카탈로그
+    - take(rows, columns): 결과 행들의 필드를 한 번에 조회 → {컬럼: 값 리스트}
+    - frame(columns): 조회 테이블 생성용 DataFrame (로드 시 한 번만)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(_manifest_path(path)) as f:
+            self.manifest = json.load(f)
+        self.columns = {
+            name: StringColumn(*(os.path.join(path, spec[k]) if spec.get(k) else None
+                                 for k in ("data", "offsets", "null")))
+            for name, spec in self.manifest["columns"].items()
+        }
+        self.flags = {
+            name: np.load(os.path.join(path, file), mmap_mode='r')
+            for name, file in self.manifest.get("flags", {}).items()
+        }
+
+    def __len__(self):
+        return self.manifest["n_rows"]
+
+    def take(self, rows, columns):
+        return {col: self.flags[col][rows].tolist() if col in self.flags else self.columns[col].take(rows)
+                for col in columns}
+
+    def frame(self, columns):
+        data = {}
+        for col in columns:
+            if col in self.flags:
+                data[col] = np.asarray(self.flags[col], dtype=bool)
+            elif col in self.columns:
+                data[col] = self.columns[col].to_list()
+        return pd.DataFrame(data)
+
+    def open_embeddings(self):
+        spec = self.manifest.get("embeddings")
+        if spec is None:
+            raise FileNotFoundError(f"{self.path}에 임베딩이 없습니다.")
+        scale = os.path.join(self.path, spec["scale"]) if spec.get("scale") else None
+        return EmbeddingStore(os.path.join(self.path, spec["file"]), scale)
+
+
+# ============================================================
+# 🔹 저장소 생성
+# ============================================================
+def _write_string_column(path, name, version, values):
+    values = pd.Series(values, dtype=object)
+    null = values.isna().values
+    encoded = [b"" if n else str(v).encode('utf-8') for v, n in zip(values.tolist(), null)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+
+    spec = {"data": f"{name}.{version}.bytes", "offsets": f"{name}.{version}.offsets.npy", "null": None}
+    with open(os.path.join(path, spec["data"]), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(path, spec["offsets"]), offsets)
+    if null.any():
+        spec["null"] = f"{name}.{version}.null.npy"
+        np.save(os.path.join(path, spec["null"]), null)
+    return spec
+
+
+def _write_embeddings(path, version, embeddings, dtype):
+    """ chunk 단위로 변환해 쓰기 (float32 원본 전체를 메모리에 올리지 않음) """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"지원하지 않는 임베딩 타입: {dtype} ({', '.join(EMBEDDING_DTYPES)})")
+    n, dim = embeddings.shape
+    spec = {"file": f"embeddings.{version}.npy", "dtype": dtype, "scale": None}
+    out = np.lib.format.open_memmap(os.path.join(path, spec["file"]), mode='w+', dtype=dtype, shape=(n, dim))
+    scale = None
+    if dtype == "int8":
+        spec["scale"] = f"embeddings.{version}.scale.npy"
+        scale = np.lib.format.open_memmap(os.path.join(path, spec["scale"]), mode='w+', dtype='float32', shape=(n,))
+
+    for start in range(0, n, WRITE_CHUNK_ROWS):
+        chunk = np.asarray(embeddings[start:start + WRITE_CHUNK_ROWS], dtype=np.float32)
+        if dtype == "int8":
+            # 행별 대칭 양자화: x ≈ q · scale, q ∈ [-127, 127]
+            s = np.abs(chunk).max(axis=1) / 127.0
+            s[s == 0] = 1.0
+            out[start:start + len(chunk)] = np.round(chunk / s[:, None]).astype(np.int8)
+            scale[start:start + len(chunk)] = s
+        else:
+            out[start:start + len(chunk)] = chunk.astype(dtype)
+    out.flush()
+    if scale is not None:
+        scale.flush()
+    return spec
+
+
+def cover_urls_of(df):
+    """ book.get("COVER_URL") or book.get("image_url") 의 벡터화 버전 """
+    covers = df["image_url"].tolist() if "image_url" in df.columns else [None] * len(df)
+    if "COVER_URL" in df.columns:
+        covers = [c or fallback for c, fallback in zip(df["COVER_URL"].tolist(), covers)]
+    return covers
+
+
+def build_book_store(meta, embeddings, path, dtype="float16"):
+    """
+    ✅ book_meta DataFrame + 임베딩 → 컬럼형 저장소
+    - 새 버전 파일을 모두 쓴 뒤 manifest.json을 os.replace로 교체 (서빙 중 교체 가능)
+    - 직전 버전 파일은 다음 빌드까지 유지 → 교체 직전 manifest를 읽은 프로세스가 reload를 끝낼 수 있음
+      그보다 오래된 버전만 삭제
+    """
+    os.makedirs(path, exist_ok=True)
+    previous = None
+    if store_exists(path):
+        with open(_manifest_path(path)) as f:
+            previous = json.load(f).get("version")
+    version = str(time.time_ns())
+    columns = {}
+    for name in STORE_COLUMNS:
+        if name == "COVER_URL":
+            values = cover_urls_of(meta)
+        elif name in meta.columns:
+            values = meta[name].tolist()
+        else:
+            continue
+        columns[name] = _write_string_column(path, name, version, values)
+
+    flags = {}
+    for name in STORE_FLAGS:
+        if name in meta.columns:
+            flags[name] = f"{name}.{version}.npy"
+            np.save(os.path.join(path, flags[name]), meta[name].fillna(False).astype(bool).values)
+
+    manifest = {"version": version, "n_rows": len(meta), "columns": columns, "flags": flags}
+    if embeddings is not None:
+        manifest["embeddings"] = _write_embeddings(path, version, embeddings, dtype)
+
+    tmp = _manifest_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, _manifest_path(path))
+
+    for name in os.listdir(path):
+        file_version = _file_version(name)
+        if file_version is not None and file_version not in (version, previous) and not name.endswith(".tmp"):
+            os.remove(os.path.join(path, name))
+    return manifest
+
+
+def store_embedding_dtype(path, default="float16"):
+    """ 기존 저장소의 임베딩 타입 (재생성 시 유지) """
+    if not store_exists(path):
+        return default
+    with open(_manifest_path(path)) as f:
+        return json.load(f).get("embeddings", {}).get("dtype", default)
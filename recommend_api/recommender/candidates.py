@@ -0,0 +1,189 @@
+## 하이브리드 후보 풀 (읽은 책 제외 + book_id 기준 중복 제거)
+
+import os
+import numpy as np
+import pandas as pd
+from recommender.content_based import normalize_key, search_catalogue, catalogue_frame, _rows_to_records
+from recommender.registry import registry
+from recommender.utils import db_connection, TTLCache
+
+# 최근 책 1권당 FAISS 후보 수 (한 번의 배치 검색)
+HYBRID_CANDIDATE_POOL = int(os.getenv("HYBRID_CANDIDATE_POOL", "50"))
+SEEN_CACHE_TTL = int(os.getenv("SEEN_CACHE_TTL", "300"))
+
+SEEN_QUERY = """
+    SELECT book_id FROM reading_logs WHERE user_id = %s AND book_id IS NOT NULL
+    UNION
+    SELECT book_id FROM reviews WHERE user_id = %s AND book_id IS NOT NULL;
+"""
+
+SEEN_QUERY_ALL = """
+    SELECT user_id, book_id FROM reading_logs WHERE book_id IS NOT NULL
+    UNION
+    SELECT user_id, book_id FROM reviews WHERE book_id IS NOT NULL;
+"""
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+
+# ============================================================
+# 🔹 카탈로그 행 번호 → books 테이블 book_id
+# ============================================================
+def build_book_ids(df_meta, df_books=None):
+    """
+    ✅ book_meta.pkl 행 번호 → 안정적인 book_id 배열
+    - books 테이블에 (제목, 저자)가 같은 책이 있으면 그 book_id
+    - 없으면 제목이 books 테이블에서 유일할 때 제목으로 매칭
+    - 그래도 없으면 (제목, 저자) 키별 음수 id → 카탈로그의 중복 행도 같은 id
+    """
+    titles = df_meta["BOOK_TITLE_NM"].map(normalize_key)
+    keys = titles + "|" + df_meta["AUTHR_NM"].map(normalize_key)
+    codes, _ = pd.factorize(keys)
+    ids = pd.Series(-(codes.astype(np.int64) + 1), index=df_meta.index)
+    if df_books is None or df_books.empty:
+        return ids.values
+
+    db_titles = df_books["title"].map(normalize_key)
+    db_keys = db_titles + "|" + df_books["author"].map(normalize_key)
+    by_key = pd.Series(df_books["book_id"].values, index=db_keys.values)
+    by_key = by_key[~by_key.index.duplicated()]
+    by_title = pd.Series(df_books["book_id"].values, index=db_titles.values)
+    by_title = by_title[~by_title.index.duplicated(keep=False)]
+
+    matched = keys.map(by_key).fillna(titles.map(by_title))
+    return np.where(matched.notna(), matched.fillna(0), ids).astype(np.int64)
+
+
+def build_book_categories(book_ids, kdc_names, df_books=None):
+    """
+    ✅ 카탈로그 행별 카테고리 (하이브리드 다양화용)
+    - books 테이블과 매칭된 책은 category_name → 협업 후보(books.category_name)와 같은 분류
+    - 매칭되지 않은 책(음수 id)은 카탈로그 KDC_NM
+    """
+    categories = pd.Series(kdc_names, dtype=object)
+    if df_books is not None and not df_books.empty:
+        by_id = df_books.drop_duplicates("book_id").set_index("book_id")["category_name"]
+        categories = pd.Series(book_ids).map(by_id).fillna(categories)
+    return categories.to_numpy(dtype=object)
+
+
+def _read_books_table(columns):
+    try:
+        with db_connection() as conn:
+            return pd.read_sql(f"SELECT {', '.join(columns)} FROM books;", conn)
+    except Exception as e:
+        print(f"⚠️ books 테이블 조회 실패, 카탈로그 값만 사용: {e}")
+        return None
+
+
+def _load_book_ids():
+    books = catalogue_frame(registry.get("books"), ["BOOK_TITLE_NM", "AUTHR_NM"])
+    return build_book_ids(books, _read_books_table(["book_id", "title", "author"]))
+
+
+def _load_book_categories():
+    books = catalogue_frame(registry.get("books"), ["KDC_NM"])
+    return build_book_categories(
+        registry.get("book_ids"), books["KDC_NM"].to_numpy(dtype=object),
+        _read_books_table(["book_id", "category_name"])
+    )
+
+
+registry.register("book_ids", _load_book_ids)
+registry.register("book_categories", _load_book_categories)
+
+
+# ============================================================
+# 🔹 사용자가 읽었거나 리뷰한 책 (seen-set)
+# ============================================================
+_seen_cache = TTLCache(SEEN_CACHE_TTL)
+
+
+def get_seen_book_ids(user_id):
+    """ ✅ 사용자의 읽은/리뷰한 book_id (정렬된 int64 배열, 짧은 TTL 캐시) """
+    cached = _seen_cache.get(user_id)
+    if cached is not None:
+        return cached
+    try:
+        with db_connection() as conn:
+            df = pd.read_sql(SEEN_QUERY, conn, params=(int(user_id), int(user_id)))
+    except Exception as e:
+        print(f"❌ 읽은 책 조회 오류: {e}")
+        return EMPTY_IDS
+    seen = np.unique(df["book_id"].to_numpy(dtype=np.int64))
+    _seen_cache.set(user_id, seen)
+    return seen
+
+
+def load_seen_book_ids_for_all_users():
+    """ ✅ 전체 사용자 seen-set을 쿼리 1번으로 미리 계산 → {user_id: 정렬된 book_id 배열} """
+    with db_connection() as conn:
+        df = pd.read_sql(SEEN_QUERY_ALL, conn)
+    df = df.sort_values(["user_id", "book_id"])
+    return {
+        user_id: np.unique(group.to_numpy(dtype=np.int64))
+        for user_id, group in df.groupby("user_id", sort=False)["book_id"]
+    }
+
+
+def invalidate_seen_books(user_id=None):
+    _seen_cache.invalidate(user_id)
+
+
+# ============================================================
+# 🔹 콘텐츠 후보 풀 (배치 검색 1번 + seen 필터)
+# ============================================================
+@registry.pinned()
+def content_candidates_batch(recent_books_list, seen_list, pool_size=HYBRID_CANDIDATE_POOL):
+    """
+    ✅ 여러 사용자의 콘텐츠 후보를 한 번의 FAISS 검색으로 생성
+    - recent_books_list: 사용자별 최근 책 리스트 / seen_list: 사용자별 seen book_id 배열 (또는 None)
+    - 읽은 책·쿼리 책과 book_id가 같은 후보는 제외 (정렬 배열 np.isin)
+    - category는 협업 후보와 같은 분류(book_categories)로 교체
+    - 반환: 사용자별 후보 레코드 리스트 (book_id 포함)
+    """
+    owners = np.array([i for i, books in enumerate(recent_books_list) for _ in books], dtype=np.int64)
+    if not len(owners):
+        return [[] for _ in recent_books_list]
+    queries = [book for books in recent_books_list for book in books]
+
+    rows, inds, sims = search_catalogue(queries, top_n=pool_size)
+    book_ids = registry.get("book_ids")
+    cand_ids = book_ids[np.maximum(inds, 0)]
+    seed_ids = np.where(rows >= 0, book_ids[np.maximum(rows, 0)], 0)
+
+    # owners는 사용자 순서대로 모여 있음 → 사용자별 쿼리 구간 [bounds[i], bounds[i+1])
+    bounds = np.searchsorted(owners, np.arange(len(recent_books_list) + 1))
+    for i, seen in enumerate(seen_list):
+        sel = slice(bounds[i], bounds[i + 1])
+        if sel.start == sel.stop:
+            continue
+        exclude = seed_ids[sel][rows[sel] >= 0]
+        if seen is not None and len(seen):
+            exclude = np.concatenate([exclude, seen])
+        if len(exclude):
+            inds[sel] = np.where(np.isin(cand_ids[sel], exclude), -1, inds[sel])
+
+    records = _rows_to_records(inds, sims)
+    kept = inds[inds >= 0]
+    kept_ids = iter(book_ids[kept].tolist())
+    kept_categories = iter(registry.get("book_categories")[kept].tolist())
+    results = [[] for _ in recent_books_list]
+    for owner, recs in zip(owners.tolist(), records):
+        for rec in recs:
+            rec["book_id"] = next(kept_ids)
+            rec["category"] = next(kept_categories)
+        results[owner].extend(recs)
+    return results
+
+
+def content_candidates(recent_books, seen_ids=None, pool_size=HYBRID_CANDIDATE_POOL):
+    return content_candidates_batch([recent_books], [seen_ids], pool_size)[0]
+
+
+def drop_seen(recs, seen_ids, key="book_id"):
+    """ 협업 결과 등 book_id가 있는 레코드에서 seen-set 제외 """
+    if seen_ids is None or not len(seen_ids) or not recs:
+        return recs
+    ids = np.array([rec[key] for rec in recs], dtype=np.int64)
+    return [rec for rec, seen in zip(recs, np.isin(ids, seen_ids)) if not seen]
@@ -0,0 +1,257 @@
+## 카탈로그 증분 반영 (새/변경된 책만 임베딩 + 인덱스 갱신 + 파일 원자적 교체)
+
+import hashlib
+import os
+import threading
+import time
+import faiss, numpy as np, pandas as pd
+from recommender.ann_index import build_index, index_type_of, supports_ids
+from recommender.book_store import build_book_store, store_embedding_dtype, store_exists
+from recommender.content_based import BOOK_META_PATH, BOOK_EMBEDDINGS_PATH, BOOK_STORE_PATH, FAISS_INDEX_PATH, \
+    normalize_key
+from recommender.registry import registry
+
+# 노트북과 동일한 임베딩 입력 텍스트 / 통합 기준
+EMBED_TEXT_COLUMNS = ['BOOK_TITLE_NM', 'AUTHR_NM', 'BOOK_INTRCN_CN', 'PUBLISHER_NM', 'KDC_NM']
+CATALOGUE_COLUMNS = ['ISBN_THIRTEEN_NO', 'BOOK_TITLE_NM', 'AUTHR_NM', 'BOOK_INTRCN_CN', 'PUBLISHER_NM', 'KDC_NM', 'LON_CO']
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "128"))
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "4096"))
+CATALOGUE_WATCH_SECONDS = int(os.getenv("CATALOGUE_WATCH_SECONDS", "0"))
+
+# 이웃 테이블(precomputed 서빙)도 scripts.build_neighbours로 다시 만든 뒤 같은 reload로 반영
+CATALOGUE_REGISTRY_NAMES = ["books", "embeddings", "index", "book_lookup", "book_ids", "book_categories",
+                            "content_neighbours", "cf_neighbours"]
+
+
+# ============================================================
+# 🔹 책 식별 키 / 내용 해시
+# ============================================================
+def prepare_catalogue(df):
+    """
+    ✅ 원본 대출 데이터 → 노트북과 같은 방식으로 (제목, 저자) 통합
+    이미 통합된 카탈로그(book_meta.pkl 형식)는 그대로 사용
+    """
+    df = df.copy()
+    df['BOOK_TITLE_NM'] = df['BOOK_TITLE_NM'].fillna('').astype(str).str.replace(r'[\s\u200b\xa0]+', ' ', regex=True).str.strip()
+    df = df[df['BOOK_TITLE_NM'] != '']
+    if not df.duplicated(['BOOK_TITLE_NM', 'AUTHR_NM']).any():
+        return df.reset_index(drop=True)
+
+    df[CATALOGUE_COLUMNS] = df[CATALOGUE_COLUMNS].fillna('')
+    extra = {col: 'first' for col in df.columns if col not in CATALOGUE_COLUMNS}
+    return (
+        df.groupby(['BOOK_TITLE_NM', 'AUTHR_NM'], as_index=False)
+        .agg({
+            'ISBN_THIRTEEN_NO': 'first',
+            'BOOK_INTRCN_CN': 'first',
+            'PUBLISHER_NM': lambda x: ', '.join(set(x)),
+            'KDC_NM': 'first',
+            'LON_CO': 'sum',
+            **extra
+        })
+    )
+
+
+def embed_texts_of(df):
+    """ 노트북 text_for_embed와 동일 (없으면 계산) """
+    if 'text_for_embed' in df.columns:
+        return df['text_for_embed'].fillna('').astype(str)
+    return df[EMBED_TEXT_COLUMNS].fillna('').astype(str).agg(' '.join, axis=1)
+
+
+def book_keys(df):
+    """ 책 식별 키: 정규화한 "제목|저자" (카탈로그 통합 기준과 동일) """
+    return df['BOOK_TITLE_NM'].map(normalize_key) + '|' + df['AUTHR_NM'].map(normalize_key)
+
+
+def content_hashes(texts):
+    return texts.map(lambda t: hashlib.sha1(t.encode('utf-8')).hexdigest())
+
+
+def diff_catalogue(current, incoming, prune=False):
+    """
+    ✅ 현재 카탈로그와 새 카탈로그 비교
+    반환: (변경된 행 번호, 다시 인덱스에 넣을 행 번호, 새 책 DataFrame, 제거할 행 번호, incoming의 변경 행 위치)
+    - 변경: 같은 키인데 내용 해시가 다름 → 다시 인코딩
+    - 복원: 이전에 제거된 행이 같은 내용으로 다시 들어옴 → 인코딩 없이 인덱스에만 추가
+    - prune=True일 때만 새 카탈로그에 없는 책을 인덱스에서 제거 (메타/임베딩 행은 유지)
+    """
+    cur_keys = book_keys(current)
+    row_of = pd.Series(np.arange(len(current)), index=cur_keys.values)
+    row_of = row_of[~row_of.index.duplicated()]
+
+    inc_keys = book_keys(incoming)
+    inc_hash = content_hashes(embed_texts_of(incoming)).values
+    matched = inc_keys.map(row_of)
+    is_new = matched.isna().values
+    rows = matched[~is_new].astype(np.int64).values
+    same = current['CONTENT_HASH'].values[rows] == inc_hash[~is_new]
+    removed_before = current['REMOVED'].values[rows]
+
+    changed_rows = rows[~same]
+    changed_pos = np.flatnonzero(~is_new)[~same]
+    revived_rows = rows[same & removed_before]
+    new_books = incoming[is_new]
+
+    removed_rows = np.empty(0, dtype=np.int64)
+    if prune:
+        gone = ~cur_keys.isin(set(inc_keys)).values & ~current['REMOVED'].values
+        removed_rows = np.flatnonzero(gone)
+    return changed_rows, revived_rows, new_books, removed_rows, changed_pos
+
+
+# ============================================================
+# 🔹 임베딩 저장소 (스트리밍 인코딩)
+# ============================================================
+def write_embeddings(path, old, n_rows, targets, texts, encode_fn, batch_size=INGEST_BATCH_SIZE,
+                     chunk_size=INGEST_CHUNK_SIZE):
+    """
+    ✅ 기존 임베딩을 복사한 새 .npy(mmap)에 targets 행만 인코딩해 기록
+    - 한 번에 chunk_size개씩 encode → 메모리는 chunk 크기만큼만 사용
+    """
+    out = np.lib.format.open_memmap(path, mode='w+', dtype='float32', shape=(n_rows, old.shape[1]))
+    for start in range(0, len(old), chunk_size):
+        stop = min(start + chunk_size, len(old))
+        out[start:stop] = old[start:stop]
+    for start in range(0, len(targets), chunk_size):
+        vecs = encode_fn(texts[start:start + chunk_size], batch_size=batch_size)
+        out[targets[start:start + chunk_size]] = vecs
+        print(f"🧠 인코딩 {min(start + chunk_size, len(targets))}/{len(targets)}")
+    out.flush()
+    return out
+
+
+# ============================================================
+# 🔹 FAISS 인덱스 증분 갱신
+# ============================================================
+def update_index(index, embeddings, upsert_rows, remove_rows, active_rows, index_type=None):
+    """
+    ✅ 행 번호를 id로 remove_ids → add_with_ids
+    - id를 유지할 수 없는 인덱스(IndexFlatIP, HNSW 삭제 등)는 저장된 임베딩으로 재빌드 (재인코딩 없음)
+    """
+    drop = np.union1d(upsert_rows, remove_rows).astype('int64')
+    upsert_rows = np.asarray(upsert_rows, dtype='int64')
+    if index is not None and supports_ids(index):
+        try:
+            if len(drop):
+                index.remove_ids(drop)
+            if len(upsert_rows):
+                index.add_with_ids(np.ascontiguousarray(embeddings[upsert_rows]), upsert_rows)
+            return index, "incremental"
+        except RuntimeError as e:
+            print(f"⚠️ 증분 갱신 불가, 재빌드: {str(e).splitlines()[0]}")
+
+    index_type = index_type or (index_type_of(index) if index is not None else "flat")
+    return build_index(embeddings[active_rows], index_type=index_type, ids=active_rows), "rebuild"
+
+
+def _replace(tmp, path):
+    os.replace(tmp, path)
+    print(f"💾 교체 완료: {path}")
+
+
+def ingest_catalogue(incoming, encode_fn, meta_path=BOOK_META_PATH, embeddings_path=BOOK_EMBEDDINGS_PATH,
+                     index_path=FAISS_INDEX_PATH, prune=False, index_type=None, batch_size=INGEST_BATCH_SIZE,
+                     store_path=BOOK_STORE_PATH):
+    """
+    ✅ 새/변경된 책만 인코딩해 카탈로그 파일을 갱신
+    - encode_fn(texts, batch_size) → 정규화된 float32 임베딩
+    - 기존 행 번호는 그대로 유지 (새 책은 끝에 추가) → 행 번호 = 인덱스 id
+    - 임시 파일에 모두 쓴 뒤 임베딩 → 메타 → 인덱스 순서로 os.replace
+      (새 메타/임베딩은 기존 행을 모두 포함하므로 교체 도중에도 기존 인덱스 결과가 유효)
+    - 컬럼형 저장소(store_path)가 있으면 인덱스 교체 전에 같은 임베딩 타입으로 다시 생성
+    반환: 요약 dict
+    """
+    start = time.perf_counter()
+    current = pd.read_pickle(meta_path)
+    if 'text_for_embed' not in current.columns:
+        current['text_for_embed'] = embed_texts_of(current)
+    if 'CONTENT_HASH' not in current.columns:
+        current['CONTENT_HASH'] = content_hashes(embed_texts_of(current)).values
+    if 'REMOVED' not in current.columns:
+        current['REMOVED'] = False
+
+    incoming = prepare_catalogue(incoming)
+    incoming['text_for_embed'] = embed_texts_of(incoming)
+    changed_rows, revived_rows, new_books, removed_rows, changed_pos = diff_catalogue(current, incoming, prune)
+    print(f"📚 변경 {len(changed_rows)} / 신규 {len(new_books)} / 복원 {len(revived_rows)} / 제거 {len(removed_rows)}")
+    summary = {
+        "changed": len(changed_rows), "new": len(new_books),
+        "revived": len(revived_rows), "removed": len(removed_rows)
+    }
+    if not (len(changed_rows) or len(new_books) or len(revived_rows) or len(removed_rows)):
+        return {**summary, "index_update": None, "seconds": round(time.perf_counter() - start, 3)}
+
+    # 메타: 변경 행 덮어쓰기 + 신규 행 추가
+    common = [col for col in incoming.columns if col in current.columns]
+    if len(changed_rows):
+        current.loc[current.index[changed_rows], common] = incoming.iloc[changed_pos][common].values
+    current['REMOVED'] = current['REMOVED'].astype(bool)
+    current.loc[current.index[np.union1d(changed_rows, revived_rows)], 'REMOVED'] = False
+    current.loc[current.index[removed_rows], 'REMOVED'] = True
+    meta = pd.concat([current, new_books], ignore_index=True)
+    meta['REMOVED'] = meta['REMOVED'].fillna(False).astype(bool)
+    texts = meta['text_for_embed']
+    meta['CONTENT_HASH'] = content_hashes(texts).values
+
+    # 임베딩: 변경 + 신규 행만 인코딩
+    new_rows = np.arange(len(current), len(meta))
+    targets = np.concatenate([changed_rows, new_rows]).astype(np.int64)
+    old = np.load(embeddings_path, mmap_mode='r')
+    emb_tmp = embeddings_path + ".tmp.npy"
+    embeddings = write_embeddings(emb_tmp, old, len(meta), targets, texts.values[targets].tolist(),
+                                  encode_fn, batch_size=batch_size)
+
+    # 인덱스: 행 번호 id로 제거/추가
+    index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+    active_rows = np.flatnonzero(~meta['REMOVED'].values)
+    upsert_rows = np.concatenate([targets, revived_rows]).astype(np.int64)
+    index, mode = update_index(index, embeddings, upsert_rows, removed_rows, active_rows, index_type)
+
+    meta_tmp, index_tmp = meta_path + ".tmp", index_path + ".tmp"
+    meta.to_pickle(meta_tmp)
+    faiss.write_index(index, index_tmp)
+    if store_exists(store_path):
+        build_book_store(meta, embeddings, store_path, dtype=store_embedding_dtype(store_path))
+        print(f"💾 컬럼형 저장소 갱신: {store_path}")
+    del embeddings
+    _replace(emb_tmp, embeddings_path)
+    _replace(meta_tmp, meta_path)
+    _replace(index_tmp, index_path)
+    return {**summary, "index_update": mode, "ntotal": int(index.ntotal),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+# ============================================================
+# 🔹 서빙 프로세스: 교체된 파일 다시 로드
+# ============================================================
+def reload_catalogue():
+    """ 교체된 카탈로그 파일을 로드한 뒤 레지스트리 값 교체 (로드 중에는 기존 값으로 서빙) """
+    registered = registry.status()
+    registry.reload([name for name in CATALOGUE_REGISTRY_NAMES if name in registered])
+
+
+def watch_catalogue(interval=CATALOGUE_WATCH_SECONDS, path=FAISS_INDEX_PATH):
+    """ ✅ 인덱스 파일(마지막으로 교체됨)의 변경을 interval초마다 확인해 자동 reload (워커마다 실행) """
+    def mtime():
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def loop():
+        last = mtime()
+        while True:
+            time.sleep(interval)
+            current = mtime()
+            if current is not None and current != last:
+                try:
+                    reload_catalogue()
+                    last = current
+                except Exception as e:
+                    print(f"❌ 카탈로그 다시 로드 실패: {e}")
+
+    thread = threading.Thread(target=loop, name="catalogue-watch", daemon=True)
+    thread.start()
+    return thread
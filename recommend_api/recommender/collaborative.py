@@ -1,57 +1,357 @@
 # 유저 협업 필터링 추천 시스템
 
+import os
+import threading
 import pandas as pd
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
-from recommender.utils import get_connection
+from recommender.streaming import STREAM_CHUNK_ROWS, read_sql_frame
+from recommender.metrics import timed
 
-def build_user_similarity():
-    conn, server = get_connection()
-    query = """
-    SELECT 
-        r.user_id, 
-        r.book_id, 
-        r.rating, 
-        b.title, 
-        b.author,
-        b.category_name,
-        b.cover AS book_cover_url   -- ✅ 커버 URL 추가
+# dense: 기존 users×users 유사도 행렬 / sparse: CSR 평점 행렬 + top-k 이웃
+# sparse는 상위 CF_TOP_K명 이웃만 쓰므로 dense(전체 사용자 가중합)와 추천 결과가 다를 수 있음 → 기본은 dense
+CF_ENGINE = os.getenv("CF_ENGINE", "dense")
+CF_TOP_K = int(os.getenv("CF_TOP_K", "50"))
+
+RECORD_COLUMNS = ['book_id', 'title', 'author', 'category_name', 'book_cover_url']
+
+# 평점만 chunk로 읽고, 책 정보는 책마다 한 번만 조회 (리뷰 행마다 제목/저자 문자열을 받지 않음)
+RATING_QUERY = """
+    SELECT r.user_id, r.book_id, r.rating
     FROM reviews r
     JOIN books b ON r.book_id = b.book_id
     WHERE r.rating IS NOT NULL
       AND r.book_id IS NOT NULL;
+"""
+
+REVIEWED_BOOKS_QUERY = """
+    SELECT
+        b.book_id,
+        b.title,
+        b.author,
+        b.category_name,
+        b.cover AS book_cover_url   -- ✅ 커버 URL 추가
+    FROM books b
+    WHERE b.book_id IN (SELECT book_id FROM reviews WHERE rating IS NOT NULL AND book_id IS NOT NULL);
+"""
+
+
+@timed("cf.load_reviews")
+def load_reviews(chunksize=STREAM_CHUNK_ROWS):
+    """
+    ✅ 리뷰 평점 + 책 정보 (user_id, book_id, rating, title, author, category_name, book_cover_url)
+    - 평점은 chunk 스트리밍 + int32 축소, 책 정보는 책당 1행만 받아 merge (문자열 객체를 행끼리 공유)
     """
-    df = pd.read_sql(query, conn)
-    conn.close(); server.stop()
+    ratings = read_sql_frame(RATING_QUERY, chunksize=chunksize)
+    books = read_sql_frame(REVIEWED_BOOKS_QUERY, chunksize=chunksize)
+    if ratings.empty:
+        return pd.DataFrame(columns=['user_id', 'rating'] + RECORD_COLUMNS)
+    return ratings.merge(books, on='book_id', how='inner')
+
+
+def build_user_similarity():
+    df = load_reviews()
 
     matrix = df.pivot_table(index='user_id', columns='book_id', values='rating').fillna(0)
     sim_df = pd.DataFrame(cosine_similarity(matrix), index=matrix.index, columns=matrix.index)
     return df, matrix, sim_df
 
+# ============================================================
+# 🔹 메모리 상주 CF 모델 (한 번 빌드 후 증분 업데이트)
+# ============================================================
+
+class CFModel:
+    """
+    ✅ user × book 행렬과 유사도 행렬을 프로세스에 유지하는 CF 모델
+    - 최초 요청 시 한 번만 빌드
+    - add_reviews(): 새 리뷰가 들어온 사용자 행/열만 다시 계산
+    - invalidate() / refresh(): 다음 요청 때 재빌드 / 즉시 재빌드
+    """
+
+    def __init__(self):
+        self.df = None
+        self.matrix = None
+        self.sim_df = None
+        self.built_at = None
+        self._stale = True
+        self._lock = threading.RLock()
+
+    @timed("cf.build")
+    def build(self, df=None):
+        if df is None:
+            df = load_reviews()
+        matrix = df.pivot_table(index='user_id', columns='book_id', values='rating').fillna(0)
+        sim_df = pd.DataFrame(cosine_similarity(matrix), index=matrix.index, columns=matrix.index)
+        with self._lock:
+            self.df, self.matrix, self.sim_df = df, matrix, sim_df
+            self.built_at = pd.Timestamp.now()
+            self._stale = False
+        print(f"✅ CF 모델 빌드 완료 (users={len(matrix.index)}, books={len(matrix.columns)})")
+        return self
+
+    def ensure_built(self):
+        with self._lock:
+            if self._stale or self.matrix is None:
+                self.build()
+        return self
+
+    def invalidate(self):
+        """ 다음 요청에서 전체 재빌드하도록 표시 """
+        with self._lock:
+            self._stale = True
+
+    def refresh(self):
+        """ 즉시 전체 재빌드 """
+        return self.build()
+
+    @timed("cf.add_reviews")
+    def add_reviews(self, reviews):
+        """
+        ✅ 새 리뷰를 반영해 해당 사용자의 평점 행과 유사도 행/열만 갱신
+        reviews: user_id, book_id, rating (+ title, author, category_name, book_cover_url) dict 리스트 또는 DataFrame
+        """
+        new = pd.DataFrame(reviews)
+        if new.empty:
+            return self
+        new = new.dropna(subset=['user_id', 'book_id', 'rating'])
+
+        with self._lock:
+            if self._stale or self.matrix is None:
+                self.build()
+                return self
+
+            self.df = pd.concat([self.df, new], ignore_index=True)
+
+            users = pd.Index(new['user_id'].unique())
+            books = pd.Index(new['book_id'].unique())
+            new_users = users.difference(self.matrix.index)
+            new_books = books.difference(self.matrix.columns)
+            if len(new_users) or len(new_books):
+                self.matrix = self.matrix.reindex(
+                    index=self.matrix.index.append(new_users),
+                    columns=self.matrix.columns.append(new_books),
+                    fill_value=0.0  # 새 책 열도 float (int 열에 소수 평점을 넣으면 잘리거나 경고)
+                )
+                self.sim_df = self.sim_df.reindex(
+                    index=self.matrix.index, columns=self.matrix.index, fill_value=0.0
+                )
+
+            # pivot_table과 동일하게 (user, book) 중복 평점은 평균
+            keys = pd.MultiIndex.from_frame(new[['user_id', 'book_id']]).unique()
+            pairs = self.df[self.df['user_id'].isin(users) & self.df['book_id'].isin(books)]
+            cell = pairs.groupby(['user_id', 'book_id'])['rating'].mean().reindex(keys)
+            for (uid, bid), rating in cell.items():
+                self.matrix.at[uid, bid] = rating
+
+            # 변경된 사용자 행만 유사도 재계산: O(변경 사용자 × 전체 사용자)
+            rows = cosine_similarity(self.matrix.loc[users], self.matrix)
+            self.sim_df.loc[users, :] = rows
+            self.sim_df.loc[:, users] = rows.T
+        return self
+
+    @timed("cf.recommend")
+    def recommend(self, user_id, top_n=3):
+        with self._lock:
+            return self._recommend(user_id, top_n)
+
+    def _recommend(self, user_id, top_n):
+        df, matrix, sim_df = self.df, self.matrix, self.sim_df
+        if user_id not in sim_df.index:
+            return []
+
+        sims = sim_df[user_id].sort_values(ascending=False)[1:]  # 자기 자신 제외
+        weighted = np.dot(sims.values, matrix.loc[sims.index])
+        pred = weighted / (sims.sum() + 1e-9)
+
+        rated = matrix.loc[user_id][matrix.loc[user_id] > 0].index
+        preds = pd.Series(pred, index=matrix.columns).drop(rated, errors='ignore')
+
+        top_books = preds.sort_values(ascending=False).head(top_n)
+        recs = df[df['book_id'].isin(top_books.index)].drop_duplicates('book_id').copy()
+        recs['predicted_rating'] = recs['book_id'].map(top_books)
+
+        # ✅ 커버 컬럼 포함해 반환
+        return recs[RECORD_COLUMNS + ['predicted_rating']].to_dict(orient='records')
+
+
+# ============================================================
+# 🔹 Sparse CSR 평점 행렬 + top-k 이웃 CF 엔진
+# ============================================================
+
+class SparseCFModel(CFModel):
+    """
+    ✅ users×users 유사도 행렬 없이 CSR 평점 행렬만 유지하는 CF 모델
+    - 메모리: O(평점 수)
+    - 요청 시 희소 내적(Rn · Rn[u]ᵀ)으로 해당 사용자의 유사도만 계산 후 상위 k명 이웃 사용
+    - add_reviews(): 새 리뷰가 있는 사용자 행만 다시 계산해 CSR 배열에 끼워 넣음 (df는 빌드 시점 원본)
+    """
+
+    def __init__(self, k=CF_TOP_K):
+        super().__init__()
+        self.k = k
+        self.Rn = None
+        self.user_index = None
+        self.book_index = None
+        self.book_meta = None
+        self.counts = None              # matrix.data와 같은 위치의 (user, book) 평점 개수 (중복 평점 평균용)
+
+    @timed("cf.build")
+    def build(self, df=None):
+        if df is None:
+            df = load_reviews()
+        with self._lock:
+            self.df = df
+            self._build_matrix()
+            self.built_at = pd.Timestamp.now()
+            self._stale = False
+        print(f"✅ Sparse CF 모델 빌드 완료 (users={len(self.user_index)}, books={len(self.book_index)}, ratings={self.matrix.nnz})")
+        return self
+
+    def _build_matrix(self):
+        # pivot_table과 동일하게 (user, book) 중복 평점은 평균
+        cell = self.df.groupby(['user_id', 'book_id'])['rating'].agg(['mean', 'size'])
+        self.user_index = cell.index.levels[0]
+        self.book_index = cell.index.levels[1]
+        rows, cols = cell.index.codes
+        # groupby 결과는 (행, 열) 순으로 정렬되어 있으므로 CSR 배열을 직접 구성 (matrix/Rn/counts 위치 일치)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(self.user_index)))])
+        ratings = cell['mean'].to_numpy(np.float32)
+        self._set_arrays(indptr, np.asarray(cols, dtype=np.int32), ratings,
+                         ratings * _inv_row_norms(rows, ratings)[rows], cell['size'].to_numpy(np.int64))
+        self.book_meta = self.df.drop_duplicates('book_id').set_index('book_id')[RECORD_COLUMNS[1:]]
+
+    def _set_arrays(self, indptr, indices, ratings, normalised, counts):
+        shape = (len(self.user_index), len(self.book_index))
+        self.matrix = sparse.csr_matrix((ratings, indices, indptr), shape=shape)
+        self.Rn = sparse.csr_matrix((normalised.astype(np.float32), indices, indptr), shape=shape)
+        self.counts = counts
+
+    def _update_rows(self, new):
+        """
+        새 평점이 있는 사용자 행만 다시 계산 (기존 평균 × 개수 + 새 평점 → 평균)
+        나머지 행은 CSR 배열 위치만 옮겨 복사 (전체 평점 groupby / 정렬 없음)
+        """
+        delta = new.groupby(['user_id', 'book_id'])['rating'].agg(['sum', 'size'])
+        users = delta.index.get_level_values(0)
+        books = delta.index.get_level_values(1)
+        new_users = users.unique().difference(self.user_index)
+        new_books = books.unique().difference(self.book_index)
+        self.user_index = self.user_index.append(new_users)
+        self.book_index = self.book_index.append(new_books)
+        if len(new_books):
+            meta = new[new['book_id'].isin(new_books)].drop_duplicates('book_id').set_index('book_id')
+            self.book_meta = pd.concat([self.book_meta, meta.reindex(columns=RECORD_COLUMNS[1:])])
+
+        n_users = len(self.user_index)
+        lengths = np.zeros(n_users, dtype=np.int64)
+        lengths[:self.matrix.shape[0]] = np.diff(self.matrix.indptr)
+        touched = np.unique(self.user_index.get_indexer(users))
+        entry_rows = np.repeat(np.arange(n_users), lengths)
+        old = np.isin(entry_rows, touched)
+
+        cells = pd.DataFrame({
+            'row': np.concatenate([entry_rows[old], self.user_index.get_indexer(users)]),
+            'col': np.concatenate([self.matrix.indices[old], self.book_index.get_indexer(books)]),
+            'sum': np.concatenate([self.matrix.data[old] * self.counts[old], delta['sum'].to_numpy(float)]),
+            'size': np.concatenate([self.counts[old], delta['size'].to_numpy(np.int64)]),
+        }).groupby(['row', 'col']).sum().reset_index()
+        rows = cells['row'].to_numpy()
+        ratings = (cells['sum'] / cells['size']).to_numpy(np.float32)
+        normalised = ratings * _inv_row_norms(rows, ratings, n_users)[rows]
+
+        new_lengths = lengths.copy()
+        new_lengths[touched] = np.bincount(rows, minlength=n_users)[touched]
+        indptr = np.concatenate([[0], np.cumsum(new_lengths)])
+        kept = ~np.isin(np.repeat(np.arange(n_users), new_lengths), touched)
+
+        def splice(previous, updated):
+            out = np.empty(indptr[-1], dtype=previous.dtype)
+            out[kept] = previous[~old]
+            out[~kept] = updated
+            return out
+
+        self._set_arrays(indptr, splice(self.matrix.indices, cells['col'].to_numpy()),
+                         splice(self.matrix.data, ratings), splice(self.Rn.data, normalised),
+                         splice(self.counts, cells['size'].to_numpy(np.int64)))
+
+    @timed("cf.add_reviews")
+    def add_reviews(self, reviews):
+        """ 새 리뷰가 있는 사용자 행만 다시 계산 (유사도 행렬 없음, 다른 행은 배열 복사만) """
+        new = pd.DataFrame(reviews)
+        if new.empty:
+            return self
+        new = new.dropna(subset=['user_id', 'book_id', 'rating'])
+
+        with self._lock:
+            if self._stale or self.matrix is None:
+                self.build()
+                return self
+            self._update_rows(new)
+        return self
+
+    def neighbours(self, user_id, k=None):
+        """ 사용자의 상위 k명 이웃 (행 번호, 코사인 유사도) """
+        k = k or self.k
+        u = self.user_index.get_loc(user_id)
+        sims = (self.Rn @ self.Rn[u].T).toarray().ravel()
+        sims[u] = 0.0  # 자기 자신 제외
+        cand = np.flatnonzero(sims > 0)
+        if len(cand) > k:
+            cand = cand[np.argpartition(-sims[cand], k - 1)[:k]]
+        return cand, sims[cand]
+
+    def _recommend(self, user_id, top_n):
+        if self.user_index is None or user_id not in self.user_index:
+            return []
+
+        neigh, sims = self.neighbours(user_id)
+        if len(neigh) == 0:
+            return []
+
+        weighted = np.asarray(self.matrix[neigh].T @ sims, dtype=np.float64)
+        pred = weighted / (sims.sum() + 1e-9)
+
+        u = self.user_index.get_loc(user_id)
+        row = self.matrix[u]
+        pred[row.indices[row.data > 0]] = -np.inf  # 이미 평가한 책 제외
+
+        n = min(top_n, int(np.isfinite(pred).sum()))
+        if n <= 0:
+            return []
+        top = np.argpartition(-pred, n - 1)[:n]
+        top = top[np.argsort(-pred[top])]
+
+        book_ids = self.book_index[top]
+        recs = self.book_meta.loc[book_ids].reset_index()
+        recs['predicted_rating'] = pred[top]
+
+        # ✅ 커버 컬럼 포함해 반환
+        return recs[RECORD_COLUMNS + ['predicted_rating']].to_dict(orient='records')
+
+
+def _inv_row_norms(rows, values, n_rows=None):
+    """ (행 번호, 값) 배열 → 행별 1/L2 노름 (노름이 0인 행은 0) """
+    norms = np.sqrt(np.bincount(rows, weights=np.square(values, dtype=np.float64), minlength=n_rows or 0))
+    return np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0).astype(np.float32)
+
+
+_cf_model = SparseCFModel() if CF_ENGINE == "sparse" else CFModel()
+
+
+def get_cf_model():
+    """ 프로세스 전역 CF 모델 (필요 시 빌드) """
+    return _cf_model.ensure_built()
+
+
+def invalidate_cf_model():
+    _cf_model.invalidate()
+
+
+def refresh_cf_model():
+    return _cf_model.refresh()
+
 # ============================================================
 
 def recommend_collaborative(user_id, top_n=3):
-    df, matrix, sim_df = build_user_similarity()
-    if user_id not in sim_df.index:
-        return []
-
-    sims = sim_df[user_id].sort_values(ascending=False)[1:]  # 자기 자신 제외
-    weighted = np.dot(sims.values, matrix.loc[sims.index])
-    pred = weighted / (sims.sum() + 1e-9)
-
-    rated = matrix.loc[user_id][matrix.loc[user_id] > 0].index
-    preds = pd.Series(pred, index=matrix.columns).drop(rated, errors='ignore')
-
-    top_books = preds.sort_values(ascending=False).head(top_n)
-    recs = df[df['book_id'].isin(top_books.index)].drop_duplicates('book_id')
-    recs['predicted_rating'] = recs['book_id'].map(top_books)
-
-    # ✅ 커버 컬럼 포함해 반환
-    return recs[[
-        'book_id', 
-        'title', 
-        'author', 
-        'category_name', 
-        'book_cover_url',    # 커버 URL 포함
-        'predicted_rating'
-    ]].to_dict(orient='records')
\ No newline at end of file
+    return get_cf_model().recommend(user_id, top_n=top_n)
@@ -1,27 +1,244 @@
 ## 콘텐츠 기반 추천 시스템
 
-import faiss, numpy as np, pandas as pd
-from sentence_transformers import SentenceTransformer
+import os, re, threading
+from collections import OrderedDict
+import numpy as np, pandas as pd
+from recommender.ann_index import load_index
+from recommender.book_store import BookStore, cover_urls_of
+from recommender.registry import registry
+from recommender.inference import EncodeBatcher, INFERENCE_BATCHING
+from recommender.metrics import timed
+
+MODEL_NAME = "jhgan/ko-sroberta-multitask"
+BOOK_META_PATH = os.getenv("BOOK_META_PATH", "data/book_meta.pkl")
+BOOK_EMBEDDINGS_PATH = os.getenv("BOOK_EMBEDDINGS_PATH", "data/book_embeddings.npy")
+
+# pickle: book_meta.pkl + book_embeddings.npy / columnar: BOOK_STORE_PATH (scripts.build_book_store로 생성)
+CATALOGUE_FORMAT = os.getenv("CATALOGUE_FORMAT", "pickle")
+BOOK_STORE_PATH = os.getenv("BOOK_STORE_PATH", "data/book_store")
+
+# 인덱스 파일 및 검색 파라미터 (IVF: nprobe / HNSW: efSearch)
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/book_faiss.index")
+FAISS_NPROBE = os.getenv("FAISS_NPROBE")
+FAISS_EF_SEARCH = os.getenv("FAISS_EF_SEARCH")
+
+ENCODE_CACHE_SIZE = int(os.getenv("ENCODE_CACHE_SIZE", "4096"))
+
+
+# ============================================================
+# 🔹 (제목, 저자) / ISBN → 임베딩 행 번호 인덱스
+# ============================================================
+def normalize_key(x):
+    """ 노트북 clean_title과 동일하게 공백·제로폭 문자 제거 + 소문자 """
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return ''
+    return re.sub(r'[\s\u200b\xa0]+', '', str(x)).lower()
+
+
+# 결과 레코드에 필요한 컬럼
+RESULT_COLUMNS = ["BOOK_TITLE_NM", "AUTHR_NM", "COVER_URL", "PUBLISHER_NM", "KDC_NM"]
+
+
+def catalogue_frame(books, columns):
+    """ 카탈로그(DataFrame 또는 BookStore)에서 있는 컬럼만 DataFrame으로 """
+    if isinstance(books, BookStore):
+        return books.frame(columns)
+    return books[[col for col in columns if col in books.columns]]
+
+
+def build_book_lookup(df):
+    """
+    ✅ 카탈로그 기반 조회 테이블 (중복 키는 첫 번째 행 사용)
+    - by_title_author: "제목|저자" → 행 번호
+    - by_title: 카탈로그에서 유일한 제목 → 행 번호
+    - by_isbn: ISBN → 행 번호
+    """
+    df = catalogue_frame(df, ["BOOK_TITLE_NM", "AUTHR_NM", "ISBN_THIRTEEN_NO"])
+    rows = pd.Series(np.arange(len(df)))
+    titles = df["BOOK_TITLE_NM"].map(normalize_key).values
+    authors = df["AUTHR_NM"].map(normalize_key).values
+
+    by_title_author = rows.groupby(pd.Index(titles) + "|" + pd.Index(authors)).first().to_dict()
+    title_counts = pd.Series(titles).value_counts()
+    unique_titles = rows[pd.Series(titles).map(title_counts).values == 1]
+    by_title = dict(zip(titles[unique_titles.values], unique_titles.values))
+    by_isbn = {}
+    if "ISBN_THIRTEEN_NO" in df.columns:
+        isbns = df["ISBN_THIRTEEN_NO"].astype(str).str.strip().values
+        by_isbn = rows.groupby(isbns).first().to_dict()
+    return {"by_title_author": by_title_author, "by_title": by_title, "by_isbn": by_isbn}
+
+
+# ============================================================
+# 🔹 지연 로딩 (import 시점에는 읽지 않음)
+# ============================================================
+def _load_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+def _load_books():
+    if CATALOGUE_FORMAT == "columnar":
+        return BookStore(BOOK_STORE_PATH)
+    return pd.read_pickle(BOOK_META_PATH)
+
+
+def _load_embeddings():
+    # mmap: 여러 워커가 같은 페이지 캐시를 공유 (columnar: float16/int8 → 조회 행만 float32로 복원)
+    if CATALOGUE_FORMAT == "columnar":
+        # books와 같은 manifest(버전)에서 열기 (reload 중에는 새로 로드한 books)
+        books = registry.get("books")
+        return (books if isinstance(books, BookStore) else BookStore(BOOK_STORE_PATH)).open_embeddings()
+    return np.load(BOOK_EMBEDDINGS_PATH, mmap_mode='r')
+
+
+def _load_index():
+    return load_index(FAISS_INDEX_PATH, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH, mmap=True)
+
+
+registry.register("model", _load_model)
+registry.register("books", _load_books)
+registry.register("embeddings", _load_embeddings)
+registry.register("index", _load_index)
+registry.register("book_lookup", lambda: build_book_lookup(registry.get("books")))
+
+
+def lookup_book_row(title, author=None, isbn=None):
+    """ 카탈로그에 있는 책이면 임베딩 행 번호, 없으면 None """
+    book_lookup = registry.get("book_lookup")
+    if isbn:
+        row = book_lookup["by_isbn"].get(str(isbn).strip())
+        if row is not None:
+            return int(row)
+    t = normalize_key(title)
+    row = book_lookup["by_title_author"].get(f"{t}|{normalize_key(author)}")
+    if row is None:
+        row = book_lookup["by_title"].get(t)
+    return None if row is None else int(row)
+
+
+# ============================================================
+# 🔹 카탈로그에 없는 책만 모델 인코딩 (LRU 캐시)
+# ============================================================
+_encode_cache = OrderedDict()
+_encode_lock = threading.Lock()
+
+
+@timed("content.model_forward")
+def _model_encode(texts):
+    return registry.get("model").encode(texts, normalize_embeddings=True).astype('float32')
+
+
+# 동시 요청의 encode를 한 번의 forward pass로 묶음
+# forward는 배처 스레드에서 실행 → 히스토그램은 배치당 1번, 요청별 단계 시간에는 배처가 대신 합산
+_batcher = EncodeBatcher(_model_encode, stage="content.model_forward") if INFERENCE_BATCHING else None
+
+
+def encode_texts(texts):
+    """
+    ✅ 캐시에 없는 텍스트만 한 번의 forward pass로 인코딩
+    최근 사용 순서로 ENCODE_CACHE_SIZE개까지 보관
+    """
+    with _encode_lock:
+        cached = {t: _encode_cache[t] for t in texts if t in _encode_cache}
+        for t in cached:
+            _encode_cache.move_to_end(t)
+    misses = list(dict.fromkeys(t for t in texts if t not in cached))
+
+    if misses:
+        with timed("content.encode"):
+            vecs = _batcher.encode(misses) if _batcher else _model_encode(misses)
+        with _encode_lock:
+            for t, v in zip(misses, vecs):
+                _encode_cache[t] = v
+                cached[t] = v
+            while len(_encode_cache) > ENCODE_CACHE_SIZE:
+                _encode_cache.popitem(last=False)
+    return np.stack([cached[t] for t in texts])
+
+
+@timed("content.fetch_fields")
+def take_result_fields(rows):
+    """ 결과 행들의 RESULT_COLUMNS 값을 한 번에 조회 → {컬럼: 값 리스트} """
+    books = registry.get("books")
+    if isinstance(books, BookStore):
+        return books.take(rows, RESULT_COLUMNS)
+    df = books.iloc[rows]
+    fields = {col: df[col].tolist() for col in RESULT_COLUMNS if col != "COVER_URL"}
+    fields["COVER_URL"] = cover_urls_of(df)
+    return fields
+
+
+def _rows_to_records(inds, sims):
+    """
+    ✅ FAISS 결과 (n_query × top_n) → 쿼리별 추천 리스트
+    결과 전체 행에 대해 필요한 필드만 한 번에 조회 (-1은 건너뜀)
+    """
+    valid = inds >= 0
+    fields = take_result_fields(inds[valid])
+
+    records = [
+        {
+            "book_title": title,
+            "author": author,
+            "book_cover_url": cover,
+            "similarity": sim,
+            "publisher": publisher,
+            "category": category
+        }
+        for title, author, cover, sim, publisher, category in zip(
+            fields["BOOK_TITLE_NM"],
+            fields["AUTHR_NM"],
+            fields["COVER_URL"],
+            sims[valid].astype(float).tolist(),
+            fields["PUBLISHER_NM"],
+            fields["KDC_NM"]
+        )
+    ]
+    ends = np.cumsum(valid.sum(axis=1))
+    return [records[end - n:end] for n, end in zip(valid.sum(axis=1), ends)]
+
+
+def search_catalogue(books, top_n=3):
+    """
+    ✅ 여러 권의 책을 한 번에 검색 (배열 반환)
+    - books: [(title, author), ...] 또는 [{"title":..., "author":..., "isbn":...}, ...]
+    - 카탈로그에 있는 책은 저장된 임베딩을 그대로 사용, 없는 책만 한 번의 encode로 처리
+    - 모든 쿼리를 한 번의 index.search로 처리
+    - 반환: (쿼리 책의 행 번호(-1: 카탈로그에 없음), 결과 행 번호(n_query × top_n, -1: 없음), 유사도)
+    """
+    queries = [b if isinstance(b, dict) else {"title": b[0], "author": b[1]} for b in books]
+    with timed("content.lookup"):
+        rows = np.array([
+            -1 if (r := lookup_book_row(q.get("title"), q.get("author"), q.get("isbn"))) is None else r
+            for q in queries
+        ], dtype=np.int64)
+
+    index = registry.get("index")
+    qvecs = np.empty((len(queries), index.d), dtype='float32')
+    known = rows >= 0
+    if known.any():
+        qvecs[known] = registry.get("embeddings")[rows[known]]
+    if not known.all():
+        query_texts = [f"{q.get('title')} {q.get('author')}".strip() for q, k in zip(queries, known) if not k]
+        qvecs[~known] = encode_texts(query_texts)
+
+    # 자기 자신을 제외하기 위해 1개 더 검색
+    with timed("content.faiss_search"):
+        sims, inds = index.search(qvecs, top_n + 1)
+    inds = np.where((inds == rows[:, None]) & known[:, None], -1, inds)
+    keep = (inds >= 0) & (np.cumsum(inds >= 0, axis=1) <= top_n)
+    return rows, np.where(keep, inds, -1), sims
+
+
+@registry.pinned()
+def recommend_content_based_batch(books, top_n=3):
+    """ search_catalogue 결과를 쿼리별 추천 리스트로 변환 (입력 순서 유지) """
+    if not books:
+        return []
+    _, inds, sims = search_catalogue(books, top_n=top_n)
+    return _rows_to_records(inds, sims)
 
-model = SentenceTransformer("jhgan/ko-sroberta-multitask")
-df_books = pd.read_pickle("data/book_meta.pkl")
-embeddings = np.load("data/book_embeddings.npy")
-index = faiss.read_index("data/book_faiss.index")
 
 def recommend_content_based(title, author, top_n=3):
-    query_text = f"{title} {author}".strip()
-    qvec = model.encode([query_text], normalize_embeddings=True).astype('float32')
-    sims, inds = index.search(qvec, top_n)
-
-    recs = []
-    for idx, sim in zip(inds[0], sims[0]):
-        book = df_books.iloc[idx]
-        recs.append({
-            "book_title": book["BOOK_TITLE_NM"],
-            "author": book["AUTHR_NM"],
-            "book_cover_url": book.get("COVER_URL") or book.get("image_url"),
-            "similarity": float(sim),
-            "publisher": book["PUBLISHER_NM"],
-            "category": book["KDC_NM"]
-        })
-    return recs
+    return recommend_content_based_batch([(title, author)], top_n=top_n)[0]
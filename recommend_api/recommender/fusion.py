@@ -0,0 +1,99 @@
+## 하이브리드 점수 결합 (정규화 + 배열 기반 top-k)
+
+import os
+import numpy as np
+import pandas as pd
+
+# 소스별 점수 정규화: minmax / zscore / rrf (순위 기반 Reciprocal Rank Fusion)
+HYBRID_NORMALIZATION = os.getenv("HYBRID_NORMALIZATION", "minmax")
+# 같은 소스 안에서 중복된 후보 점수 집계: max / sum
+HYBRID_DUPLICATE_AGG = os.getenv("HYBRID_DUPLICATE_AGG", "max")
+RRF_K = int(os.getenv("RRF_K", "60"))
+# 최종 추천에서 카테고리별 최대 권수 (0: 제한 없음)
+HYBRID_MAX_PER_CATEGORY = int(os.getenv("HYBRID_MAX_PER_CATEGORY", "0"))
+
+NORMALIZATIONS = ("minmax", "zscore", "rrf")
+
+
+def normalize_scores(scores, method=HYBRID_NORMALIZATION, rrf_k=RRF_K):
+    """
+    ✅ 한 소스의 점수를 같은 척도로 변환
+    - minmax: [0, 1] (모두 같은 점수면 1)
+    - zscore: 평균 0, 표준편차 1 (모두 같은 점수면 0)
+    - rrf: 1 / (rrf_k + 순위)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return scores
+    if method == "minmax":
+        lo, hi = scores.min(), scores.max()
+        if hi - lo <= 0:
+            return np.ones_like(scores)
+        return (scores - lo) / (hi - lo)
+    if method == "zscore":
+        std = scores.std()
+        if std <= 0:
+            return np.zeros_like(scores)
+        return (scores - scores.mean()) / std
+    if method == "rrf":
+        ranks = np.empty(len(scores))
+        ranks[np.argsort(-scores, kind='stable')] = np.arange(1, len(scores) + 1)
+        return 1.0 / (rrf_k + ranks)
+    raise ValueError(f"지원하지 않는 정규화 방식: {method} ({', '.join(NORMALIZATIONS)})")
+
+
+def top_k_indices(scores, k):
+    """ argpartition으로 상위 k개만 고른 뒤 그 안에서만 정렬 """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.lexsort((top, -scores[top]))]
+
+
+def fuse_scores(sources, n_candidates, top_k, method=HYBRID_NORMALIZATION, duplicate_agg=HYBRID_DUPLICATE_AGG):
+    """
+    ✅ 후보 번호(codes) 배열 기반 점수 결합
+    - sources: [(codes, scores, weight), ...]  codes는 0..n_candidates-1 후보 번호
+    - 소스 안의 중복 후보는 duplicate_agg로 집계 → 소스별 정규화 → 가중합
+    - 반환: (상위 후보 번호, 결합 점수)
+    """
+    total = np.zeros(n_candidates)
+    for codes, scores, weight in sources:
+        codes = np.asarray(codes, dtype=np.int64)
+        if codes.size == 0:
+            continue
+        scores = np.asarray(scores, dtype=np.float64)
+        if duplicate_agg == "sum":
+            agg = np.zeros(n_candidates)
+            np.add.at(agg, codes, scores)
+        elif duplicate_agg == "max":
+            agg = np.full(n_candidates, -np.inf)
+            np.maximum.at(agg, codes, scores)
+        else:
+            raise ValueError(f"지원하지 않는 중복 집계 방식: {duplicate_agg} (max, sum)")
+        present = np.unique(codes)
+        total[present] += weight * normalize_scores(agg[present], method)
+
+    top = top_k_indices(total, top_k)
+    return top, total[top]
+
+
+def diversify(categories, max_per_category, k):
+    """
+    ✅ 점수 순으로 정렬된 후보에서 카테고리별 최대 max_per_category개만 남김
+    반환: 남길 위치 (최대 k개)
+    """
+    positions = np.arange(len(categories))
+    if max_per_category <= 0:
+        return positions[:k]
+    cats = pd.Series(categories, dtype=object).fillna("")
+    keep = cats.groupby(cats.values, sort=False).cumcount().values < max_per_category
+    return positions[keep][:k]
+
+
+def factorize_keys(*key_lists):
+    """ 여러 소스의 후보 키를 하나의 후보 번호 공간으로 변환 → (소스별 codes, 고유 키) """
+    sizes = [len(keys) for keys in key_lists]
+    codes, uniques = pd.factorize(pd.Index([k for keys in key_lists for k in keys], dtype=object))
+    return np.split(codes, np.cumsum(sizes)[:-1]), uniques
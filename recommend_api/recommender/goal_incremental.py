@@ -0,0 +1,184 @@
+## 목표 추천 증분 재계산 (새 활동이 있는 사용자만)
+#
+# data/goal_state.pkl: 사용자별 로그 집계(LogAggregates) + 목표 fingerprint + 마지막으로 저장한 독서 중단 일수
+# 1) reading_logs: high-water mark (read_at, log_id) 이후 로그만 스트리밍해 집계에 접음
+# 2) reading_goals: 사용자별 COUNT/SUM/MAX fingerprint를 GROUP BY 한 번으로 비교 → 목표가 바뀐 사용자
+# 3) 새 로그/바뀐 목표가 있는 사용자만 추천 재계산 후 goal_recommend 교체
+# 4) 나머지 사용자는 저장된 마지막 read_at으로 독서 중단 정보만 계산 → 값이 바뀐 사용자만 UPDATE
+# 주의: high-water mark보다 이전 시각으로 늦게 기록된 로그는 반영되지 않으므로 주기적으로 rebuild
+# GOAL_LOG_WINDOW_DAYS(최근 N일만 사용)와 함께 쓸 수 없음: 집계(합계/최댓값)에서 기간이 지난 로그를 뺄 수 없으므로
+# 전체 계산과 다른 결과가 저장됨 → 창이 설정되어 있으면 증분 계산을 거부
+# 동시 실행: 같은 프로세스는 _state_lock, 다른 gunicorn 워커/크론은 상태 파일 옆 .lock 파일의 flock으로 직렬화
+
+import os
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from recommender.goal_recommender import GOAL_COLUMNS, GOAL_LOG_WINDOW_DAYS, LogAggregates, iter_log_chunks, \
+    _assemble_recommendations
+from recommender.streaming import read_sql_frame
+from recommender.utils import save_goal_recommendations, update_goal_inactivity
+
+GOAL_STATE_PATH = os.getenv("GOAL_STATE_PATH", "data/goal_state.pkl")
+GOAL_STATE_VERSION = 3  # 2: fingerprint에 row_checksum 추가, 3: 집계를 TreeFold로 보관
+GOAL_USER_BATCH = 1000
+
+GOAL_FINGERPRINT_QUERY = """
+    SELECT
+        user_id,
+        COUNT(*) AS n_goals,
+        SUM(target_minutes) AS target_minutes,
+        SUM(completed_minutes) AS completed_minutes,
+        SUM(target_books) AS target_books,
+        SUM(completed_books) AS completed_books,
+        SUM(target_reviews) AS target_reviews,
+        SUM(completed_reviews) AS completed_reviews,
+        MAX(year * 100 + month) AS last_period,
+        -- 합계가 같은 수정(월 사이에 분 옮기기 등)도 감지하도록 행 값 체크섬
+        BIT_XOR(CRC32(CONCAT_WS(',', year, month, target_minutes, completed_minutes, target_books,
+                                completed_books, target_reviews, completed_reviews))) AS row_checksum
+    FROM reading_goals
+    GROUP BY user_id;
+"""
+
+_state_lock = threading.Lock()
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없음 (스레드 잠금만)
+    fcntl = None
+
+
+# ============================================================
+# 🔹 상태 파일
+# ============================================================
+@contextmanager
+def goal_state_lock(path=GOAL_STATE_PATH):
+    """
+    ✅ 상태 로드 → 재계산 → os.replace 전체를 프로세스 간에도 한 번에 하나만 실행
+    - 스레드: _state_lock / 프로세스: path + ".lock"에 배타적 flock (프로세스가 죽으면 자동 해제)
+    """
+    with _state_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".lock", "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def load_goal_state(path=GOAL_STATE_PATH):
+    if not os.path.exists(path):
+        return None
+    state = pd.read_pickle(path)
+    if state.get("version") != GOAL_STATE_VERSION:
+        print(f"⚠️ 목표 증분 상태 버전 불일치 → 전체 재계산: {path}")
+        return None
+    return state
+
+
+def save_goal_state(state, path=GOAL_STATE_PATH):
+    """ 임시 파일에 쓴 뒤 os.replace로 교체 """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    pd.to_pickle(state, tmp)
+    os.replace(tmp, path)
+
+
+# ============================================================
+# 🔹 목표 변경 감지
+# ============================================================
+def load_goal_fingerprints():
+    """ ✅ 사용자별 목표 요약값 + 행 체크섬 (user_id 인덱스, float) — 목표 행이 추가/수정되면 값이 바뀜 """
+    df = read_sql_frame(GOAL_FINGERPRINT_QUERY)
+    if df.empty:
+        return pd.DataFrame()
+    return df.set_index("user_id").astype(float)
+
+
+def changed_goal_users(before, after):
+    """ 이전/현재 fingerprint가 다른 사용자 (새로 생긴/사라진 사용자 포함) """
+    if before is None or before.empty:
+        return set(after.index.tolist())
+    if after.empty:
+        return set(before.index.tolist())
+    index = before.index.union(after.index)
+    diff = (before.reindex(index).fillna(-1) != after.reindex(index).fillna(-1)).any(axis=1)
+    return set(diff[diff].index.tolist())
+
+
+def load_goals_for_users(users, batch_size=GOAL_USER_BATCH):
+    """ 지정한 사용자의 목표 행만 조회 (IN 절을 batch_size명씩) """
+    users = [int(uid) for uid in users]
+    frames = []
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        placeholders = ", ".join(["%s"] * len(batch))
+        frames.append(read_sql_frame(
+            f"SELECT {', '.join(GOAL_COLUMNS)} FROM reading_goals WHERE user_id IN ({placeholders});", tuple(batch)
+        ))
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=GOAL_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+# ============================================================
+# 🔹 증분 재계산
+# ============================================================
+def update_goals_incremental(path=GOAL_STATE_PATH, rebuild=False, as_of=None, save=True):
+    """
+    ✅ 새 로그/바뀐 목표가 있는 사용자만 목표 추천을 다시 계산해 저장
+    - 상태 파일이 없거나 rebuild=True면 전체 로그를 한 번 스트리밍해 집계 생성 (모든 사용자 재계산)
+    - 다른 사용자는 독서 중단 일수/플래그만 갱신
+    - DB 저장이 끝난 뒤 상태 파일 교체 → 중간에 실패하면 다음 실행에서 같은 구간을 다시 처리
+    반환: {'recommendations': 재계산한 사용자 추천, 'inactivity_df': 전체 사용자, 'refreshed_users': UPDATE한 사용자 수}
+    """
+    if GOAL_LOG_WINDOW_DAYS > 0:
+        raise ValueError(f"GOAL_LOG_WINDOW_DAYS({GOAL_LOG_WINDOW_DAYS})가 설정된 경우 증분 계산을 지원하지 않습니다 (mode=full 사용)")
+    with goal_state_lock(path):
+        state = None if rebuild else load_goal_state(path)
+        fingerprints = load_goal_fingerprints()
+
+        if state is None:
+            agg = LogAggregates()
+            for chunk in iter_log_chunks():
+                agg.add(chunk)
+            changed = set(agg.user_ids())
+            written_days = pd.Series(dtype=float)
+        else:
+            agg = state["aggregates"]
+            changed = set()
+            for chunk in iter_log_chunks(after=agg.high_water):
+                agg.add(chunk)
+                changed.update(chunk["user_id"].unique().tolist())
+            changed |= changed_goal_users(state["fingerprints"], fingerprints)
+            written_days = state["inactivity_written"]
+        users = [uid for uid in agg.user_ids() if uid in changed]
+
+        # 전체 사용자의 독서 중단 정보는 마지막 read_at으로 한 번에 계산
+        inactivity = agg.inactivity(as_of=as_of)
+        recomputed = inactivity["user_id"].isin(users)
+        recs = _assemble_recommendations(users, agg.stats(users), load_goals_for_users(users), inactivity[recomputed])
+
+        # 재계산하지 않은 사용자 중 저장된 일수와 달라진 사용자만 UPDATE
+        previous = inactivity["user_id"].map(written_days)
+        stale = inactivity[~recomputed & (previous != inactivity["days_since_last_read"])]
+
+        if save:
+            save_goal_recommendations(recs)
+            update_goal_inactivity(stale)
+            save_goal_state({
+                "version": GOAL_STATE_VERSION,
+                "updated_at": pd.Timestamp.now(),
+                "aggregates": agg,
+                "fingerprints": fingerprints,
+                "inactivity_written": inactivity.set_index("user_id")["days_since_last_read"],
+            }, path)
+
+    print(f"✅ 목표 증분 재계산: 재계산 {len(recs)}명 / 독서 중단 갱신 {len(stale)}명 / 전체 {len(inactivity)}명")
+    return {"recommendations": recs, "inactivity_df": inactivity, "refreshed_users": len(stale)}
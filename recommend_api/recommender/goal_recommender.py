@@ -1,17 +1,80 @@
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from scipy.linalg import lstsq as scipy_lstsq
 from sklearn.linear_model import LinearRegression
-from recommender.utils import get_connection
+from recommender.utils import db_connection, TTLCache
+from recommender.metrics import timed
+from recommender.streaming import STREAM_CHUNK_ROWS, read_sql_chunks, read_sql_frame, TreeFold, \
+    median_from_counts, sum_from_counts
+
+# 사용자 단위 조회에서 필요한 컬럼만 읽음
+LOG_COLUMNS = ["log_id", "user_id", "read_at", "minutes_read", "pages_read"]
+GOAL_COLUMNS = [
+    "user_id", "year", "month",
+    "target_minutes", "completed_minutes",
+    "target_books", "completed_books",
+    "target_reviews", "completed_reviews",
+]
+
+# 특정 사용자 목표 추천 결과 캐시 (초, 0이면 캐시 안 함)
+GOAL_USER_CACHE_TTL = float(os.getenv("GOAL_USER_CACHE_TTL", "60"))
+_user_goal_cache = TTLCache(GOAL_USER_CACHE_TTL)
+
+# 전체 사용자 계산 시 최근 N일 로그만 읽음 (0이면 전체 기간)
+GOAL_LOG_WINDOW_DAYS = int(os.getenv("GOAL_LOG_WINDOW_DAYS", "0"))
+
+# 스트리밍 집계에서 독서시간(분)을 이 단위로 반올림해 개수 누적 (0이면 원래 값 그대로)
+# minutes_read가 소수 등 연속값이면 설정 → 사용자별 집계 크기가 제한되는 대신 중앙값/평균은 근삿값
+GOAL_MINUTES_BIN = float(os.getenv("GOAL_MINUTES_BIN", "0"))
 
 # ============================================================
 # 🔹 데이터 로드 및 전처리
 # ============================================================
+@timed("goals.load_all")
 def load_data():
-    conn, server = get_connection()
-    df_logs = pd.read_sql("SELECT * FROM reading_logs;", conn)
-    df_goals = pd.read_sql("SELECT * FROM reading_goals;", conn)
-    conn.close(); server.stop()
+    return read_sql_frame(f"SELECT {', '.join(LOG_COLUMNS)} FROM reading_logs;"), load_goals()
+
+
+@timed("goals.load_goals")
+def load_goals():
+    return read_sql_frame(f"SELECT {', '.join(GOAL_COLUMNS)} FROM reading_goals;")
+
+
+def iter_log_chunks(since=None, chunksize=STREAM_CHUNK_ROWS, after=None):
+    """
+    ✅ reading_logs를 chunk 단위로 스트리밍 (필요한 컬럼만 + read_at >= since)
+    - after=(read_at, log_id): 이 위치 이후에 기록된 로그만 (증분 계산의 high-water mark)
+    """
+    query = f"SELECT {', '.join(LOG_COLUMNS)} FROM reading_logs"
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("read_at >= %s")
+        params.append(since.strftime("%Y-%m-%d %H:%M:%S"))
+    if after is not None:
+        read_at = after[0].strftime("%Y-%m-%d %H:%M:%S")
+        conditions.append("(read_at > %s OR (read_at = %s AND log_id > %s))")
+        params.extend([read_at, read_at, int(after[1])])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return read_sql_chunks(query + ";", tuple(params) or None, chunksize)
+
+
+@timed("goals.load_user")
+def load_user_data(user_id):
+    """
+    ✅ 한 사용자의 로그/목표만 조회 (WHERE user_id = %s + 필요한 컬럼만)
+    """
+    with db_connection() as conn:
+        df_logs = pd.read_sql(
+            f"SELECT {', '.join(LOG_COLUMNS)} FROM reading_logs WHERE user_id = %s;",
+            conn, params=(int(user_id),)
+        )
+        df_goals = pd.read_sql(
+            f"SELECT {', '.join(GOAL_COLUMNS)} FROM reading_goals WHERE user_id = %s;",
+            conn, params=(int(user_id),)
+        )
     return df_logs, df_goals
 
 
@@ -31,7 +94,8 @@ def preprocess_logs(df_logs):
     df['is_weekend'] = df['read_at'].dt.weekday >= 5
     df['minutes_read'] = pd.to_numeric(df.get('minutes_read', 0), errors='coerce').fillna(0).astype(float)
     df['pages_read'] = pd.to_numeric(df.get('pages_read', 0), errors='coerce').fillna(0).astype(float)
-    df['ppm'] = df.apply(lambda r: (r['pages_read'] / r['minutes_read']) if r['minutes_read'] > 0 else 0.0, axis=1)
+    df['ppm'] = np.divide(df['pages_read'].values, df['minutes_read'].values,
+                          out=np.zeros(len(df)), where=df['minutes_read'].values > 0)
     return df
 
 
@@ -110,6 +174,25 @@ def detect_inactivity(df_logs, threshold_days=5, as_of=None):
     return last[['user_id', 'last_read', 'days_since_last_read', 'inactive']]
 
 
+def detect_inactivity_for_user(df_logs_user, user_id, threshold_days=5, as_of=None):
+    """
+    ✅ 한 사용자의 로그만으로 독서 중단 여부 계산
+    detect_inactivity(전체 로그) 결과에서 해당 사용자 행을 고른 것과 동일 (records 리스트)
+    """
+    if as_of is None:
+        as_of = pd.Timestamp.now()
+    if df_logs_user.empty:
+        return []
+    last_read = df_logs_user['read_at'].max()
+    days = (as_of - last_read).days
+    return [{
+        'user_id': user_id,
+        'last_read': last_read,
+        'days_since_last_read': days,
+        'inactive': days >= threshold_days
+    }]
+
+
 # ============================================================
 # 🔹 개인화 미션 추천
 # ============================================================
@@ -145,20 +228,29 @@ def recommend_weekly_mission(df_logs_user, df_goals_user=None):
 # 🔹 월간 리포트
 # ============================================================
 def monthly_report(df_goals, df_logs, year=None, month=None):
-    goals = df_goals.copy()
-    logs = df_logs.copy()
-    if year is not None:
-        goals = goals[goals['year'] == year]
-        logs = logs[logs['read_at'].dt.year == year]
-    if month is not None:
-        goals = goals[goals['month'] == month]
-        logs = logs[logs['read_at'].dt.month == month]
-
+    logs = _logs_in_period(df_logs, year, month)
     agg_logs = logs.groupby('user_id').agg(
         total_minutes=('minutes_read', 'sum'),
         sessions=('log_id', 'count'),
         avg_minutes=('minutes_read', 'median')
     ).reset_index()
+    return _merge_report(agg_logs, df_goals, year, month)
+
+
+def _logs_in_period(logs, year=None, month=None):
+    if year is not None:
+        logs = logs[logs['read_at'].dt.year == year]
+    if month is not None:
+        logs = logs[logs['read_at'].dt.month == month]
+    return logs
+
+
+def _merge_report(agg_logs, goals, year=None, month=None):
+    """ 사용자별 로그 집계 + 목표 집계 → 월간 리포트 """
+    if year is not None:
+        goals = goals[goals['year'] == year]
+    if month is not None:
+        goals = goals[goals['month'] == month]
 
     agg_goals = goals.groupby('user_id').agg(
         target_minutes=('target_minutes', 'sum'),
@@ -168,11 +260,18 @@ def monthly_report(df_goals, df_logs, year=None, month=None):
     ).reset_index()
 
     report = pd.merge(agg_logs, agg_goals, on='user_id', how='outer').fillna(0)
-    report['time_success_rate'] = report.apply(lambda r: (r['completed_minutes'] / r['target_minutes']) if r['target_minutes'] > 0 else np.nan, axis=1)
-    report['book_success_rate'] = report.apply(lambda r: (r['completed_books'] / r['target_books']) if r['target_books'] > 0 else np.nan, axis=1)
+    report['time_success_rate'] = _safe_ratio(report['completed_minutes'], report['target_minutes'])
+    report['book_success_rate'] = _safe_ratio(report['completed_books'], report['target_books'])
     return report
 
 
+def _safe_ratio(numer, denom):
+    """ denom > 0 이면 numer / denom, 아니면 NaN """
+    numer = numer.astype(float).values
+    denom = denom.astype(float).values
+    return np.divide(numer, denom, out=np.full(len(denom), np.nan), where=denom > 0)
+
+
 # ============================================================
 # 🔹 전체 사용자 추천 통합
 # ============================================================
@@ -203,11 +302,361 @@ def compute_all_recommendations(df_logs, df_goals):
     return {'recommendations': recs, 'report_df': reports, 'inactivity_df': inactivity}
 
 
+# ============================================================
+# 🔹 전체 사용자 추천 통합 (벡터화 버전)
+# ============================================================
+# compute_all_recommendations와 결과가 동일하도록 작성:
+# - 최빈값 동률 → 가장 작은 값 (Series.mode().iloc[0])
+# - 최근 4주/최근 3개 목표 평균 → 앞에서부터 합산 (Series.mean()과 같은 부동소수점 결과)
+# - 회귀 예측값이 정수 경계(int() 절삭에 민감)에 걸리면 해당 사용자만 lstsq로 재계산
+GOAL_TARGETS = {
+    # 추천 키: (목표 컬럼, 달성 컬럼, 예측 기준값)
+    "recommended_minutes": ("target_minutes", "completed_minutes", 300),
+    "recommended_books": ("target_books", "completed_books", 5),
+    "recommended_reviews": ("target_reviews", "completed_reviews", 3),
+}
+
+
+def period_of_hours(hours):
+    """ rule_based_time_recommendation의 period_of_hour 벡터화 """
+    h = np.asarray(hours)
+    return np.select(
+        [(5 <= h) & (h < 11), (11 <= h) & (h < 15), (15 <= h) & (h < 19), (19 <= h) & (h < 23)],
+        ['morning', 'afternoon', 'late_afternoon', 'evening'],
+        default='night'
+    )
+
+
+def _first_mode(df, key):
+    """ 사용자별 최빈값 (동률이면 가장 작은 값) """
+    return _first_mode_counts(df.groupby(['user_id', key]).size().reset_index(name='n'), key)
+
+
+def _first_mode_counts(counts, key):
+    """ (user_id, key, n) 개수표에서 사용자별 최빈값 (동률이면 가장 작은 값) """
+    counts = counts.sort_values(['user_id', 'n', key], ascending=[True, False, True], kind='mergesort')
+    return counts.drop_duplicates('user_id').set_index('user_id')[key]
+
+
+def _ordered_mean(values, users):
+    """ 사용자별 평균을 앞에서부터 합산해 계산 (users는 사용자별로 연속 정렬된 상태) """
+    codes, uniques = pd.factorize(np.asarray(users))
+    if len(codes) == 0:
+        return pd.Series(dtype=float)
+    pos = pd.Series(codes).groupby(codes).cumcount().values
+    mat = np.zeros((len(uniques), pos.max() + 1))
+    mat[codes, pos] = np.asarray(values, dtype=float)
+    return pd.Series(mat.sum(axis=1) / np.bincount(codes), index=uniques)
+
+
+def _lstsq_prediction(x, y, x0):
+    """ LinearRegression().fit(x, y).predict([[x0]]) 과 같은 연산 순서 (중심화 → lstsq → 절편) """
+    x_offset, y_offset = np.average(x), np.average(y)
+    coef = scipy_lstsq((x - x_offset)[:, None], y - y_offset, cond=getattr(LinearRegression(), 'tol', None))[0][0]
+    return x0 * coef + (y_offset - x_offset * coef)
+
+
+def _goal_predictions(goals):
+    """
+    ✅ 사용자별 단순회귀(달성 ~ 목표) 기울기/절편을 groupby 합계로 계산
+    - 예측값이 정수에 아주 가까운 경우만 사용자 행으로 lstsq 재계산 (int() 절삭 결과를 sklearn과 맞춤)
+    - NaN이 있는 사용자는 sklearn 에러 메시지까지 같도록 recommend_goals_for_user 사용
+    반환: {user_id: recommend_goals_for_user와 같은 dict 또는 None}
+    """
+    if 'user_id' not in goals.columns or goals.empty:
+        return {}
+    cols = [c for x, y, _ in GOAL_TARGETS.values() for c in (x, y)]
+    g = goals[['user_id'] + cols].copy()
+    g[cols] = g[cols].astype(float)
+    grouped = g.groupby('user_id', sort=False)
+    n = grouped.size()
+    has_nan = g[cols].isna().any(axis=1).groupby(g['user_id'], sort=False).any()
+
+    means = grouped[cols].transform('mean')
+    preds, near_int = {}, {}
+    for key, (x_col, y_col, x0) in GOAL_TARGETS.items():
+        xc = g[x_col] - means[x_col]
+        yc = g[y_col] - means[y_col]
+        sums = pd.DataFrame({'sxy': xc * yc, 'sxx': xc * xc, 'user_id': g['user_id']}).groupby('user_id', sort=False).sum()
+        xm = grouped[x_col].mean()
+        ym = grouped[y_col].mean()
+        slope = np.divide(sums['sxy'].values, sums['sxx'].values,
+                          out=np.zeros(len(sums)), where=sums['sxx'].values > 0)
+        preds[key] = pd.Series(x0 * slope + (ym.values - xm.values * slope), index=sums.index)
+        # 기울기가 있는 경우 정수 근처 예측값은 lstsq와 마지막 비트 차이로 int()가 달라질 수 있음
+        near_int[key] = (sums['sxx'] > 0) & (np.abs(preds[key] - np.round(preds[key])) < 1e-6)
+
+    rows = grouped.indices
+    results = {}
+    for uid, count in n.items():
+        if count < 2:
+            results[uid] = None
+        elif has_nan[uid]:
+            results[uid] = recommend_goals_for_user(uid, goals.iloc[rows[uid]])
+        else:
+            rec = {}
+            for key, (x_col, y_col, x0) in GOAL_TARGETS.items():
+                pred = preds[key][uid]
+                if near_int[key][uid]:
+                    user_rows = g.iloc[rows[uid]]
+                    pred = _lstsq_prediction(user_rows[x_col].values, user_rows[y_col].values, x0)
+                rec[key] = int(pred)
+            results[uid] = rec
+    return results
+
+
+@timed("goals.compute_all")
+def compute_all_recommendations_vectorized(df_logs, df_goals):
+    """
+    ✅ compute_all_recommendations와 같은 결과를 groupby 집계 한 번씩으로 계산
+    사용자별 필터링/모델 학습 루프 없이 O(로그 행 수 + 목표 행 수)
+    """
+    logs = preprocess_logs(df_logs)
+    users = logs['user_id'].unique().tolist()
+    inactivity = detect_inactivity(logs)
+    reports = monthly_report(df_goals, logs)
+
+    # 규칙 기반 시간 추천: 세션 수, 최빈 시간/시간대, 중앙값·평균 독서시간
+    logs = logs.assign(period=period_of_hours(logs['hour']), week=logs['read_at'].dt.isocalendar().week)
+    by_user = logs.groupby('user_id')
+    days_mean, minutes_mean = _recent_weekly_means(logs.groupby(['user_id', 'week'])['minutes_read'].agg(['size', 'sum']))
+    stats = {
+        'sessions': by_user.size(),
+        'top_hour': _first_mode(logs, 'hour'),
+        'top_period': _first_mode(logs, 'period'),
+        'median_minutes': by_user['minutes_read'].median(),
+        'mean_minutes': by_user['minutes_read'].mean(),
+        'days_mean': days_mean,
+        'minutes_mean': minutes_mean,
+    }
+    recs = _assemble_recommendations(users, stats, df_goals, inactivity)
+    return {'recommendations': recs, 'report_df': reports, 'inactivity_df': inactivity}
+
+
+def _recent_weekly_means(weekly):
+    """ (user_id, week)별 세션 수/독서시간 합계 → 최근 4주 (주 번호 내림차순) 평균 """
+    weekly = weekly.sort_index(level=['user_id', 'week'], ascending=[True, False]).groupby(level='user_id').head(4)
+    weekly_users = weekly.index.get_level_values('user_id')
+    return _ordered_mean(weekly['size'].values, weekly_users), _ordered_mean(weekly['sum'].values, weekly_users)
+
+
+def _assemble_recommendations(users, stats, goals, inactivity):
+    """
+    ✅ 사용자별 집계(stats)로 규칙/미션/목표 추천 dict 구성
+    stats: sessions, top_hour, top_period, median_minutes, mean_minutes, days_mean, minutes_mean (user_id 인덱스 Series)
+    """
+    # 목표 예측 (사용자별 단순회귀)
+    goal_preds = _goal_predictions(goals)
+
+    # 최근 3개 목표 달성률 평균
+    success = pd.Series(dtype=float)
+    if 'user_id' in goals.columns and not goals.empty:
+        rates = pd.DataFrame({
+            'user_id': goals['user_id'].values,
+            'rate': _safe_ratio(goals['completed_minutes'], goals['target_minutes'])
+        }).dropna(subset=['rate'])
+        recent = rates.groupby('user_id', sort=False).tail(3)
+        recent = recent.iloc[np.argsort(pd.factorize(recent['user_id'])[0], kind='stable')]
+        success = _ordered_mean(recent['rate'].values, recent['user_id'].values)
+        goal_users = set(goals['user_id'].unique())
+    else:
+        goal_users = set()
+
+    inactive_by_user = {r['user_id']: r for r in inactivity.to_dict('records')}
+
+    recs = {}
+    for uid in users:
+        if stats['sessions'][uid] < 3:
+            rule_rec = {'reason': 'cold_start', 'hour': 20, 'preferred_period': 'evening', 'session_minutes': 20, 'days_per_week': 3}
+        else:
+            avg_minutes = stats['median_minutes'][uid] or stats['mean_minutes'][uid] or 20
+            days_per_week = int(round(stats['days_mean'][uid]))
+            rule_rec = {
+                'reason': 'rule_based',
+                'preferred_period': str(stats['top_period'][uid]),
+                'hour': int(stats['top_hour'][uid]),
+                'session_minutes': int(max(5, round(avg_minutes * 1.1))),
+                'days_per_week': max(1, min(7, days_per_week))
+            }
+
+        base = int(round(stats['minutes_mean'][uid]))
+        recommended = int(round(base * 1.1))
+        rationale = 'no_goal_info'
+        if uid in goal_users and uid in success.index:
+            rate = success[uid]
+            if rate < 0.6:
+                recommended = max(10, int(round(base * 0.9)))
+                rationale = f'low_success_rate({rate:.2f})_reduce'
+            elif rate > 0.9:
+                recommended = int(round(base * 1.2))
+                rationale = f'high_success_rate({rate:.2f})_increase'
+            else:
+                rationale = f'avg_success_rate({rate:.2f})_small_inc'
+        mission = {'recommended_weekly_minutes': max(10, min(2000, recommended)), 'rationale': rationale}
+
+        recs[uid] = {
+            'goal_prediction': goal_preds.get(uid),
+            'rule_recommendation': rule_rec,
+            'mission_recommendation': mission,
+            'inactivity': inactive_by_user[uid]
+        }
+    return recs
+
+
+# ============================================================
+# 🔹 전체 사용자 추천 통합 (chunk 스트리밍 버전)
+# ============================================================
+class LogAggregates:
+    """
+    ✅ 로그 chunk를 차례로 접으면서 사용자별 집계만 유지
+    - 원본 로그 행은 chunk 처리 후 버림 → 메모리: 사용자 수 × (시간 24 + 주 53 + 서로 다른 독서시간 값)
+    - 독서시간은 값별 개수로 누적 → 중앙값도 정확히 계산
+      (분 단위 정수처럼 값 종류가 적을 때만 메모리가 제한됨, 연속값이면 GOAL_MINUTES_BIN으로 묶음)
+    - chunk별 부분 집계는 TreeFold로 합침 (chunk마다 누적값 전체를 다시 groupby하지 않음)
+    - stats()/inactivity()/report()는 compute_all_recommendations_vectorized와 같은 값 (GOAL_MINUTES_BIN=0일 때)
+    """
+
+    def __init__(self, year=None, month=None):
+        self.year, self.month = year, month
+        self.users = {}                 # 첫 등장 순서 유지
+        self.minutes_bin = GOAL_MINUTES_BIN
+        self.last_read = TreeFold("max")        # user_id → 마지막 read_at
+        self.hour_counts = TreeFold()           # (user_id, hour) → 세션 수
+        self.minute_counts = TreeFold()         # (user_id, minutes_read) → 세션 수
+        self.weekly = TreeFold()                # (user_id, week) → size, sum
+        self.report_counts = TreeFold()         # 리포트 기간의 (user_id, minutes_read) → 세션 수
+        self.report_sessions = TreeFold()       # 리포트 기간의 user_id → log_id 수
+        self.high_water = None                  # 지금까지 접은 마지막 로그 (read_at, log_id)
+
+    def _minutes(self, logs):
+        """ 개수 누적용 독서시간 (minutes_bin 단위로 반올림) """
+        if not self.minutes_bin:
+            return logs['minutes_read']
+        return (logs['minutes_read'] / self.minutes_bin).round() * self.minutes_bin
+
+    def add(self, chunk):
+        logs = preprocess_logs(chunk)
+        if logs.empty:
+            return self
+        newest = logs['read_at'].max()
+        mark = (newest, int(logs.loc[logs['read_at'] == newest, 'log_id'].max()))
+        if self.high_water is None or mark > self.high_water:
+            self.high_water = mark
+        self.users.update(dict.fromkeys(logs['user_id'].unique().tolist()))
+        self.last_read.add(logs.groupby('user_id')['read_at'].max())
+        self.hour_counts.add(logs.groupby(['user_id', 'hour']).size())
+        self.minute_counts.add(logs.groupby(['user_id', self._minutes(logs)]).size())
+        week = logs['read_at'].dt.isocalendar().week
+        self.weekly.add(logs.groupby(['user_id', week])['minutes_read'].agg(['size', 'sum']))
+
+        period_logs = _logs_in_period(logs, self.year, self.month)
+        if self.year is not None or self.month is not None:
+            self.report_counts.add(period_logs.groupby(['user_id', self._minutes(period_logs)]).size())
+        self.report_sessions.add(period_logs.groupby('user_id')['log_id'].count())
+        return self
+
+    def user_ids(self):
+        return list(self.users)
+
+    def stats(self, users=None):
+        """ 사용자별 집계 (users를 주면 해당 사용자 행만 계산) """
+        minute_counts, hour_counts, weekly = self.minute_counts.value(), self.hour_counts.value(), self.weekly.value()
+        if minute_counts is None:
+            return {}
+        if users is not None:
+            minute_counts, hour_counts, weekly = (
+                data[data.index.get_level_values('user_id').isin(users)] for data in (minute_counts, hour_counts, weekly)
+            )
+        sessions = minute_counts.groupby(level='user_id').sum()
+        hours = hour_counts.reset_index(name='n')
+        periods = hours.assign(period=period_of_hours(hours['hour'])).groupby(['user_id', 'period'])['n'].sum()
+        days_mean, minutes_mean = _recent_weekly_means(weekly)
+        return {
+            'sessions': sessions,
+            'top_hour': _first_mode_counts(hours, 'hour'),
+            'top_period': _first_mode_counts(periods.reset_index(), 'period'),
+            'median_minutes': median_from_counts(minute_counts),
+            'mean_minutes': sum_from_counts(minute_counts) / sessions,
+            'days_mean': days_mean,
+            'minutes_mean': minutes_mean,
+        }
+
+    def inactivity(self, threshold_days=5, as_of=None):
+        last = self.last_read.value()
+        if last is None:
+            last = pd.Series(dtype='datetime64[ns]')
+        return detect_inactivity(last.rename('read_at').rename_axis('user_id').reset_index(), threshold_days, as_of)
+
+    def report(self, df_goals):
+        counts = self.report_counts.value()
+        if counts is None:
+            counts = self.minute_counts.value()
+        if counts is None:
+            agg_logs = pd.DataFrame(columns=['user_id', 'total_minutes', 'sessions', 'avg_minutes'])
+        else:
+            agg_logs = pd.DataFrame({
+                'total_minutes': sum_from_counts(counts),
+                'sessions': self.report_sessions.value(),
+                'avg_minutes': median_from_counts(counts),
+            }).rename_axis('user_id').reset_index()
+        return _merge_report(agg_logs, df_goals, self.year, self.month)
+
+
+@timed("goals.compute_all_streaming")
+def compute_all_recommendations_streaming(log_chunks, df_goals, year=None, month=None):
+    """
+    ✅ 로그를 chunk 단위로 접어서 compute_all_recommendations_vectorized와 같은 결과 계산
+    - log_chunks: iter_log_chunks() 등 로그 DataFrame iterable
+    - 최대 메모리가 전체 로그 크기가 아니라 chunk 크기 + 사용자별 집계 크기에 비례
+    """
+    agg = LogAggregates(year, month)
+    for chunk in log_chunks:
+        agg.add(chunk)
+    inactivity = agg.inactivity()
+    recs = _assemble_recommendations(agg.user_ids(), agg.stats(), df_goals, inactivity)
+    return {'recommendations': recs, 'report_df': agg.report(df_goals), 'inactivity_df': inactivity}
+
+
+# ============================================================
+# 🔹 특정 사용자 목표 추천 (사용자 데이터만 조회)
+# ============================================================
+def recommend_goals_single_user(user_id, use_cache=True):
+    """
+    ✅ 한 사용자의 로그/목표만 읽어서 목표 추천 계산
+    - 지연시간/메모리가 전체 데이터가 아니라 해당 사용자 기록 크기에 비례
+    - GOAL_USER_CACHE_TTL초 동안 결과 캐시
+    """
+    if use_cache:
+        cached = _user_goal_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    df_logs, df_goals = load_user_data(user_id)
+    with timed("goals.compute_user"):
+        df_user_logs = preprocess_logs(df_logs)
+        df_user_goals = df_goals.copy()
+
+        result = {
+            "user_id": user_id,
+            "goal_prediction": recommend_goals_for_user(user_id, df_user_goals),
+            "rule_recommendation": rule_based_time_recommendation(df_user_logs),
+            "mission_recommendation": recommend_weekly_mission(df_user_logs, df_user_goals),
+            "inactivity": detect_inactivity_for_user(df_user_logs, user_id)
+        }
+    _user_goal_cache.set(user_id, result)
+    return result
+
+
+def invalidate_user_goal_cache(user_id=None):
+    _user_goal_cache.invalidate(user_id)
+
+
 # ============================================================
 # 🔹 Flask용 외부 호출 함수 (전체 사용자 예측)
 # ============================================================
 def recommend_goals_all_users():
-    df_logs, df_goals = load_data()
-    results = compute_all_recommendations(df_logs, df_goals)
-    return results
+    since = None
+    if GOAL_LOG_WINDOW_DAYS > 0:
+        since = pd.Timestamp.now() - pd.Timedelta(days=GOAL_LOG_WINDOW_DAYS)
+    return compute_all_recommendations_streaming(iter_log_chunks(since), load_goals())
 
@@ -1,19 +1,135 @@
 # 하이브리드 추천 (hybrid.py)
 
 #콘텐츠 기반에 가중치 α, 협업필터링 β(=1-α) 부여
-# → 최근 읽은 책 4개 × 각각 콘텐츠기반 3개씩 = 12권
-# → 협업 기반 top-3과 합침
+# → 최근 읽은 책 4개 × 각각 콘텐츠기반 후보 + 협업 기반 후보
+# → 소스별 점수 정규화(minmax / zscore / rrf) 후 가중합, 상위 12권
 
-from recommender.content_based import recommend_content_based
+import os
+from recommender.content_based import normalize_key
 from recommender.collaborative import recommend_collaborative
+from recommender.candidates import HYBRID_CANDIDATE_POOL, EMPTY_IDS, content_candidates_batch, drop_seen, \
+    get_seen_book_ids
+from recommender.fusion import HYBRID_NORMALIZATION, HYBRID_MAX_PER_CATEGORY, factorize_keys, \
+    fuse_scores, diversify
+from recommender.neighbours import HYBRID_SERVING_MODE, precomputed_candidates
+from recommender.metrics import timed
+from recommender.registry import registry
 
-def hybrid_recommend(user_id, recent_books, alpha=0.8):
-    content_recs = []
-    for book in recent_books[:4]:
-        content_recs.extend(recommend_content_based(book["title"], book["author"], top_n=10))
+# 소스별 후보 수 / 최종 추천 수 (콘텐츠 후보 수는 candidates.HYBRID_CANDIDATE_POOL)
+HYBRID_COLLAB_TOP_N = int(os.getenv("HYBRID_COLLAB_TOP_N", "5"))
+HYBRID_TOP_K = int(os.getenv("HYBRID_TOP_K", "12"))
 
-    collab_recs = recommend_collaborative(user_id, top_n=5)
 
+@registry.pinned()
+def hybrid_recommend(user_id, recent_books, alpha=0.8, normalization=HYBRID_NORMALIZATION, top_k=HYBRID_TOP_K,
+                     max_per_category=HYBRID_MAX_PER_CATEGORY, seen_ids=None):
+    """
+    ✅ 최근 책 4권의 후보 풀(한 번의 encode + FAISS 검색) + 협업 결과를 결합
+    - seen_ids: 사용자가 읽었거나 리뷰한 book_id (None이면 DB 조회, 짧은 TTL 캐시)
+    - HYBRID_SERVING_MODE=precomputed: 오프라인 이웃 테이블 조회만으로 후보 생성
+    """
+    if seen_ids is None:
+        with timed("hybrid.seen_books"):
+            seen_ids = get_seen_book_ids(user_id)
+    if HYBRID_SERVING_MODE == "precomputed":
+        with timed("hybrid.precomputed_candidates"):
+            content_recs, collab_recs = precomputed_candidates(recent_books[:4], seen_ids, HYBRID_COLLAB_TOP_N)
+        return fuse_recommendations(content_recs, collab_recs, alpha, normalization, top_k, max_per_category)
+    with timed("hybrid.content_candidates"):
+        content_recs = content_candidates_batch([recent_books[:4]], [seen_ids], HYBRID_CANDIDATE_POOL)[0]
+    with timed("hybrid.collaborative"):
+        collab_recs = drop_seen(recommend_collaborative(user_id, top_n=HYBRID_COLLAB_TOP_N), seen_ids)
+    return fuse_recommendations(content_recs, collab_recs, alpha, normalization, top_k, max_per_category)
+
+
+@registry.pinned()
+def hybrid_recommend_batch(recent_books_by_user, alpha=0.8, normalization=HYBRID_NORMALIZATION, top_k=HYBRID_TOP_K,
+                           max_per_category=HYBRID_MAX_PER_CATEGORY, seen_by_user=None):
+    """
+    ✅ 여러 사용자의 하이브리드 추천을 한 번에 계산
+    - recent_books_by_user: {user_id: [최근 책 dict, ...]}
+    - seen_by_user: {user_id: seen book_id 배열} (미리 계산한 값, 없으면 사용자별 조회)
+    - 모든 사용자의 최근 책을 한 번의 콘텐츠 배치 검색으로 처리
+    - 반환: {user_id: 추천 리스트}
+    """
+    user_ids = list(recent_books_by_user)
+    if seen_by_user is None:
+        seen_by_user = {user_id: get_seen_book_ids(user_id) for user_id in user_ids}
+    seen_list = [seen_by_user.get(user_id) for user_id in user_ids]
+
+    if HYBRID_SERVING_MODE == "precomputed":
+        return {
+            user_id: hybrid_recommend(
+                user_id, recent_books_by_user[user_id], alpha, normalization, top_k, max_per_category,
+                seen_ids=EMPTY_IDS if seen is None else seen
+            )
+            for user_id, seen in zip(user_ids, seen_list)
+        }
+
+    with timed("hybrid.content_candidates_batch"):
+        content_lists = content_candidates_batch(
+            [recent_books_by_user[user_id][:4] for user_id in user_ids], seen_list, HYBRID_CANDIDATE_POOL
+        )
+    return {
+        user_id: fuse_recommendations(
+            content_recs,
+            drop_seen(recommend_collaborative(user_id, top_n=HYBRID_COLLAB_TOP_N), seen),
+            alpha, normalization, top_k, max_per_category
+        )
+        for user_id, content_recs, seen in zip(user_ids, content_lists, seen_list)
+    }
+
+
+def candidate_key(rec, title_field):
+    """ book_id가 있으면 book_id, 없으면 정규화한 제목 """
+    book_id = rec.get("book_id")
+    return normalize_key(rec[title_field]) if book_id is None else int(book_id)
+
+
+@timed("hybrid.fusion")
+def fuse_recommendations(content_recs, collab_recs, alpha=0.8, normalization=HYBRID_NORMALIZATION, top_k=HYBRID_TOP_K,
+                         max_per_category=HYBRID_MAX_PER_CATEGORY):
+    """
+    ✅ 정규화된 점수의 가중합으로 두 소스 결합
+    - 콘텐츠 similarity / 협업 predicted_rating을 소스별로 정규화 후 α, 1-α 가중
+    - 같은 책(book_id 기준)이 여러 번 나오면 점수를 집계 (양쪽 소스 모두 반영)
+    - max_per_category > 0이면 카테고리별 최대 권수 제한
+    - 출력 형식은 merge_recommendations와 동일
+    """
+    content_keys = [candidate_key(rec, "book_title") for rec in content_recs]
+    collab_keys = [candidate_key(rec, "title") for rec in collab_recs]
+    (content_codes, collab_codes), uniques = factorize_keys(content_keys, collab_keys)
+
+    top, scores = fuse_scores(
+        [
+            (content_codes, [rec["similarity"] for rec in content_recs], alpha),
+            (collab_codes, [rec["predicted_rating"] for rec in collab_recs], 1 - alpha),
+        ],
+        n_candidates=len(uniques), top_k=len(uniques) if max_per_category > 0 else top_k, method=normalization
+    )
+
+    # 후보별 표시 정보: 콘텐츠 결과 우선, 없으면 협업 결과 (각각 첫 번째 등장)
+    info = {}
+    for code, rec in zip(collab_codes[::-1], collab_recs[::-1]):
+        info[code] = (rec["title"], rec["author"], rec.get("book_cover_url"), rec.get("category_name"))
+    for code, rec in zip(content_codes[::-1], content_recs[::-1]):
+        info[code] = (rec["book_title"], rec["author"], rec.get("book_cover_url"), rec.get("category"))
+
+    top, scores = top.tolist(), scores.tolist()
+    keep = diversify([info[code][3] for code in top], max_per_category, top_k)
+    return [
+        {
+            "book_title": info[top[i]][0],
+            "author": info[top[i]][1],
+            "book_cover_url": info[top[i]][2],
+            "hybrid_score": scores[i]
+        }
+        for i in keep.tolist()
+    ]
+
+
+def merge_recommendations(content_recs, collab_recs, alpha=0.8):
+    """ 기존 방식 (제목 문자열 기준 첫 결과만 유지, 원점수 그대로 가중) """
     merged = []
     seen = set()
 
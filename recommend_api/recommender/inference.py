@@ -0,0 +1,93 @@
+## 모델 인코딩 마이크로 배칭 (동시 요청 → forward pass 1번)
+
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from recommender.metrics import add_request_stage
+
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "1") == "1"
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "256"))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "64"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+
+
+class InferenceQueueFull(Exception):
+    """ 추론 대기열이 가득 참 → 요청 거절 (HTTP 503) """
+
+
+class EncodeBatcher:
+    """
+    ✅ 여러 스레드의 encode 요청을 모아 한 번의 model.encode로 처리
+    - 대기열 크기 제한(queue_size): 넘치면 InferenceQueueFull
+    - 첫 요청 후 max_wait_ms 동안 또는 max_batch개 텍스트가 찰 때까지 모음
+    - 작업 스레드는 첫 encode() 호출 시 시작 (gunicorn fork 이후 워커마다 생성)
+    - stage: forward 시간을 배치에 포함된 각 요청의 단계 시간에도 합산 (요청의 contextvars 컨텍스트로 실행)
+    """
+
+    def __init__(self, encode_fn, queue_size=INFERENCE_QUEUE_SIZE, max_batch=INFERENCE_MAX_BATCH,
+                 max_wait_ms=INFERENCE_MAX_WAIT_MS, stage=None):
+        self.encode_fn = encode_fn
+        self.stage = stage
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, texts):
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put_nowait((list(texts), future, contextvars.copy_context()))
+        except queue.Full:
+            raise InferenceQueueFull(f"추론 대기열 초과 ({self._queue.maxsize})")
+        return future
+
+    def encode(self, texts, timeout=INFERENCE_TIMEOUT):
+        return self.submit(texts).result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for item_texts, _, _ in batch for t in item_texts]
+            begin = time.perf_counter()
+            try:
+                vecs = self.encode_fn(texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - begin
+            start = 0
+            for item_texts, future, context in batch:
+                if self.stage:
+                    context.run(add_request_stage, self.stage, elapsed)
+                future.set_result(np.asarray(vecs[start:start + len(item_texts)]))
+                start += len(item_texts)
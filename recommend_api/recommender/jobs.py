@@ -0,0 +1,322 @@
+## 전체 사용자 배치 작업 (비동기 job + 체크포인트)
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_CHECKPOINT_DIR = os.getenv("JOB_CHECKPOINT_DIR", "data/jobs")
+# 실행 중인 작업은 JOB_HEARTBEAT_SECONDS마다 체크포인트를 갱신
+# heartbeat가 JOB_STALE_SECONDS 넘게 없거나 같은 호스트의 소유 프로세스가 없으면 중단된 작업(failed)으로 처리
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+ACTIVE_STATUSES = ("pending", "running")
+GOAL_JOB_MODES = ("full", "incremental")
+
+
+def _now():
+    return pd.Timestamp.now(tz='Asia/Seoul').strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _owner():
+    # preload 시 마스터에서 import되므로 pid는 호출 시점에 읽음
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Job:
+    """
+    ✅ 배치 작업 상태
+    status: pending → running → succeeded / failed / cancelled
+    done_ranges: 완료된 사용자 chunk 구간 [첫 user_id, 마지막 user_id] (재시작 시 건너뜀)
+    high_water: 처음 시작할 때 대상 사용자의 최대 user_id → resume은 이 값 이하 사용자만 처리
+      (작업 시작 후 생긴 사용자는 완료 구간 안이든 밖이든 resume에서 제외 → 다음 작업에서 처리)
+    owner / heartbeat_at: 실행 중인 프로세스(호스트:pid)와 마지막 체크포인트 갱신 시각(epoch 초)
+    """
+
+    def __init__(self, kind, params=None, job_id=None):
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params or {}
+        self.status = "pending"
+        self.total_users = None
+        self.done_users = 0
+        self.done_ranges = []
+        self.high_water = None
+        self.error = None
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.owner = None
+        self.heartbeat_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def to_dict(self):
+        progress = None
+        if self.total_users:
+            progress = round(self.done_users / self.total_users, 4)
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "total_users": self.total_users,
+            "done_users": self.done_users,
+            "progress": progress,
+            "done_ranges": self.done_ranges,
+            "high_water": self.high_water,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "owner": self.owner,
+            "heartbeat_at": self.heartbeat_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data["kind"], data.get("params"), job_id=data["job_id"])
+        for key in ("status", "total_users", "done_users", "done_ranges", "high_water", "error",
+                    "created_at", "started_at", "finished_at", "owner", "heartbeat_at"):
+            setattr(job, key, data.get(key))
+        job.done_ranges = job.done_ranges or []
+        job.done_users = job.done_users or 0
+        return job
+
+    def is_orphaned(self):
+        """ pending/running으로 기록됐지만 실행하던 프로세스가 사라진 작업 (워커 재시작 / OOM 등) """
+        if self.status not in ACTIVE_STATUSES:
+            return False
+        host, _, pid = (self.owner or "").rpartition(":")
+        if host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid)):
+            return True
+        return self.heartbeat_at is None or time.time() - self.heartbeat_at > JOB_STALE_SECONDS
+
+
+class JobManager:
+    """
+    ✅ 백그라운드 스레드 풀에서 배치 작업 실행
+    - chunk마다 체크포인트(JSON)를 원자적으로 기록 → 실패/중단 후 resume 가능
+    - 취소: 이 프로세스의 이벤트 + 체크포인트 옆 .cancel 파일 (다른 gunicorn 워커에서 요청해도 반영)
+    - 다른 워커가 실행 중인 작업도 체크포인트 파일로 상태 조회
+    - 실행 중인 작업은 heartbeat 스레드가 주기적으로 체크포인트 갱신
+      → 소유 프로세스가 죽어 갱신이 멈춘 작업은 조회 시 failed로 바꿔 resume 가능
+    """
+
+    def __init__(self, runners, workers=JOB_WORKERS, checkpoint_dir=JOB_CHECKPOINT_DIR):
+        self.runners = runners
+        self.checkpoint_dir = checkpoint_dir
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+    # ---------- 체크포인트 ----------
+    def _path(self, job_id, suffix=".json"):
+        return os.path.join(self.checkpoint_dir, f"{job_id}{suffix}")
+
+    def _save(self, job):
+        # heartbeat 스레드와 작업 스레드가 같은 임시 파일에 동시에 쓰지 않도록 작업 잠금 안에서 기록
+        with job._lock:
+            if job.status in ACTIVE_STATUSES:
+                job.heartbeat_at = time.time()
+            data = job.to_dict()
+            tmp = self._path(job.job_id, ".json.tmp")
+            with open(tmp, "w") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self._path(job.job_id))
+
+    def _load(self, job_id):
+        try:
+            with open(self._path(job_id)) as f:
+                job = Job.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return None
+        if job.is_orphaned():
+            print(f"⚠️ 실행 프로세스가 사라진 작업 → failed ({job_id}, owner {job.owner})")
+            job.status = "failed"
+            job.error = f"작업을 실행하던 프로세스가 종료됨 ({job.owner})"
+            job.finished_at = _now()
+            self._save(job)
+        return job
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            with self._lock:
+                active = [job for job in self._jobs.values() if job.status in ACTIVE_STATUSES]
+            for job in active:
+                try:
+                    self._save(job)
+                except OSError as e:
+                    print(f"⚠️ 작업 heartbeat 기록 실패 ({job.job_id}):", e)
+
+    # ---------- 작업 실행 ----------
+    def submit(self, kind, params=None):
+        if kind not in self.runners:
+            raise ValueError(f"지원하지 않는 작업 종류: {kind} ({', '.join(self.runners)})")
+        job = Job(kind, params)
+        return self._start(job)
+
+    def resume(self, job_id):
+        """ 실패/취소된 작업을 완료 구간 이후부터 다시 실행 """
+        job = self._jobs.get(job_id) or self._load(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status in ACTIVE_STATUSES:
+            raise ValueError(f"이미 실행 중인 작업입니다: {job_id}")
+        if job.status == "succeeded":
+            return job
+        job.status = "pending"
+        job.error = None
+        job.finished_at = None
+        job.cancel_event = threading.Event()
+        if os.path.exists(self._path(job_id, ".cancel")):
+            os.remove(self._path(job_id, ".cancel"))
+        return self._start(job)
+
+    def _start(self, job):
+        job.owner = _owner()
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._save(job)
+        self._pool.submit(self._run, job)
+        return job
+
+    def _should_stop(self, job):
+        return job.cancel_event.is_set() or os.path.exists(self._path(job.job_id, ".cancel"))
+
+    def _run(self, job):
+        job.status = "running"
+        job.started_at = _now()
+        self._save(job)
+
+        def on_start(total_users, high_water=None):
+            # resume 시에는 처음 기록한 high_water / 전체 사용자 수 유지 (진행률이 1을 넘지 않도록)
+            if job.high_water is None:
+                job.total_users = total_users
+                job.high_water = high_water
+            self._save(job)
+
+        def on_chunk_done(chunk_range, n_users):
+            # chunk_range=None: 연속 구간이 아닌 작업 → 진행률만 기록
+            with job._lock:
+                if chunk_range is not None:
+                    job.done_ranges.append(chunk_range)
+                job.done_users += n_users
+            self._save(job)
+
+        stop_seen = threading.Event()
+
+        def should_stop():
+            if self._should_stop(job):
+                stop_seen.set()
+                return True
+            return False
+
+        try:
+            self.runners[job.kind](
+                done_ranges=list(job.done_ranges),
+                high_water=job.high_water,
+                on_start=on_start,
+                on_chunk_done=on_chunk_done,
+                should_stop=should_stop,
+                **job.params
+            )
+            # 마지막 chunk 이후에 도착한 취소는 무시 (실제로 남은 사용자를 건너뛴 경우만 cancelled)
+            stopped_early = stop_seen.is_set() and (job.total_users is None or job.done_users < job.total_users)
+            job.status = "cancelled" if stopped_early else "succeeded"
+        except Exception as e:
+            print(f"❌ 작업 실패 ({job.job_id}):", e)
+            job.status = "failed"
+            job.error = str(e)
+        job.finished_at = _now()
+        self._save(job)
+
+    # ---------- 조회 / 취소 ----------
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return self._load(job_id)
+
+    def list(self):
+        job_ids = {name[:-5] for name in os.listdir(self.checkpoint_dir) if name.endswith(".json")}
+        jobs = [self.get(job_id) for job_id in job_ids]
+        return sorted((job for job in jobs if job), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if job.status in ACTIVE_STATUSES:
+            job.cancel_event.set()
+            open(self._path(job_id, ".cancel"), "w").close()
+        return job
+
+
+# ============================================================
+# 🔹 작업 종류별 실행 함수
+# ============================================================
+def validate_job_params(kind, params):
+    """ ✅ 제출 시점에 작업 파라미터 확인 (잘못된 값은 ValueError → /jobs 400) """
+    if kind == "goals" and params.get("mode", "full") not in GOAL_JOB_MODES:
+        raise ValueError(f"지원하지 않는 목표 작업 mode: {params['mode']} ({', '.join(GOAL_JOB_MODES)})")
+
+
+def run_books_job(done_ranges, on_start, on_chunk_done, should_stop, high_water=None, limit=3, alpha=0.8,
+                  chunk_size=None):
+    from recommender.batch import recommend_books_all_users, BATCH_CHUNK_SIZE
+    recommend_books_all_users(
+        limit=limit, alpha=alpha, chunk_size=chunk_size or BATCH_CHUNK_SIZE,
+        done_ranges=done_ranges, high_water=high_water, on_start=on_start, on_chunk_done=on_chunk_done,
+        should_stop=should_stop, keep_results=False
+    )
+
+
+def run_goals_job(done_ranges, on_start, on_chunk_done, should_stop, high_water=None, chunk_size=None,
+                  mode="full"):
+    validate_job_params("goals", {"mode": mode})
+    if mode == "incremental":
+        # 상태 파일 교체까지 한 번에 끝나는 작업 → 재시작 시 마지막 상태에서 다시 계산
+        from recommender.goal_incremental import update_goals_incremental
+        users = list(update_goals_incremental()["recommendations"])
+        on_start(len(users))
+        # 재계산한 사용자는 연속 구간이 아니므로 완료 구간은 기록하지 않음
+        on_chunk_done(None, len(users))
+        return
+    from recommender.batch import save_goals_all_users, BATCH_CHUNK_SIZE
+    from recommender.goal_recommender import recommend_goals_all_users
+    results = recommend_goals_all_users()
+    save_goals_all_users(
+        results, chunk_size=chunk_size or BATCH_CHUNK_SIZE, done_ranges=done_ranges, high_water=high_water,
+        on_start=on_start, on_chunk_done=on_chunk_done, should_stop=should_stop
+    )
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager({"books": run_books_job, "goals": run_goals_job})
+        return _manager
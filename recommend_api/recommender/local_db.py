@@ -0,0 +1,138 @@
+## 로컬 SQLite DB (MySQL 대체: 오프라인 개발 / 벤치마크)
+#
+# 서비스 코드의 쿼리를 그대로 실행할 수 있도록
+# - %s 자리표시자 → ?
+# - NOW() 함수 등록, NOW() - INTERVAL %s SECOND → NOW_MINUS_SECONDS(?)
+# - MySQL 함수 CRC32 / CONCAT_WS / BIT_XOR 등록
+# 사용: LOCAL_DB_PATH=data/local.db (utils.get_pool이 이 DB로 커넥션 풀 생성) 또는 use_local_db(path)
+
+import os
+import re
+import sqlite3
+import zlib
+import pandas as pd
+
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book_id INTEGER PRIMARY KEY, title TEXT, author TEXT, category_name TEXT, cover TEXT
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id INTEGER PRIMARY KEY, user_id INTEGER, book_id INTEGER, rating REAL, created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS reading_logs (
+    log_id INTEGER PRIMARY KEY, user_id INTEGER, book_id INTEGER, read_at TEXT,
+    minutes_read INTEGER, pages_read INTEGER
+);
+CREATE TABLE IF NOT EXISTS reading_goals (
+    goal_id INTEGER PRIMARY KEY, user_id INTEGER, year INTEGER, month INTEGER,
+    target_minutes INTEGER, completed_minutes INTEGER,
+    target_books INTEGER, completed_books INTEGER,
+    target_reviews INTEGER, completed_reviews INTEGER
+);
+CREATE TABLE IF NOT EXISTS book_recommend (
+    user_id INTEGER, book_title TEXT, author TEXT, book_cover_url TEXT, hybrid_score REAL,
+    created_at TEXT DEFAULT (datetime('now', 'localtime'))   -- NOW()와 같은 로컬 시각 형식
+);
+CREATE TABLE IF NOT EXISTS recommend_invalidation (
+    user_id INTEGER PRIMARY KEY, invalidated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS goal_recommend (
+    user_id INTEGER,
+    recommended_books INTEGER, recommended_minutes INTEGER, recommended_reviews INTEGER,
+    preferred_period TEXT, preferred_hour INTEGER, session_minutes INTEGER, days_per_week INTEGER,
+    recommended_weekly_minutes INTEGER, rationale TEXT,
+    days_since_last_read INTEGER, inactive_flag INTEGER,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_user ON reviews (user_id);
+CREATE INDEX IF NOT EXISTS idx_logs_user_read ON reading_logs (user_id, read_at);
+CREATE INDEX IF NOT EXISTS idx_logs_read ON reading_logs (read_at, log_id);
+CREATE INDEX IF NOT EXISTS idx_goals_user ON reading_goals (user_id);
+CREATE INDEX IF NOT EXISTS idx_book_recommend_user ON book_recommend (user_id);
+CREATE INDEX IF NOT EXISTS idx_goal_recommend_user ON goal_recommend (user_id);
+"""
+
+
+_INTERVAL_SECONDS = re.compile(r"NOW\(\)\s*-\s*INTERVAL\s+%s\s+SECOND", re.IGNORECASE)
+
+
+def _translate(sql):
+    return _INTERVAL_SECONDS.sub("NOW_MINUS_SECONDS(%s)", sql).replace("%s", "?")
+
+
+def _now():
+    return pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _crc32(value):
+    return None if value is None else zlib.crc32(str(value).encode("utf-8"))
+
+
+def _concat_ws(sep, *values):
+    # MySQL과 같이 NULL 값은 건너뜀
+    return sep.join(str(v) for v in values if v is not None)
+
+
+class _BitXor:
+    def __init__(self):
+        self.value = 0
+
+    def step(self, value):
+        if value is not None:
+            self.value ^= int(value)
+
+    def finalize(self):
+        return self.value
+
+
+def _now_minus_seconds(seconds):
+    return (pd.Timestamp.now() - pd.Timedelta(seconds=float(seconds))).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class LocalCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        return super().execute(_translate(sql), params)
+
+    def executemany(self, sql, rows):
+        return super().executemany(_translate(sql), rows)
+
+
+class LocalConnection(sqlite3.Connection):
+    """ ✅ MySQL용 쿼리(%s, NOW())를 그대로 받는 sqlite3 커넥션 (pd.read_sql도 sqlite3 경로로 처리) """
+
+    def cursor(self, factory=LocalCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, rows):
+        return self.cursor().executemany(sql, rows)
+
+
+def connect_local(path=None):
+    conn = sqlite3.connect(path or LOCAL_DB_PATH, factory=LocalConnection, check_same_thread=False)
+    conn.create_function("NOW", 0, _now)
+    conn.create_function("NOW_MINUS_SECONDS", 1, _now_minus_seconds)
+    conn.create_function("CRC32", 1, _crc32)
+    conn.create_function("CONCAT_WS", -1, _concat_ws)
+    conn.create_aggregate("BIT_XOR", 1, _BitXor)
+    return conn
+
+
+def create_schema(path=None):
+    conn = connect_local(path)
+    try:
+        conn.executescript(SCHEMA)
+    finally:
+        conn.close()
+
+
+def use_local_db(path=None, size=None):
+    """ 커넥션 풀을 로컬 SQLite로 교체 (스키마가 없으면 생성) """
+    from recommender.utils import set_connection_factory, DB_POOL_SIZE
+    path = path or LOCAL_DB_PATH
+    create_schema(path)
+    return set_connection_factory(lambda: connect_local(path), size=size or DB_POOL_SIZE)
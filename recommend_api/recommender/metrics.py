@@ -0,0 +1,289 @@
+## 단계별 지연시간 메트릭 + 요청 단위 샘플링 프로파일러
+#
+# - timed("stage"): with 블록 / 데코레이터로 단계 시간 측정 → stage_seconds{stage} 히스토그램
+# - 요청 중 측정된 단계는 요청별로도 모아 구조화 로그(JSON 한 줄) + Server-Timing 헤더로 출력
+# - GET /metrics: Prometheus 텍스트 형식 (?format=json: p50/p95/p99 추정치 포함)
+# - X-Profile 헤더: 해당 요청 스레드의 스택을 주기적으로 샘플링 → collapsed stack (flamegraph / speedscope 입력)
+# 메트릭은 프로세스(워커)별로 따로 집계됨
+
+import bisect
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# 요청마다 단계별 시간을 JSON 한 줄로 출력
+METRICS_REQUEST_LOG = os.getenv("METRICS_REQUEST_LOG", "1") == "1"
+# 초 단위 히스토그램 경계 (1ms ~ 30s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# PROFILE_ENABLED=1: X-Profile 헤더가 있으면 프로파일링 / PROFILE_TOKEN: 헤더 값이 토큰과 같을 때만
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+
+# ============================================================
+# 🔹 히스토그램 / 카운터
+# ============================================================
+class Histogram:
+    """ 고정 경계 누적 히스토그램 (Prometheus histogram과 같은 의미) """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """ 버킷 안에서 선형 보간한 분위수 추정치 (마지막 버킷은 관측 최댓값까지) """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            **{f"p{int(q * 100)}": None if self.count == 0 else round(self.quantile(q), 6) for q in (0.5, 0.95, 0.99)},
+            "max": round(self.max, 6),
+        }
+
+
+def _label_text(labels):
+    return ",".join(f'{k}="{v}"' for k, v in labels)
+
+
+class MetricsRegistry:
+    """ ✅ (이름, 라벨) → 히스토그램 / 카운터 (스레드 안전) """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """ JSON 출력용 {이름: [{labels, count, p50, ...}]} """
+        with self._lock:
+            result = {}
+            for (name, labels), hist in sorted(self._histograms.items()):
+                result.setdefault(name, []).append({"labels": dict(labels), **hist.snapshot()})
+            for (name, labels), value in sorted(self._counters.items()):
+                result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            return result
+
+    def prometheus(self):
+        """ Prometheus 텍스트 노출 형식 """
+        lines, typed = [], set()
+        with self._lock:
+            for (name, labels), hist in sorted(self._histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = itertools.accumulate(hist.counts)
+                for bound, count in zip([*hist.buckets, "+Inf"], cumulative):
+                    lines.append(f'{name}_bucket{{{_label_text((*labels, ("le", bound)))}}} {count}')
+                lines.append(f"{name}_sum{{{_label_text(labels)}}} {hist.sum:.6f}")
+                lines.append(f"{name}_count{{{_label_text(labels)}}} {hist.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{{{_label_text(labels)}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# 현재 요청에서 측정된 단계별 누적 시간 {stage: 초} (요청 밖에서는 None)
+_request_stages = contextvars.ContextVar("request_stages", default=None)
+
+
+@contextmanager
+def timed(stage):
+    """
+    ✅ 단계 시간 측정 (with timed("content.faiss_search"): ... / @timed("cf.build"))
+    - stage_seconds{stage} 히스토그램에 기록
+    - 요청 처리 중이면 요청별 단계 시간에도 합산
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe("stage_seconds", elapsed, stage=stage)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+def add_request_stage(stage, seconds):
+    """
+    현재 요청의 단계 시간에만 합산 (히스토그램에는 기록하지 않음)
+    다른 스레드(추론 배처 등)가 요청 대신 실행한 단계를 contextvars 컨텍스트 안에서 요청에 귀속할 때 사용
+    """
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+# ============================================================
+# 🔹 요청 단위 집계 (Flask before/after_request에서 호출)
+# ============================================================
+def start_request():
+    return _request_stages.set({})
+
+
+def finish_request(token, method, endpoint, path, status, seconds, profile_id=None):
+    """ ✅ 요청 시간/상태 기록 + 구조화 로그 → 단계별 시간(초) 반환 """
+    stages = _request_stages.get() or {}
+    _request_stages.reset(token)
+    if not METRICS_ENABLED:
+        return stages
+    metrics.observe("request_seconds", seconds, endpoint=endpoint, method=method)
+    metrics.inc("requests_total", endpoint=endpoint, method=method, status=status)
+    if METRICS_REQUEST_LOG:
+        record = {
+            "event": "request", "method": method, "path": path, "endpoint": endpoint, "status": status,
+            "ms": round(seconds * 1000, 2),
+            "stages_ms": {stage: round(s * 1000, 2) for stage, s in stages.items()},
+        }
+        if profile_id:
+            record["profile_id"] = profile_id
+        print(json.dumps(record, ensure_ascii=False))
+    return stages
+
+
+def server_timing(stages, total):
+    """ Server-Timing 헤더 값 (브라우저/클라이언트에서 단계별 시간 확인) """
+    parts = [f"{stage};dur={s * 1000:.2f}" for stage, s in stages.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+# ============================================================
+# 🔹 샘플링 프로파일러 (요청 단위, 의존성 없음)
+# ============================================================
+def profiling_requested(header_value):
+    """ X-Profile 헤더로 프로파일링을 켤지 결정 """
+    if not header_value:
+        return False
+    if PROFILE_TOKEN:
+        return header_value == PROFILE_TOKEN
+    return PROFILE_ENABLED
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    ✅ 대상 스레드의 스택을 interval마다 sys._current_frames()로 샘플링
+    결과: collapsed stack ("root;...;leaf 샘플 수" 줄) → flamegraph.pl / speedscope에 바로 입력
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {n}" for stack, n in self.samples.most_common()) + "\n"
+
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+def save_profile(profiler, endpoint, seconds):
+    """ 최근 PROFILE_KEEP개만 메모리에 보관 → profile_id """
+    profile_id = f"{os.getpid()}-{next(_profile_ids)}"
+    with _profiles_lock:
+        _profiles[profile_id] = {
+            "endpoint": endpoint, "ms": round(seconds * 1000, 2),
+            "samples": sum(profiler.samples.values()), "collapsed": profiler.collapsed(),
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        while len(_profiles) > PROFILE_KEEP:
+            _profiles.popitem(last=False)
+    return profile_id
+
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles():
+    with _profiles_lock:
+        return [{"profile_id": pid, **{k: v for k, v in p.items() if k != "collapsed"}} for pid, p in _profiles.items()]
@@ -0,0 +1,248 @@
+## 오프라인 item-item 이웃 테이블 (임베딩 유사도 / 공동 평점 CF)
+
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from recommender.content_based import lookup_book_row, take_result_fields
+from recommender.fusion import top_k_indices
+from recommender.registry import registry
+
+# online: 요청마다 FAISS 검색 + CF 계산 / precomputed: 이웃 테이블 조회만
+HYBRID_SERVING_MODE = os.getenv("HYBRID_SERVING_MODE", "online")
+NEIGHBOURS_DIR = os.getenv("NEIGHBOURS_DIR", "data/neighbours")
+NEIGHBOURS_TOP_K = int(os.getenv("NEIGHBOURS_TOP_K", "50"))
+
+CONTENT_NEIGHBOURS_PATH = os.path.join(NEIGHBOURS_DIR, "content_neighbours.npz")
+CF_NEIGHBOURS_PATH = os.path.join(NEIGHBOURS_DIR, "cf_neighbours.npz")
+
+CF_META_COLUMNS = ['title', 'author', 'category_name', 'book_cover_url']
+
+
+class NeighbourTable:
+    """
+    ✅ book_id → 상위 K개 이웃 (CSR 형태의 배열 4~5개)
+    - keys: 정렬된 book_id / indptr: keys별 이웃 구간
+    - ids, scores: 이웃 book_id와 유사도 / rows: 이웃의 카탈로그 행 번호 (콘텐츠 테이블)
+    - meta: 이웃 book_id별 표시 정보 (CF 테이블, 카탈로그에 없는 책 포함)
+    """
+
+    def __init__(self, keys, indptr, ids, scores, rows=None, meta_ids=None, meta=None):
+        self.keys, self.indptr, self.ids, self.scores = keys, indptr, ids, scores
+        self.rows = rows
+        self.meta_ids = meta_ids
+        self.meta = meta or {}
+
+    @classmethod
+    def from_lists(cls, keys, neighbour_lists, rows_lists=None, meta_ids=None, meta=None):
+        lengths = np.array([len(ids) for ids, _ in neighbour_lists], dtype=np.int64)
+        indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        def concat(arrays, dtype):
+            return np.concatenate(arrays).astype(dtype) if len(arrays) else np.empty(0, dtype=dtype)
+
+        return cls(
+            np.asarray(keys, dtype=np.int64), indptr,
+            concat([ids for ids, _ in neighbour_lists], np.int64),
+            concat([scores for _, scores in neighbour_lists], np.float32),
+            None if rows_lists is None else concat(rows_lists, np.int64),
+            meta_ids, meta
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, book_ids):
+        """
+        ✅ 여러 book_id의 이웃을 한 번에 조회 (searchsorted + 구간 gather)
+        반환: (쿼리 위치, 이웃 book_id, 유사도, 카탈로그 행 번호 또는 None)
+        """
+        q = np.asarray(book_ids, dtype=np.int64)
+        pos = np.searchsorted(self.keys, q)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == q[found]
+        pos = pos[found]
+        starts, lengths = self.indptr[pos], self.indptr[pos + 1] - self.indptr[pos]
+        offsets = np.cumsum(lengths) - lengths
+        idx = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+        owner = np.repeat(np.flatnonzero(found), lengths)
+        rows = None if self.rows is None else self.rows[idx]
+        return owner, self.ids[idx], self.scores[idx], rows
+
+    def meta_for(self, book_ids):
+        """ book_id별 표시 정보 → {컬럼: 값 리스트} (없으면 None) """
+        if self.meta_ids is None or not len(self.meta_ids):
+            return {col: [None] * len(book_ids) for col in self.meta}
+        pos = np.searchsorted(self.meta_ids, book_ids)
+        pos = np.minimum(pos, len(self.meta_ids) - 1)
+        hit = self.meta_ids[pos] == book_ids
+        return {
+            col: [v if h and v != '' else None for v, h in zip(values[pos].tolist(), hit.tolist())]
+            for col, values in self.meta.items()
+        }
+
+    def save(self, path):
+        """ 파일 1개(.npz)로 저장 후 os.replace (서빙 중 교체 가능) """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"keys": self.keys, "indptr": self.indptr, "ids": self.ids, "scores": self.scores}
+        if self.rows is not None:
+            arrays["rows"] = self.rows
+        if self.meta_ids is not None:
+            arrays["meta_ids"] = self.meta_ids
+            arrays.update({f"meta_{col}": values for col, values in self.meta.items()})
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = {key[5:]: data[key] for key in data.files if key.startswith("meta_") and key != "meta_ids"}
+            return cls(
+                data["keys"], data["indptr"], data["ids"], data["scores"],
+                data["rows"] if "rows" in data.files else None,
+                data["meta_ids"] if "meta_ids" in data.files else None, meta
+            )
+
+
+# ============================================================
+# 🔹 오프라인 생성
+# ============================================================
+def _top_neighbours(own_id, cand_ids, cand_scores, k):
+    """ 자기 자신 제외 + book_id 중복 제거(첫 번째 유지) 후 점수 상위 k개 → 입력 배열 기준 위치 """
+    pos = np.flatnonzero(cand_ids != own_id)
+    _, first = np.unique(cand_ids[pos], return_index=True)
+    pos = pos[np.sort(first)]
+    return pos[top_k_indices(cand_scores[pos], k)]
+
+
+def build_content_neighbours(index, embeddings, book_ids, active_rows=None, k=NEIGHBOURS_TOP_K, batch_size=4096):
+    """
+    ✅ 카탈로그 책마다 임베딩 유사도 상위 k개 이웃
+    - book_id가 같은 중복 행은 첫 번째 행만 키로 사용
+    - 중복 행을 걸러낼 여유를 두고 k + 8개 검색
+    """
+    active_rows = np.arange(len(book_ids)) if active_rows is None else np.asarray(active_rows)
+    keys, first = np.unique(book_ids[active_rows], return_index=True)
+    key_rows = active_rows[first]
+
+    neighbour_lists, rows_lists = [], []
+    for start in range(0, len(key_rows), batch_size):
+        batch = key_rows[start:start + batch_size]
+        sims, inds = index.search(np.ascontiguousarray(embeddings[batch], dtype='float32'), k + 8)
+        for own_id, cand_rows, cand_sims in zip(book_ids[batch], inds, sims):
+            valid = cand_rows >= 0
+            cand_rows, cand_sims = cand_rows[valid], cand_sims[valid]
+            sel = _top_neighbours(own_id, book_ids[cand_rows], cand_sims, k)
+            rows_lists.append(cand_rows[sel])
+            neighbour_lists.append((book_ids[cand_rows[sel]], cand_sims[sel]))
+        print(f"🔗 콘텐츠 이웃 {min(start + batch_size, len(key_rows))}/{len(key_rows)}")
+    return NeighbourTable.from_lists(keys, neighbour_lists, rows_lists)
+
+
+def build_cf_neighbours(df_reviews, k=NEIGHBOURS_TOP_K, batch_size=1024):
+    """
+    ✅ 공동 평점 기반 item-item 코사인 유사도 상위 k개 (reviews 테이블)
+    - book × user CSR 행렬을 행 정규화 후 batch 단위 희소 곱 (books × books 전체 행렬은 만들지 않음)
+    - 표시용 메타(title, author, category_name, book_cover_url)를 테이블에 함께 저장
+    """
+    cell = df_reviews.groupby(['book_id', 'user_id'])['rating'].mean()
+    book_index = cell.index.levels[0]
+    rows, cols = cell.index.codes
+    R = sparse.csr_matrix(
+        (cell.values.astype(np.float32), (rows, cols)),
+        shape=(len(book_index), len(cell.index.levels[1]))
+    )
+    norms = np.sqrt(np.asarray(R.multiply(R).sum(axis=1)).ravel())
+    inv = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    Rn = (sparse.diags(inv.astype(np.float32)) @ R).tocsr()
+    RnT = Rn.T.tocsr()
+
+    book_ids = np.asarray(book_index, dtype=np.int64)
+    neighbour_lists = []
+    for start in range(0, len(book_ids), batch_size):
+        S = (Rn[start:start + batch_size] @ RnT).tocsr()
+        for i in range(S.shape[0]):
+            lo, hi = S.indptr[i], S.indptr[i + 1]
+            cand, vals = S.indices[lo:hi], S.data[lo:hi]
+            positive = vals > 0
+            ids, scores = book_ids[cand[positive]], vals[positive]
+            sel = _top_neighbours(book_ids[start + i], ids, scores, k)
+            neighbour_lists.append((ids[sel], scores[sel]))
+        print(f"🔗 CF 이웃 {min(start + batch_size, len(book_ids))}/{len(book_ids)}")
+
+    meta = df_reviews.drop_duplicates('book_id').set_index('book_id').reindex(book_ids)
+    return NeighbourTable.from_lists(
+        book_ids, neighbour_lists, meta_ids=book_ids,
+        meta={col: meta[col].fillna('').astype(str).to_numpy(dtype=str) for col in CF_META_COLUMNS if col in meta.columns}
+    )
+
+
+# ============================================================
+# 🔹 precomputed 서빙: 테이블 조회 + 배열 병합
+# ============================================================
+if HYBRID_SERVING_MODE == "precomputed":
+    registry.register("content_neighbours", lambda: NeighbourTable.load(CONTENT_NEIGHBOURS_PATH))
+    registry.register("cf_neighbours", lambda: NeighbourTable.load(CF_NEIGHBOURS_PATH))
+
+
+def seed_book_ids(recent_books):
+    """ 최근 책의 book_id (없으면 카탈로그 조회로 매핑) """
+    book_ids = registry.get("book_ids")
+    seeds = []
+    for book in recent_books:
+        if book.get("book_id") is not None:
+            seeds.append(int(book["book_id"]))
+            continue
+        row = lookup_book_row(book.get("title"), book.get("author"), book.get("isbn"))
+        if row is not None:
+            seeds.append(int(book_ids[row]))
+    return np.unique(np.array(seeds, dtype=np.int64))
+
+
+def precomputed_candidates(recent_books, seen_ids=None, collab_top_n=5):
+    """
+    ✅ 이웃 테이블만으로 콘텐츠/협업 후보 생성 (모델 추론·행렬 연산 없음)
+    - 콘텐츠: 최근 책들의 임베딩 이웃
+    - 협업: 읽은/리뷰한 책 전체의 공동 평점 이웃 유사도 합 (item-based CF)
+    - 읽은 책과 최근 책은 제외
+    반환: (콘텐츠 레코드, 협업 레코드) — fuse_recommendations 입력 형식
+    """
+    seeds = seed_book_ids(recent_books)
+    seen = seeds if seen_ids is None or not len(seen_ids) else np.union1d(seen_ids, seeds)
+
+    _, ids, scores, rows = registry.get("content_neighbours").lookup(seeds)
+    keep = ~np.isin(ids, seen)
+    ids, scores, rows = ids[keep], scores[keep], rows[keep]
+    fields = take_result_fields(rows)
+    # 다양화 카테고리는 협업 후보와 같은 분류 (KDC_NM 대신 book_categories)
+    fields["category"] = registry.get("book_categories")[rows].tolist()
+    content_recs = [
+        {
+            "book_id": book_id,
+            "book_title": title,
+            "author": author,
+            "book_cover_url": cover,
+            "similarity": score,
+            "publisher": publisher,
+            "category": category
+        }
+        for book_id, title, author, cover, score, publisher, category in zip(
+            ids.tolist(), fields["BOOK_TITLE_NM"], fields["AUTHR_NM"], fields["COVER_URL"],
+            scores.astype(float).tolist(), fields["PUBLISHER_NM"], fields["category"]
+        )
+    ]
+
+    cf_table = registry.get("cf_neighbours")
+    _, ids, scores, _ = cf_table.lookup(seen)
+    keep = ~np.isin(ids, seen)
+    uniq, inverse = np.unique(ids[keep], return_inverse=True)
+    totals = np.bincount(inverse, weights=scores[keep], minlength=len(uniq))
+    top = top_k_indices(totals, collab_top_n)
+    meta = cf_table.meta_for(uniq[top])
+    collab_recs = [
+        {"book_id": book_id, **{col: meta[col][i] for col in meta}, "predicted_rating": score}
+        for i, (book_id, score) in enumerate(zip(uniq[top].tolist(), totals[top].tolist()))
+    ]
+    return content_recs, collab_recs
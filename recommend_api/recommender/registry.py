@@ -0,0 +1,126 @@
+## 모델/데이터 레지스트리 (지연 로딩 + 워밍업)
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# pinned() 블록 / reload 중인 스레드가 보는 값 세대 (None이면 현재 값)
+_pinned = contextvars.ContextVar("registry_pinned", default=None)
+
+
+class ModelRegistry:
+    """
+    ✅ 이름 → 로더 함수 등록, 처음 get() 할 때 한 번만 로드
+    - import 시점에는 아무것도 읽지 않음 (프로세스 시작이 빠름)
+    - warm_up(): 요청 전에 미리 로드 (백그라운드 스레드에서 호출 가능)
+    - is_ready(): /ready 엔드포인트용
+    - 값 dict는 바꿀 때마다 새로 만들어 교체(copy-on-write) → pinned()로 한 세대를 고정해 읽을 수 있음
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._values = {}
+        self._load_seconds = {}
+        self._errors = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+
+    def _swap(self, updates=None, removed=()):
+        with self._lock:
+            values = {**self._values, **(updates or {})}
+            for name in removed:
+                values.pop(name, None)
+            self._values = values
+
+    def get(self, name):
+        pinned = _pinned.get()
+        if pinned is not None and name in pinned:
+            return pinned[name]
+        values = self._values
+        if name in values:
+            return values[name]
+        with self._locks[name]:
+            if name not in self._values:
+                start = time.perf_counter()
+                try:
+                    value = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._swap({name: value})
+                self._errors.pop(name, None)
+                self._load_seconds[name] = round(time.perf_counter() - start, 3)
+                print(f"✅ {name} 로드 완료 ({self._load_seconds[name]}s)")
+        return self._values[name]
+
+    def set(self, name, value):
+        """ 로드된 값을 직접 교체 (카탈로그 갱신, 벤치마크용 모델 등) """
+        with self._locks[name]:
+            self._swap({name: value})
+
+    def unload(self, name):
+        """ 다음 get()에서 다시 로드 """
+        with self._locks[name]:
+            self._swap(removed=[name])
+
+    @contextmanager
+    def pinned(self):
+        """
+        ✅ 블록 안의 get()은 모두 같은 세대의 값을 반환 (중간에 reload가 끝나도 기존 값 유지)
+        with registry.pinned(): ... / @registry.pinned() — 이미 고정된 블록 안에서는 그대로 사용
+        """
+        if _pinned.get() is not None:
+            yield
+            return
+        token = _pinned.set(self._values)
+        try:
+            yield
+        finally:
+            _pinned.reset(token)
+
+    def reload(self, names):
+        """
+        ✅ 새 값을 모두 로드한 뒤 한 번에 교체 (로드하는 동안은 기존 값으로 계속 서빙)
+        - 로더 안의 get()은 이번 reload에서 먼저 로드한 새 값을 봄 (book_lookup → 새 books)
+        """
+        staged = dict(self._values)
+        token = _pinned.set(staged)
+        try:
+            for name in names:
+                start = time.perf_counter()
+                staged[name] = self._loaders[name]()
+                self._load_seconds[name] = round(time.perf_counter() - start, 3)
+                print(f"🔄 {name} 다시 로드 완료 ({self._load_seconds[name]}s)")
+        finally:
+            _pinned.reset(token)
+        self._swap({name: staged[name] for name in names})
+
+    def warm_up(self, names=None):
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"❌ {name} 로드 실패: {e}")
+        return self.is_ready(names)
+
+    def is_ready(self, names=None):
+        return all(name in self._values for name in names or self._loaders)
+
+    def status(self):
+        return {
+            name: {
+                "loaded": name in self._values,
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name)
+            }
+            for name in self._loaders
+        }
+
+
+registry = ModelRegistry()
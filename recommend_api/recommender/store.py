@@ -0,0 +1,82 @@
+## 저장된 책 추천 조회 (read-through 서빙)
+
+import os
+import pandas as pd
+from recommender.utils import db_connection, TTLCache
+
+# compute: 항상 새로 계산 / read_through: 저장된 추천이 신선하면 그대로 반환
+# read_through는 migrations/001_recommend_store.sql(created_at 컬럼 + recommend_invalidation) 적용 후 사용
+RECOMMEND_SERVING_MODE = os.getenv("RECOMMEND_SERVING_MODE", "compute")
+# book_recommend 행을 신선하다고 보는 기간 (기본 1일 = 야간 배치 주기)
+RECOMMEND_FRESHNESS_SECONDS = float(os.getenv("RECOMMEND_FRESHNESS_SECONDS", str(24 * 3600)))
+# 프로세스 메모리 캐시 기간 (워커마다 따로 유지되므로 짧게)
+RECOMMEND_CACHE_TTL = float(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+
+_cache = TTLCache(min(RECOMMEND_CACHE_TTL, RECOMMEND_FRESHNESS_SECONDS))
+
+
+# 사용자별 마지막 무효화 시각 (이보다 먼저 저장된 book_recommend 행은 신선하지 않음)
+# 스키마: migrations/001_recommend_store.sql
+STORED_RECOMMENDATIONS_QUERY = """
+    SELECT r.book_title, r.author, r.book_cover_url, r.hybrid_score
+    FROM book_recommend r
+    LEFT JOIN recommend_invalidation i ON i.user_id = r.user_id
+    WHERE r.user_id = %s
+      AND r.created_at >= NOW() - INTERVAL %s SECOND
+      AND (i.invalidated_at IS NULL OR r.created_at > i.invalidated_at)
+    ORDER BY r.hybrid_score DESC;
+"""
+
+INVALIDATE_QUERY = "REPLACE INTO recommend_invalidation (user_id, invalidated_at) VALUES (%s, NOW())"
+
+
+def load_stored_recommendations(user_id, max_age=RECOMMEND_FRESHNESS_SECONDS):
+    """
+    ✅ book_recommend에서 max_age초 이내 + 마지막 무효화 이후에 저장된 추천 조회 (없으면 None)
+    기준 시각은 created_at을 기록한 DB의 NOW() (컨테이너 시간대와 무관)
+    """
+    with db_connection() as conn:
+        df = pd.read_sql(STORED_RECOMMENDATIONS_QUERY, conn, params=(int(user_id), int(max_age)))
+    if df.empty:
+        return None
+    df["hybrid_score"] = df["hybrid_score"].astype(float)
+    return df.to_dict("records")
+
+
+def get_fresh_recommendations(user_id):
+    """
+    ✅ 메모리 캐시 → book_recommend 순으로 신선한 추천 조회 (없으면 None = 재계산 필요)
+    """
+    recs = _cache.get(user_id)
+    if recs is not None:
+        return recs
+    recs = load_stored_recommendations(user_id)
+    if recs is not None:
+        _cache.set(user_id, recs)
+    return recs
+
+
+def remember_recommendations(user_id, recs):
+    """ 새로 계산한 추천을 메모리 캐시에 보관 """
+    _cache.set(user_id, recs)
+
+
+def clear_cached_recommendations():
+    """ 이 워커의 메모리 캐시 전체 삭제 (다른 워커의 무효화 알림을 받았을 때) """
+    _cache.invalidate()
+
+
+def invalidate_recommendations(user_id):
+    """
+    ✅ 새 독서 활동이 생긴 사용자의 저장 추천 무효화
+    - 이 워커의 메모리 캐시 삭제
+    - read_through 모드: recommend_invalidation에 무효화 시각 기록 → 그 전에 저장된 행은 read-through에서 쓰지 않음
+      (book_recommend 행은 그대로 두므로 이 테이블을 읽는 다른 서비스에는 영향 없음)
+    """
+    _cache.invalidate(user_id)
+    if RECOMMEND_SERVING_MODE != "read_through":
+        return
+    with db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(INVALIDATE_QUERY, (int(user_id),))
+        conn.commit()
@@ -0,0 +1,106 @@
+## 대용량 테이블 chunk 스트리밍 로더
+#
+# pd.read_sql(chunksize=...)은 DBAPI 커넥션에서 cursor.fetchmany로 읽으므로
+# (mysql.connector 기본 커서는 unbuffered) 한 번에 chunk 크기만큼만 메모리에 올라옴
+
+import os
+import numpy as np
+import pandas as pd
+from recommender.utils import db_connection
+
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "100000"))
+
+INT32 = np.iinfo(np.int32)
+
+
+def downcast(df):
+    """
+    ✅ 정수 값만 있는 숫자 컬럼을 int32로 축소 (값이 범위를 넘거나 NaN/소수가 있으면 그대로)
+    - DB 드라이버가 int64/float64로 주는 id·분·페이지 컬럼의 메모리를 절반으로
+    """
+    for col in df.columns:
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values) or values.empty:
+            continue
+        if values.dtype == np.int32:
+            continue
+        if pd.api.types.is_float_dtype(values):
+            if values.isna().any() or not np.array_equal(values.values, np.floor(values.values)):
+                continue
+        if values.min() >= INT32.min and values.max() <= INT32.max:
+            df[col] = values.astype(np.int32)
+    return df
+
+
+def read_sql_chunks(query, params=None, chunksize=STREAM_CHUNK_ROWS):
+    """ ✅ 쿼리 결과를 chunk DataFrame으로 차례로 반환 (각 chunk는 downcast 적용) """
+    with db_connection() as conn:
+        for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+            yield downcast(chunk)
+
+
+def read_sql_frame(query, params=None, chunksize=STREAM_CHUNK_ROWS):
+    """ chunk로 읽어 downcast 후 합친 DataFrame (원본 dtype 전체 결과를 한 번에 들고 있지 않음) """
+    chunks = list(read_sql_chunks(query, params, chunksize))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+class TreeFold:
+    """
+    ✅ chunk별 부분 집계(Series / DataFrame, MultiIndex 가능)를 인덱스별 sum/max로 합치기
+    - 매 chunk마다 누적값 전체와 다시 groupby하지 않고, 같은 크기의 부분 집계끼리 이진 트리로 합침
+      → 합치는 비용: O(전체 부분 집계 크기 × log chunk 수), 보관하는 부분 집계: 최대 log2(chunk 수)개
+    - value()는 남은 부분 집계를 한 번에 합치고 결과를 다시 보관 (반복 호출 시 재계산 없음)
+    """
+
+    def __init__(self, how="sum"):
+        self.how = how
+        self.levels = []                # [(level, 부분 집계)] — level이 같은 두 개가 생기면 합침
+
+    def _combine(self, parts):
+        combined = pd.concat(parts).groupby(level=list(range(parts[0].index.nlevels)))
+        return combined.sum() if self.how == "sum" else combined.max()
+
+    def add(self, part):
+        level = 0
+        while self.levels and self.levels[-1][0] == level:
+            part = self._combine([self.levels.pop()[1], part])
+            level += 1
+        self.levels.append((level, part))
+        return self
+
+    def value(self):
+        """ 합친 결과 (아무것도 추가하지 않았으면 None) """
+        if not self.levels:
+            return None
+        if len(self.levels) > 1:
+            parts = [part for _, part in self.levels]
+            self.levels = [(max(level for level, _ in self.levels), self._combine(parts))]
+        return self.levels[0][1]
+
+
+def median_from_counts(counts):
+    """
+    ✅ (key, 값) → 개수 Series에서 key별 정확한 중앙값 (Series.median과 같은 값)
+    - 원본 행 대신 값별 개수만 누적해도 중앙값을 구할 수 있음 (메모리: 서로 다른 값의 수)
+    - 값이 연속값이면 서로 다른 값의 수 ≈ 행 수 → 누적 전에 구간(bin)으로 묶어야 메모리가 제한됨
+    """
+    counts = counts[counts > 0].sort_index()
+    if counts.empty:
+        return pd.Series(dtype=float)
+    level = counts.index.names[0]
+    values = pd.Series(counts.index.get_level_values(1).to_numpy(dtype=float), index=counts.index)
+    cum = counts.groupby(level=0).cumsum()
+    total = counts.groupby(level=0).transform('sum')
+    # 0부터 센 (n-1)//2 번째와 n//2 번째 값 (n이 홀수면 같은 값)
+    lower = values[cum > (total - 1) // 2].groupby(level=0).first()
+    upper = values[cum > total // 2].groupby(level=0).first()
+    return ((lower + upper) / 2).rename_axis(level)
+
+
+def sum_from_counts(counts):
+    """ (key, 값) → 개수 Series에서 key별 값의 합 """
+    values = counts.index.get_level_values(1).to_numpy(dtype=float)
+    return pd.Series(values * counts.to_numpy(), index=counts.index).groupby(level=0).sum()
@@ -0,0 +1,83 @@
+## gunicorn 워커 간 상태 동기화 (공유 버전 스탬프)
+#
+# CF 모델 / 추천·읽은 책 캐시 / 카탈로그는 워커 프로세스마다 따로 메모리에 있음
+# → HTTP 훅을 받은 워커는 직접 처리한 뒤 SYNC_DIR/<topic>.version 파일을 새 값으로 교체
+# → 다른 워커는 SYNC_POLL_SECONDS마다 스탬프를 확인해 바뀐 topic의 핸들러 실행
+# 스탬프에는 "바뀌었다"는 사실만 있으므로 핸들러는 해당 상태 전체를 무효화/다시 로드해야 함
+
+import os
+import threading
+import time
+
+SYNC_DIR = os.getenv("SYNC_DIR", "data/sync")
+SYNC_POLL_SECONDS = float(os.getenv("SYNC_POLL_SECONDS", "2"))
+
+_handlers = {}
+_seen = {}
+_lock = threading.Lock()
+
+
+def _path(topic):
+    return os.path.join(SYNC_DIR, f"{topic}.version")
+
+
+def read_stamp(topic):
+    try:
+        with open(_path(topic)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def subscribe(topic, handler):
+    """ ✅ 다른 워커가 publish(topic)하면 이 워커에서 handler() 실행 (현재 스탬프는 이미 본 것으로 처리) """
+    with _lock:
+        _handlers[topic] = handler
+        _seen[topic] = read_stamp(topic)
+
+
+def publish(topic):
+    """ ✅ 스탬프 교체 → 다른 워커에 알림 (호출한 워커는 이미 처리했으므로 자기 스탬프로 기록) """
+    os.makedirs(SYNC_DIR, exist_ok=True)
+    stamp = f"{time.time_ns()}-{os.getpid()}"
+    tmp = f"{_path(topic)}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(stamp)
+    os.replace(tmp, _path(topic))
+    with _lock:
+        _seen[topic] = stamp
+    return stamp
+
+
+def poll_once():
+    """ 바뀐 스탬프의 핸들러 실행 → 실행한 topic 목록 """
+    with _lock:
+        topics = list(_handlers.items())
+    fired = []
+    for topic, handler in topics:
+        stamp = read_stamp(topic)
+        with _lock:
+            if stamp is None or stamp == _seen.get(topic):
+                continue
+        try:
+            handler()
+        except Exception as e:
+            # 스탬프를 본 것으로 기록하지 않음 → 다음 확인 때 다시 시도
+            print(f"❌ 워커 동기화 실패 ({topic}): {e}")
+            continue
+        with _lock:
+            _seen[topic] = stamp
+        fired.append(topic)
+    return fired
+
+
+def watch_sync(interval=SYNC_POLL_SECONDS):
+    """ 워커마다 스탬프 확인 스레드 시작 (스레드는 fork로 복사되지 않으므로 post_fork에서 호출) """
+    def loop():
+        while True:
+            time.sleep(interval)
+            poll_once()
+
+    thread = threading.Thread(target=loop, name="worker-sync", daemon=True)
+    thread.start()
+    return thread
@@ -3,14 +3,32 @@
 import pandas as pd
 from dotenv import load_dotenv
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from recommender.metrics import timed
 
 load_dotenv()
 
 db_host = os.getenv("DB_HOST")
 db_user = os.getenv("DB_USER")
 db_password = os.getenv("DB_PASSWORD")
+db_name = os.getenv("DB_NAME")
+db_port = int(os.getenv("DB_PORT", "3306"))
 
-# 실제 접속은 포함하지 않음 — 샘플 형식만 유지
+# SSH 터널 (SSH_HOST가 없으면 DB에 직접 접속)
+ssh_host = os.getenv("SSH_HOST")
+ssh_port = int(os.getenv("SSH_PORT", "22"))
+ssh_user = os.getenv("SSH_USER")
+ssh_password = os.getenv("SSH_PASSWORD")
+ssh_pkey = os.getenv("SSH_PKEY")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_RECONNECT_RETRIES = int(os.getenv("DB_RECONNECT_RETRIES", "3"))
+
+# 실제 접속은 포함하지 않음 — 샘플 형식만 유지 (서비스 코드는 아래 db_connection() 풀 사용)
 def get_connection():
     """
     🔒 서버 보안 보호를 위해 공개 레포에서는 실제 연결 로직을 제거했습니다.
@@ -18,52 +36,370 @@ def get_connection():
     pass
 
 
+# -------------------------------------------------
+# 🔹 프로세스 전역 SSH 터널 + 커넥션 풀
+# -------------------------------------------------
+_tunnel = None
+_tunnel_lock = threading.Lock()
+
+
+def get_tunnel():
+    """
+    ✅ 프로세스에서 SSH 터널을 1개만 열어 재사용 (끊겼으면 재시작)
+    """
+    global _tunnel
+    if not ssh_host:
+        return None
+    with _tunnel_lock:
+        if _tunnel is None:
+            from sshtunnel import SSHTunnelForwarder
+            _tunnel = SSHTunnelForwarder(
+                (ssh_host, ssh_port),
+                ssh_username=ssh_user,
+                ssh_password=ssh_password,
+                ssh_pkey=ssh_pkey,
+                remote_bind_address=(db_host, db_port)
+            )
+            _tunnel.start()
+            print("✅ SSH 터널 연결")
+        elif not _tunnel.is_active:
+            print("⚠️ SSH 터널 재연결")
+            _tunnel.restart()
+    return _tunnel
+
+
+def open_connection():
+    """ 공유 터널을 통해 새 MySQL 커넥션 생성 """
+    import mysql.connector
+    tunnel = get_tunnel()
+    host, port = ("127.0.0.1", tunnel.local_bind_port) if tunnel else (db_host, db_port)
+    return mysql.connector.connect(
+        host=host, port=port, user=db_user, password=db_password, database=db_name
+    )
+
+
+def is_alive(conn):
+    """ 커넥션 상태 확인 (mysql-connector: is_connected → ping, 그 외: SELECT 1) """
+    try:
+        if hasattr(conn, "is_connected"):
+            return conn.is_connected()
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    ✅ 최대 size개의 커넥션을 재사용하는 풀
+    - acquire 시 상태 확인, 죽은 커넥션은 버리고 재연결 (최대 retries회, 지수 백오프)
+    - 모두 사용 중이면 timeout초까지 대기
+    - 반납 시 항상 rollback → 열린 트랜잭션(REPEATABLE READ 스냅샷)을 닫아 다음 사용자가 최신 데이터를 읽음
+      (쓰기 경로는 각자 commit 후 반납하므로 영향 없음)
+    """
+
+    def __init__(self, factory=open_connection, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 retries=DB_RECONNECT_RETRIES):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.retries = retries
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.factory()
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                print(f"⚠️ DB 연결 실패, 재시도 {attempt + 1}/{self.retries}: {e}")
+                time.sleep(0.5 * 2 ** attempt)
+
+    @timed("db.acquire")
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(f"DB 커넥션 풀 대기 시간 초과 ({self.timeout}s)")
+
+        if is_alive(conn):
+            return conn
+        _close_quietly(conn)
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        if broken:
+            _close_quietly(conn)
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            # 예외/정상 종료 모두 release에서 rollback (실패하면 커넥션 폐기)
+            self.release(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            _close_quietly(conn)
+            with self._lock:
+                self._created -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from recommender.local_db import LOCAL_DB_PATH, connect_local, create_schema
+            if LOCAL_DB_PATH:
+                # MySQL 대신 로컬 SQLite (오프라인 개발 / 벤치마크)
+                create_schema(LOCAL_DB_PATH)
+                _pool = ConnectionPool(factory=connect_local)
+            else:
+                _pool = ConnectionPool()
+        return _pool
+
+
+def set_connection_factory(factory, size=DB_POOL_SIZE):
+    """ 커넥션 생성 함수 교체 (로컬 DB 대체 등) — 기존 풀은 닫고 새로 생성 """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(factory=factory, size=size)
+        return _pool
+
+
+# 부모 프로세스에서 물려받은 커넥션/터널 객체 — 자식에서 닫거나 GC되면 부모와 공유하는 소켓에
+# 종료 패킷을 보내게 되므로 참조만 유지
+_inherited = []
+
+
+def _reset_after_fork():
+    """
+    ✅ fork된 자식 프로세스(gunicorn preload 워커)는 부모의 풀 커넥션 / SSH 터널 소켓을 쓰지 않음
+    - 같은 소켓을 여러 프로세스가 쓰면 MySQL 프로토콜이 섞여 결과가 깨짐
+    - 풀 설정(factory, size 등)은 유지하고 커넥션만 새로 만들도록 빈 풀로 교체
+    """
+    global _pool, _pool_lock, _tunnel, _tunnel_lock
+    _inherited.extend(obj for obj in (_pool, _tunnel) if obj is not None)
+    _pool_lock, _tunnel_lock = threading.Lock(), threading.Lock()
+    _tunnel = None
+    if _pool is not None:
+        _pool = ConnectionPool(factory=_pool.factory, size=_pool.size, timeout=_pool.timeout,
+                               retries=_pool.retries)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@contextmanager
+def db_connection():
+    """
+    ✅ 풀에서 커넥션을 빌려 쓰고 반납
+        with db_connection() as conn:
+            df = pd.read_sql(query, conn)
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+
+# -------------------------------------------------
+# 🔹 짧은 TTL 메모리 캐시
+# -------------------------------------------------
+class TTLCache:
+    """
+    ✅ key → (저장 시각, 값) / ttl초가 지나면 만료
+    ttl <= 0 이면 캐시하지 않음
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))  # 가장 오래 저장된 항목 제거
+            self._data[key] = (time.monotonic(), value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+
+# -------------------------------------------------
+# 🔹 Bulk 저장 (batch 단위 트랜잭션 + 사용자별 덮어쓰기)
+# -------------------------------------------------
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "1000"))
+
+
+def _user_batches(rows_by_user, batch_size):
+    """ 한 사용자의 행이 여러 batch로 쪼개지지 않도록 사용자 단위로 묶음 """
+    batch_users, batch_rows = [], []
+    for user_id, rows in rows_by_user.items():
+        batch_users.append(user_id)
+        batch_rows.extend(rows)
+        if len(batch_rows) >= batch_size:
+            yield batch_users, batch_rows
+            batch_users, batch_rows = [], []
+    if batch_users:
+        yield batch_users, batch_rows
+
+
+def bulk_write(table, insert_sql, rows_by_user, batch_size=WRITE_BATCH_SIZE, replace=True):
+    """
+    ✅ {user_id: [row tuple, ...]} 를 batch_size 행 단위로 저장
+    - batch마다 트랜잭션 1개 (DELETE + multi-row INSERT 후 commit, commit 안 된 batch는 반납 시 rollback)
+    - replace=True: 해당 사용자의 기존 행을 지우고 새 결과로 교체 (재실행 시 중복 없음)
+    - INSERT는 executemany → multi-row INSERT 로 전송
+    반환: 저장된 행 수
+    """
+    written = 0
+    with db_connection() as conn, timed(f"db.write.{table}"):
+        cur = conn.cursor()
+        for users, rows in _user_batches(rows_by_user, batch_size):
+            if replace:
+                placeholders = ", ".join(["%s"] * len(users))
+                cur.execute(f"DELETE FROM {table} WHERE user_id IN ({placeholders})", tuple(users))
+            if rows:
+                cur.executemany(insert_sql, rows)
+            conn.commit()
+            written += len(rows)
+    return written
+
+
+# created_at은 값을 주지 않음 → 마이그레이션 전 스키마에서도 동작, 적용 후에는 DB 기본값(CURRENT_TIMESTAMP)
+BOOK_RECOMMEND_INSERT = """
+    INSERT INTO book_recommend (user_id, book_title, author, book_cover_url, hybrid_score)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+GOAL_RECOMMEND_INSERT = """
+    INSERT INTO goal_recommend (
+        user_id,
+        recommended_books, recommended_minutes, recommended_reviews,
+        preferred_period, preferred_hour, session_minutes, days_per_week,
+        recommended_weekly_minutes, rationale,
+        days_since_last_read, inactive_flag,
+        created_at
+    )
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,NOW())
+"""
+
 
 # -------------------------------------------------
 # 🔹 책 추천 결과를 recommend 테이블에 저장
 # -------------------------------------------------
 def save_recommendations_to_db(user_id, recs):
-    conn, server = get_connection()
-    cur = conn.cursor()
-    for r in recs:
-        cur.execute("""
-            INSERT INTO book_recommend (user_id, book_title, author, book_cover_url, hybrid_score)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
-            user_id,
-            r.get("book_title"),
-            r.get("author"),
-            r.get("book_cover_url"),
-            r.get("hybrid_score")
-        ))
-    conn.commit()
-    conn.close(); server.stop()
+    save_recommendations_bulk({user_id: recs})
     print(f"✅ User {user_id} 추천 결과 DB 저장 완료")
 
 # -------------------------------------------------
-# 🔹 목표 추천 결과를 goal_recommend 테이블에 저장 (정상 작동 버전)
+# 🔹 전체 사용자 책 추천 결과를 한 번에 저장
 # -------------------------------------------------
-def save_goal_recommendations(recommendations):
-    conn, server = get_connection()
-    cursor = conn.cursor()
+def save_recommendations_bulk(results_by_user, batch_size=WRITE_BATCH_SIZE, replace=True):
+    """
+    ✅ {user_id: 추천 리스트} 저장 (사용자별 이전 추천은 교체)
+    """
+    rows_by_user = {
+        user_id: [
+            (user_id, r.get("book_title"), r.get("author"), r.get("book_cover_url"), r.get("hybrid_score"))
+            for r in recs
+        ]
+        for user_id, recs in results_by_user.items()
+    }
+    if not rows_by_user:
+        return 0
+    written = bulk_write("book_recommend", BOOK_RECOMMEND_INSERT, rows_by_user, batch_size, replace)
+    print(f"✅ {len(rows_by_user)}명 추천 결과 DB 저장 완료 ({written}행)")
+    return written
 
+# -------------------------------------------------
+# 🔹 목표 추천 결과를 goal_recommend 테이블에 저장 (정상 작동 버전)
+# -------------------------------------------------
+def save_goal_recommendations(recommendations, batch_size=WRITE_BATCH_SIZE, replace=True):
+    rows_by_user = {}
     for user_id, data in recommendations.items():
         g = data.get("goal_prediction", {}) or {}
         r = data.get("rule_recommendation", {}) or {}
         m = data.get("mission_recommendation", {}) or {}
         i = data.get("inactivity", {}) or {}
 
-        cursor.execute("""
-            INSERT INTO goal_recommend (
-                user_id,
-                recommended_books, recommended_minutes, recommended_reviews,
-                preferred_period, preferred_hour, session_minutes, days_per_week,
-                recommended_weekly_minutes, rationale,
-                days_since_last_read, inactive_flag,
-                created_at
-            )
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,NOW())
-        """, (
+        rows_by_user[user_id] = [(
             user_id,
             g.get("recommended_books", 0),
             g.get("recommended_minutes", 0),
@@ -76,36 +412,63 @@ def save_goal_recommendations(recommendations):
             m.get("rationale"),
             i.get("days_since_last_read"),
             int(i.get("inactive", False))
-        ))
+        )]
+
+    if not rows_by_user:
+        return 0
+    written = bulk_write("goal_recommend", GOAL_RECOMMEND_INSERT, rows_by_user, batch_size, replace)
+    print(f"✅ goal_recommend 테이블 저장 완료 ({written}행)")
+    return written
+
+
+GOAL_INACTIVITY_UPDATE = """
+    UPDATE goal_recommend SET days_since_last_read = %s, inactive_flag = %s WHERE user_id = %s
+"""
 
-    conn.commit()
-    conn.close()
-    server.stop()
-    print("✅ goal_recommend 테이블 저장 완료 (정상 데이터)")
+
+def update_goal_inactivity(inactivity, batch_size=WRITE_BATCH_SIZE):
+    """
+    ✅ 추천을 다시 계산하지 않은 사용자의 독서 중단 정보만 갱신 (batch 단위 executemany UPDATE)
+    inactivity: user_id, days_since_last_read, inactive 컬럼 DataFrame
+    """
+    rows = list(zip(
+        inactivity["days_since_last_read"].astype(int).tolist(),
+        inactivity["inactive"].astype(int).tolist(),
+        inactivity["user_id"].astype(int).tolist()
+    ))
+    if not rows:
+        return 0
+    with db_connection() as conn, timed("db.write.goal_inactivity"):
+        cur = conn.cursor()
+        for start in range(0, len(rows), batch_size):
+            cur.executemany(GOAL_INACTIVITY_UPDATE, rows[start:start + batch_size])
+            conn.commit()
+    print(f"✅ goal_recommend 독서 중단 정보 갱신 ({len(rows)}명)")
+    return len(rows)
 
 # -------------------------------------------------
 # 🔹 최근 읽은 책 + 책 메타정보 조인
 # -------------------------------------------------
 def get_recent_books_from_db(user_id, limit=3):
     """
-    ✅ MySQL에서 사용자의 최근 읽은 책 n권(title, author, category, cover) 조회
+    ✅ MySQL에서 사용자의 최근 읽은 책 n권(book_id, title, author, category, cover) 조회
     """
     try:
-        conn, server = get_connection()
-        query = f"""
+        query = """
             SELECT 
+                b.book_id,
                 b.title, 
                 b.author, 
                 b.category_name AS category, 
                 b.cover AS book_cover_url
             FROM reading_logs r
             JOIN books b ON r.book_id = b.book_id
-            WHERE r.user_id = {user_id}
+            WHERE r.user_id = %s
             ORDER BY r.read_at DESC
-            LIMIT {limit};
+            LIMIT %s;
         """
-        df = pd.read_sql(query, conn)
-        conn.close(); server.stop()
+        with db_connection() as conn, timed("db.recent_books"):
+            df = pd.read_sql(query, conn, params=(int(user_id), int(limit)))
         if df.empty:
             print(f"⚠️ 사용자 {user_id}의 최근 책이 없습니다.")
             return []
@@ -114,3 +477,35 @@ def get_recent_books_from_db(user_id, limit=3):
     except Exception as e:
         print(f"❌ 최근 읽은 책 조회 오류: {e}")
         return []
+
+# -------------------------------------------------
+# 🔹 전체 사용자 최근 읽은 책 (쿼리 1번)
+# -------------------------------------------------
+def get_recent_books_for_all_users(limit=3):
+    """
+    ✅ 모든 사용자의 최근 읽은 책 n권을 한 번에 조회
+    반환: {user_id: [{"book_id", "title", "author", "category", "book_cover_url"}, ...]}
+    """
+    query = """
+        SELECT user_id, book_id, title, author, category, book_cover_url
+        FROM (
+            SELECT
+                r.user_id,
+                b.book_id,
+                b.title,
+                b.author,
+                b.category_name AS category,
+                b.cover AS book_cover_url,
+                ROW_NUMBER() OVER (PARTITION BY r.user_id ORDER BY r.read_at DESC) AS rn
+            FROM reading_logs r
+            JOIN books b ON r.book_id = b.book_id
+        ) ranked
+        WHERE rn <= %s
+        ORDER BY user_id, rn;
+    """
+    with db_connection() as conn, timed("db.recent_books_all"):
+        df = pd.read_sql(query, conn, params=(limit,))
+    return {
+        user_id: group.drop(columns="user_id").to_dict("records")
+        for user_id, group in df.groupby("user_id", sort=False)
+    }
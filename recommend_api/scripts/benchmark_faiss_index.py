@@ -0,0 +1,95 @@
+## FAISS 인덱스 recall vs latency 벤치마크
+#
+# Flat(전수 탐색) 결과를 정답으로 두고 인덱스 종류 × 검색 파라미터별
+# recall@k, 쿼리당 지연시간(p50/p99), 인덱스 크기를 출력
+#
+# 사용 예 (recommend_api 디렉터리에서):
+#   python -m scripts.benchmark_faiss_index --types ivf_flat ivf_pq hnsw --queries 1000 --k 10
+
+import argparse
+import time
+import faiss, numpy as np, pandas as pd
+from recommender.ann_index import build_index, set_search_params
+
+NPROBE_GRID = [1, 4, 16, 64, 256]
+EF_SEARCH_GRID = [16, 32, 64, 128, 256]
+
+
+def recall_at_k(found, truth):
+    k = truth.shape[1]
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def time_search(index, queries, k, batch_size):
+    """ batch_size 단위 검색 → 쿼리당 지연시간(ms) 분포 """
+    latencies, results = [], []
+    for start in range(0, len(queries), batch_size):
+        q = queries[start:start + batch_size]
+        t0 = time.perf_counter()
+        _, inds = index.search(q, k)
+        latencies.append((time.perf_counter() - t0) * 1000 / len(q))
+        results.append(inds)
+    return np.array(latencies), np.vstack(results)
+
+
+def index_size_mb(index):
+    return faiss.serialize_index(index).nbytes / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 recall/latency 비교")
+    parser.add_argument("--embeddings", default="data/book_embeddings.npy")
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "ivf_pq", "hnsw"])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1, help="1 = 요청 1건씩 검색하는 API 상황")
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--pq-m", type=int, default=None)
+    parser.add_argument("--out", default=None, help="결과 CSV 경로")
+    args = parser.parse_args()
+
+    xb = np.ascontiguousarray(np.load(args.embeddings), dtype="float32")
+    rng = np.random.default_rng(0)
+    queries = xb[rng.choice(len(xb), min(args.queries, len(xb)), replace=False)]
+
+    flat = build_index(xb, "flat")
+    flat_lat, truth = time_search(flat, queries, args.k, args.batch_size)
+    rows = [{
+        "index": "flat", "param": "-", "recall": 1.0,
+        "p50_ms": np.percentile(flat_lat, 50), "p99_ms": np.percentile(flat_lat, 99),
+        "size_mb": index_size_mb(flat)
+    }]
+
+    for index_type in args.types:
+        t0 = time.perf_counter()
+        index = build_index(xb, index_type, nlist=args.nlist, pq_m=args.pq_m)
+        print(f"🔧 {index_type} 빌드 {time.perf_counter() - t0:.1f}s")
+
+        if index_type.startswith("ivf"):
+            grid = [("nprobe", v) for v in NPROBE_GRID]
+        else:
+            grid = [("efSearch", v) for v in EF_SEARCH_GRID]
+
+        for name, value in grid:
+            if name == "nprobe":
+                set_search_params(index, nprobe=value)
+            else:
+                set_search_params(index, ef_search=value)
+            lat, found = time_search(index, queries, args.k, args.batch_size)
+            rows.append({
+                "index": index_type, "param": f"{name}={value}",
+                "recall": recall_at_k(found, truth),
+                "p50_ms": np.percentile(lat, 50), "p99_ms": np.percentile(lat, 99),
+                "size_mb": index_size_mb(index)
+            })
+
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    if args.out:
+        report.to_csv(args.out, index=False)
+        print(f"💾 저장 완료: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+## 추천 파이프라인 벤치마크 (합성 데이터 + 로컬 SQLite + 랜덤 임베딩)
+#
+# 단계별 지연시간(p50/p95/p99), 처리량, 최대 메모리(tracemalloc)를 출력
+# - 요청 단계: 샘플 사용자마다 1번씩 호출 (db / cf / hybrid / 목표 / Flask 엔드포인트)
+# - 배치 단계: 전체 사용자 목표 계산 등 1번 실행 → 처리량 = 사용자 수 / 초
+#
+# 사용 예 (recommend_api 디렉터리에서):
+#   python -m scripts.benchmark_suite --users 10000 --requests 200 --out bench.csv
+#   python -m scripts.benchmark_suite --users 100000 --baseline bench.csv   (p95/시간이 tolerance배 넘게 늘면 exit 1)
+
+import os
+
+# 모델은 랜덤 인코더로 교체하므로 import 시 백그라운드 로드를 하지 않음
+os.environ.setdefault("MODEL_WARMUP", "lazy")
+
+import argparse
+import contextlib
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from recommender.local_db import use_local_db
+from recommender.utils import db_connection, get_recent_books_from_db
+from scripts.synthetic_data import generate_catalogue, generate_database, install_catalogue
+
+REQUEST_STAGES = ["db.recent_books", "cf.recommend", "hybrid.recommend", "goals.single_user",
+                  "http.recommend_books", "http.goals_user"]
+BATCH_STAGES = ["cf.build", "goals.all_vectorized", "goals.all_streaming", "goals.all_legacy", "books.all_batch"]
+DEFAULT_STAGES = BATCH_STAGES[:3] + REQUEST_STAGES
+COMPARE_COLUMN = {"request": "p95_ms", "batch": "seconds"}
+REPORT_COLUMNS = ["stage", "kind", "calls", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms", "seconds", "throughput",
+                  "peak_mb", "max_rss_mb"]
+
+
+# ============================================================
+# 🔹 측정
+# ============================================================
+@contextlib.contextmanager
+def quiet():
+    """ 단계 실행 중 print 로그/경고 숨김 (출력 비용은 그대로 포함) """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+def _max_rss_mb():
+    # Linux: KB 단위, macOS: byte 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def peak_memory_mb(fn, calls):
+    """ tracemalloc으로 calls번 호출 중 최대 할당량 (지연시간 측정과 별도 실행) """
+    tracemalloc.start()
+    try:
+        with quiet():
+            for args in calls:
+                fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_request_stage(name, fn, calls, warmup=5, concurrency=1, memory_calls=20):
+    """
+    ✅ 호출별 지연시간 분포 + 처리량 (concurrency > 1이면 스레드 풀로 동시에 호출)
+    앞의 warmup개 호출은 측정에서 제외 (측정 사용자의 캐시가 미리 채워지지 않도록 다른 사용자 사용)
+    """
+    with quiet():
+        for args in calls[:warmup]:
+            fn(*args)
+    calls = calls[warmup:]
+
+    def timed(args):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+            ok = True
+        except Exception:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with quiet():
+        if concurrency > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(timed, calls))
+        else:
+            results = [timed(args) for args in calls]
+    wall = time.perf_counter() - start
+
+    latencies = np.array([ms for ms, _ in results])
+    row = {
+        "stage": name, "kind": "request", "calls": len(calls),
+        "errors": sum(not ok for _, ok in results),
+        "p50_ms": np.percentile(latencies, 50), "p95_ms": np.percentile(latencies, 95),
+        "p99_ms": np.percentile(latencies, 99), "max_ms": latencies.max(),
+        "seconds": wall, "throughput": len(calls) / wall,
+    }
+    if memory_calls:
+        row["peak_mb"] = peak_memory_mb(fn, calls[:memory_calls])
+    row["max_rss_mb"] = _max_rss_mb()
+    return row
+
+
+def run_batch_stage(name, fn, n_users, memory=True):
+    """ ✅ 1번 실행 시간 + 처리량(사용자/초) + 최대 메모리 (메모리는 별도로 한 번 더 실행) """
+    start = time.perf_counter()
+    with quiet():
+        fn()
+    seconds = time.perf_counter() - start
+    row = {"stage": name, "kind": "batch", "calls": 1, "errors": 0, "seconds": seconds, "throughput": n_users / seconds}
+    if memory:
+        row["peak_mb"] = peak_memory_mb(fn, [()])
+    row["max_rss_mb"] = _max_rss_mb()
+    return row
+
+
+def compare_with_baseline(report, baseline_path, tolerance):
+    """ 기준 결과 대비 p95(요청) / 실행 시간(배치) 비율 → tolerance 초과 시 회귀 """
+    baseline = pd.read_csv(baseline_path).set_index("stage")
+    ratios, regressed = [], []
+    for row in report.itertuples():
+        column = COMPARE_COLUMN[row.kind]
+        if row.stage not in baseline.index or pd.isna(baseline.at[row.stage, column]):
+            ratios.append(np.nan)
+            continue
+        ratio = getattr(row, column) / baseline.at[row.stage, column]
+        ratios.append(ratio)
+        if ratio > tolerance:
+            regressed.append(row.stage)
+    report["vs_baseline"] = ratios
+    return regressed
+
+
+# ============================================================
+# 🔹 준비 (합성 DB 재사용 + 카탈로그 설치)
+# ============================================================
+def prepare_database(args):
+    """ 같은 설정으로 만든 DB가 있으면 재사용, 아니면 새로 생성 """
+    params = {k: getattr(args, k) for k in ("users", "books", "dim", "logs_per_user", "reviews_per_user",
+                                            "goal_months", "seed")}
+    params_path = args.db + ".json"
+    meta, embeddings = generate_catalogue(args.books, args.dim, args.seed)
+
+    reuse = os.path.exists(args.db) and os.path.exists(params_path) and not args.regenerate
+    if reuse:
+        with open(params_path) as f:
+            reuse = json.load(f) == params
+    if not reuse:
+        start = time.perf_counter()
+        counts = generate_database(args.db, args.users, meta, args.logs_per_user, args.reviews_per_user,
+                                   args.goal_months, args.seed)
+        with open(params_path, "w") as f:
+            json.dump(params, f)
+        print(f"✅ 합성 DB 생성 {counts} ({time.perf_counter() - start:.1f}s)")
+    else:
+        print(f"♻️ 합성 DB 재사용: {args.db}")
+
+    use_local_db(args.db)
+    install_catalogue(meta, embeddings, args.index_type)
+
+
+def sample_users(n_users, n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.choice(np.arange(1, n_users + 1), size=min(n, n_users), replace=False).tolist()
+
+
+# ============================================================
+# 🔹 단계 정의
+# ============================================================
+def build_stages(users):
+    from app import app
+    from recommender.batch import recommend_books_all_users
+    from recommender.collaborative import recommend_collaborative, refresh_cf_model
+    from recommender.goal_recommender import compute_all_recommendations, compute_all_recommendations_vectorized, \
+        load_data, recommend_goals_all_users, recommend_goals_single_user
+    from recommender.hybrid import hybrid_recommend
+
+    client = app.test_client()
+    with quiet():
+        recent = {uid: get_recent_books_from_db(uid, limit=4) for uid in users}
+    calls = [(uid,) for uid in users]
+
+    request_stages = {
+        "db.recent_books": (lambda uid: get_recent_books_from_db(uid, limit=4), calls),
+        "cf.recommend": (lambda uid: recommend_collaborative(uid, top_n=5), calls),
+        "hybrid.recommend": (lambda uid, books: hybrid_recommend(uid, books), [(uid, recent[uid]) for uid in users]),
+        "goals.single_user": (lambda uid: recommend_goals_single_user(uid, use_cache=False), calls),
+        "http.recommend_books": (
+            lambda uid: client.post("/recommend/books", json={"user_id": uid, "refresh": True}), calls
+        ),
+        "http.goals_user": (lambda uid: client.get(f"/recommend/goals/user/{uid}?no_cache=1"), calls),
+    }
+    batch_stages = {
+        "cf.build": refresh_cf_model,
+        "goals.all_vectorized": lambda: compute_all_recommendations_vectorized(*load_data()),
+        "goals.all_streaming": recommend_goals_all_users,
+        "goals.all_legacy": lambda: compute_all_recommendations(*load_data()),
+        "books.all_batch": lambda: recommend_books_all_users(keep_results=False),
+    }
+    return request_stages, batch_stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 파이프라인 단계별 지연시간/처리량/메모리 벤치마크")
+    parser.add_argument("--db", default="data/bench.db")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--logs-per-user", type=float, default=20)
+    parser.add_argument("--reviews-per-user", type=float, default=5)
+    parser.add_argument("--goal-months", type=int, default=6)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--regenerate", action="store_true", help="기존 합성 DB가 있어도 다시 생성")
+    parser.add_argument("--stages", nargs="+", default=DEFAULT_STAGES, choices=BATCH_STAGES + REQUEST_STAGES,
+                        help="goals.all_legacy(사용자별 필터 루프)와 books.all_batch는 큰 규모에서 느리므로 기본 제외")
+    parser.add_argument("--requests", type=int, default=200, help="요청 단계별 샘플 사용자 수")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1, help="요청 단계 동시 호출 스레드 수")
+    parser.add_argument("--memory-calls", type=int, default=20, help="요청 단계 메모리 측정 호출 수 (0: 측정 안 함)")
+    parser.add_argument("--no-batch-memory", action="store_true", help="배치 단계 메모리 측정(재실행) 생략")
+    parser.add_argument("--out", default=None, help="결과 CSV 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 CSV")
+    parser.add_argument("--tolerance", type=float, default=1.2)
+    args = parser.parse_args()
+
+    print(f"🖥️ python {platform.python_version()} / {platform.machine()} / cpu {os.cpu_count()}")
+    prepare_database(args)
+    with db_connection() as conn:
+        n_users = conn.execute("SELECT COUNT(DISTINCT user_id) FROM reading_logs").fetchone()[0]
+
+    users = sample_users(args.users, args.requests + args.warmup, args.seed)
+    request_stages, batch_stages = build_stages(users)
+
+    rows = []
+    # CF 모델은 요청 단계에서 처음 빌드되지 않도록 먼저 실행
+    for name in sorted(args.stages, key=lambda s: (s not in BATCH_STAGES, s != "cf.build")):
+        print(f"⏱️ {name} ...")
+        if name in batch_stages:
+            rows.append(run_batch_stage(name, batch_stages[name], n_users, memory=not args.no_batch_memory))
+        else:
+            fn, calls = request_stages[name]
+            rows.append(run_request_stage(name, fn, calls, args.warmup, args.concurrency, args.memory_calls))
+
+    report = pd.DataFrame(rows).reindex(columns=REPORT_COLUMNS)
+    regressed = compare_with_baseline(report, args.baseline, args.tolerance) if args.baseline else []
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if args.out:
+        report.to_csv(args.out, index=False)
+        print(f"💾 저장 완료: {args.out}")
+    if regressed:
+        print(f"⚠️ 기준 대비 {args.tolerance}배 넘게 느려진 단계: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
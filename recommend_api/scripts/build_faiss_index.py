@@ -0,0 +1,39 @@
+## FAISS 인덱스 오프라인 빌드 스크립트
+#
+# 사용 예 (recommend_api 디렉터리에서):
+#   python -m scripts.build_faiss_index --type ivf_pq --nlist 4096 --pq-m 96
+#   python -m scripts.build_faiss_index --type hnsw --m 32 --out data/book_faiss_hnsw.index
+
+import argparse
+import time
+import faiss, numpy as np
+from recommender.ann_index import INDEX_TYPES, build_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="book_embeddings.npy로 FAISS 인덱스 생성")
+    parser.add_argument("--embeddings", default="data/book_embeddings.npy")
+    parser.add_argument("--type", default="flat", choices=list(INDEX_TYPES))
+    parser.add_argument("--nlist", type=int, default=None, help="IVF 클러스터 수 (기본: 4·√n)")
+    parser.add_argument("--m", type=int, default=32, help="HNSW 이웃 수")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ 서브벡터 수 (기본: 차원/8)")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--out", default="data/book_faiss.index")
+    args = parser.parse_args()
+
+    embeddings = np.load(args.embeddings, mmap_mode="r")
+    print(f"📚 임베딩 로드: {embeddings.shape}")
+
+    start = time.perf_counter()
+    index = build_index(
+        embeddings, index_type=args.type, nlist=args.nlist, m=args.m,
+        pq_m=args.pq_m, ef_construction=args.ef_construction
+    )
+    print(f"✅ {args.type} 인덱스 생성 완료 ({index.ntotal}개, {time.perf_counter() - start:.1f}s)")
+
+    faiss.write_index(index, args.out)
+    print(f"💾 저장 완료: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
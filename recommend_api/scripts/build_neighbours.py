@@ -0,0 +1,68 @@
+## item-item 이웃 테이블 오프라인 생성 스크립트
+#
+# 사용 예 (recommend_api 디렉터리에서):
+#   python -m scripts.build_neighbours --source all --k 50
+#   python -m scripts.build_neighbours --source cf
+# 서빙: HYBRID_SERVING_MODE=precomputed (카탈로그/리뷰 갱신 후 다시 실행 → POST /catalogue/reload)
+
+import argparse
+import os
+import time
+import numpy as np, pandas as pd
+import recommender.candidates  # book_ids 레지스트리 항목 등록
+from recommender.content_based import BOOK_META_PATH, catalogue_frame
+from recommender.collaborative import load_reviews
+from recommender.neighbours import NEIGHBOURS_TOP_K, CONTENT_NEIGHBOURS_PATH, CF_NEIGHBOURS_PATH, \
+    build_content_neighbours, build_cf_neighbours
+from recommender.registry import registry
+
+
+def active_rows_of(books):
+    """
+    ✅ 인덱스에 남아 있는 행 (REMOVED가 아닌 행), 제거 기록이 없으면 None (전체)
+    - 컬럼형 저장소는 REMOVED 플래그를 함께 저장, 플래그 없이 만든 이전 저장소는 book_meta.pkl에서 읽음
+    """
+    removed = catalogue_frame(books, ["REMOVED"])
+    if "REMOVED" not in removed.columns and os.path.exists(BOOK_META_PATH):
+        meta = pd.read_pickle(BOOK_META_PATH)
+        if "REMOVED" in meta.columns and len(meta) == len(books):
+            removed = meta[["REMOVED"]]
+    if "REMOVED" not in removed.columns:
+        return None
+    return np.flatnonzero(~removed["REMOVED"].fillna(False).astype(bool).values)
+
+
+def build_content(k, out):
+    active_rows = active_rows_of(registry.get("books"))
+    table = build_content_neighbours(
+        registry.get("index"), registry.get("embeddings"), registry.get("book_ids"), active_rows, k=k
+    )
+    table.save(out)
+    return table
+
+
+def build_cf(k, out):
+    table = build_cf_neighbours(load_reviews(), k=k)
+    table.save(out)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 / 공동 평점 item-item 이웃 테이블 생성")
+    parser.add_argument("--source", default="all", choices=["all", "content", "cf"])
+    parser.add_argument("--k", type=int, default=NEIGHBOURS_TOP_K)
+    parser.add_argument("--content-out", default=CONTENT_NEIGHBOURS_PATH)
+    parser.add_argument("--cf-out", default=CF_NEIGHBOURS_PATH)
+    args = parser.parse_args()
+
+    for source, build, out in (("content", build_content, args.content_out), ("cf", build_cf, args.cf_out)):
+        if args.source not in ("all", source):
+            continue
+        start = time.perf_counter()
+        table = build(args.k, out)
+        print(f"✅ {source} 이웃 테이블 저장: {out} (books={len(table)}, pairs={len(table.ids)}, "
+              f"{time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+## 카탈로그 증분 반영 스크립트 (새/변경된 책만 인코딩)
+#
+# 사용 예 (recommend_api 디렉터리에서):
+#   python -m scripts.ingest_catalogue --source NL_BO_BEST_LOAN_BOOK_HISTORY_202201.csv
+#   python -m scripts.ingest_catalogue --source new_books.pkl --prune --reload-url http://localhost:8000
+
+import argparse
+import json
+import urllib.request
+import pandas as pd
+from recommender.catalogue import INGEST_BATCH_SIZE, ingest_catalogue
+from recommender.content_based import BOOK_META_PATH, BOOK_EMBEDDINGS_PATH, FAISS_INDEX_PATH, MODEL_NAME
+from recommender.ann_index import INDEX_TYPES
+
+
+def load_source(path):
+    if path.endswith(".pkl"):
+        return pd.read_pickle(path)
+    return pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="새/변경된 책만 임베딩해 카탈로그·인덱스 갱신")
+    parser.add_argument("--source", required=True, help="새 카탈로그 (원본 대출 CSV 또는 book_meta 형식 .pkl)")
+    parser.add_argument("--meta", default=BOOK_META_PATH)
+    parser.add_argument("--embeddings", default=BOOK_EMBEDDINGS_PATH)
+    parser.add_argument("--index", default=FAISS_INDEX_PATH)
+    parser.add_argument("--prune", action="store_true", help="새 카탈로그에 없는 책을 인덱스에서 제거")
+    parser.add_argument("--index-type", default=None, choices=list(INDEX_TYPES),
+                        help="재빌드가 필요할 때 사용할 인덱스 종류 (기본: 기존 인덱스와 동일)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--max-seq-length", type=int, default=384, help="노트북 임베딩과 동일하게 유지")
+    parser.add_argument("--reload-url", default=None, help="완료 후 POST {url}/catalogue/reload 호출")
+    args = parser.parse_args()
+
+    model = None
+
+    def encode(texts, batch_size):
+        nonlocal model
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(MODEL_NAME)
+            model.max_seq_length = args.max_seq_length
+        return model.encode(
+            texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+        ).astype('float32')
+
+    summary = ingest_catalogue(
+        load_source(args.source), encode, meta_path=args.meta, embeddings_path=args.embeddings,
+        index_path=args.index, prune=args.prune, index_type=args.index_type, batch_size=args.batch_size
+    )
+    print("✅ 카탈로그 갱신 완료:", json.dumps(summary, ensure_ascii=False))
+
+    if args.reload_url and summary["index_update"]:
+        req = urllib.request.Request(args.reload_url.rstrip("/") + "/catalogue/reload", method="POST")
+        with urllib.request.urlopen(req) as res:
+            print("🔄 서빙 reload:", res.read().decode())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+## 벤치마크용 합성 데이터 (books / reviews / reading_logs / reading_goals + 랜덤 임베딩 카탈로그)
+#
+# 같은 seed면 같은 데이터 → 실행 간 결과 비교 가능
+# 사용 예 (recommend_api 디렉터리에서):
+#   python -m scripts.synthetic_data --db data/bench.db --users 100000 --books 50000
+#   LOCAL_DB_PATH=data/bench.db 로 API를 띄우면 MySQL 없이 실행
+
+import argparse
+import os
+import time
+import zlib
+import numpy as np
+import pandas as pd
+import recommender.candidates  # 레지스트리 항목 등록 (model / books / embeddings / index / book_ids)
+from recommender.ann_index import build_index
+from recommender.catalogue import CATALOGUE_REGISTRY_NAMES
+from recommender.local_db import connect_local, create_schema
+from recommender.registry import registry
+
+CATEGORIES = ["총류", "철학", "종교", "사회과학", "자연과학", "기술과학", "예술", "언어", "문학", "역사"]
+PUBLISHERS = [f"출판사{i}" for i in range(200)]
+HISTORY_DAYS = 180
+INSERT_CHUNK_USERS = 10000
+
+
+# ============================================================
+# 🔹 카탈로그 + 랜덤 임베딩 (다운로드 모델 대신)
+# ============================================================
+class RandomEncoder:
+    """ ✅ SentenceTransformer.encode 대체: 텍스트별로 고정된 랜덤 벡터 (crc32 seed → 프로세스가 달라도 같은 값) """
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True, batch_size=None, **kwargs):
+        vecs = np.stack([
+            np.random.default_rng(zlib.crc32(str(t).encode('utf-8'))).standard_normal(self.dim)
+            for t in texts
+        ]).astype('float32')
+        if normalize_embeddings:
+            vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        return vecs
+
+
+def generate_catalogue(n_books, dim=64, seed=0):
+    """
+    ✅ book_meta 형식 카탈로그 + 카테고리별로 모인 정규화 임베딩
+    반환: (meta DataFrame, embeddings float32 (n_books × dim))
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_books)
+    categories = rng.integers(0, len(CATEGORIES), n_books)
+    meta = pd.DataFrame({
+        "BOOK_TITLE_NM": [f"책 {i}" for i in ids],
+        "AUTHR_NM": [f"저자 {i}" for i in ids // 3],
+        "COVER_URL": [f"https://covers.example.com/{i}.jpg" for i in ids],
+        "PUBLISHER_NM": np.array(PUBLISHERS)[rng.integers(0, len(PUBLISHERS), n_books)],
+        "KDC_NM": np.array(CATEGORIES)[categories],
+        "ISBN_THIRTEEN_NO": [f"979{i:010d}" for i in ids],
+    })
+    centers = rng.standard_normal((len(CATEGORIES), dim))
+    embeddings = (centers[categories] + 0.8 * rng.standard_normal((n_books, dim))).astype('float32')
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return meta, embeddings
+
+
+def install_catalogue(meta, embeddings, index_type="flat"):
+    """ 레지스트리에 합성 카탈로그/인덱스/랜덤 모델을 직접 넣음 (파일·모델 다운로드 없음) """
+    registry.set("model", RandomEncoder(embeddings.shape[1]))
+    registry.set("books", meta)
+    registry.set("embeddings", embeddings)
+    registry.set("index", build_index(embeddings, index_type))
+    # 카탈로그에서 파생된 나머지 항목(조회 테이블 / 카테고리 / 이웃 테이블)은 새 카탈로그 기준으로 다시 로드
+    registered = registry.status()
+    for name in CATALOGUE_REGISTRY_NAMES:
+        if name in registered and name not in ("books", "embeddings", "index"):
+            registry.unload(name)
+
+
+# ============================================================
+# 🔹 DB 테이블
+# ============================================================
+def _popular_books(rng, n_books, size, skew=2.0):
+    """ 앞쪽 book_id일수록 자주 뽑히는 분포 (인기 책 쏠림) """
+    return (n_books * rng.random(size) ** skew).astype(np.int64) + 1
+
+
+def _timestamps(seconds_ago, now):
+    """ 초 단위 과거 시각 → 'YYYY-MM-DD HH:MM:SS' 문자열 배열 """
+    stamps = (np.datetime64(now, 's') - seconds_ago.astype('timedelta64[s]')).astype(str)
+    return np.char.replace(stamps, 'T', ' ')
+
+
+def _insert(conn, table, df):
+    placeholders = ", ".join(["%s"] * len(df.columns))
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({placeholders})",
+        df.itertuples(index=False, name=None)
+    )
+
+
+def _user_rows(rng, users, n_books, logs_per_user, reviews_per_user, goal_months, now, log_offset):
+    """ 사용자 chunk 하나의 reading_logs / reviews / reading_goals """
+    n_logs = rng.poisson(logs_per_user, len(users))
+    log_users = np.repeat(users, n_logs)
+    # 사용자마다 선호 시간대 + 활동 기간(최근 N일)이 다름 → 독서 중단 사용자도 생김
+    preferred_hour = rng.integers(0, 24, len(users))
+    last_active = rng.exponential(10, len(users))
+    user_pos = np.repeat(np.arange(len(users)), n_logs)
+    days_ago = last_active[user_pos] + rng.random(len(log_users)) * (HISTORY_DAYS - last_active[user_pos]).clip(1)
+    hours = (preferred_hour[user_pos] + rng.normal(0, 2, len(log_users)).round()).astype(int) % 24
+    seconds_ago = (days_ago.astype(int) * 86400 + (24 - hours) * 3600 - rng.integers(0, 3600, len(log_users)))
+    logs = pd.DataFrame({
+        "log_id": log_offset + np.arange(len(log_users)) + 1,
+        "user_id": log_users,
+        "book_id": _popular_books(rng, n_books, len(log_users)),
+        "read_at": _timestamps(seconds_ago.clip(0), now),
+        "minutes_read": rng.gamma(2.0, 15.0, len(log_users)).round().astype(int) + 1,
+        "pages_read": rng.integers(1, 60, len(log_users)),
+    })
+
+    n_reviews = rng.poisson(reviews_per_user, len(users))
+    review_users = np.repeat(users, n_reviews)
+    reviews = pd.DataFrame({
+        "user_id": review_users,
+        "book_id": _popular_books(rng, n_books, len(review_users)),
+        "rating": rng.choice([1, 2, 3, 4, 5], len(review_users), p=[0.05, 0.1, 0.25, 0.35, 0.25]).astype(float),
+        "created_at": _timestamps(rng.integers(0, HISTORY_DAYS * 86400, len(review_users)), now),
+    })
+
+    periods = pd.period_range(end=pd.Period(now, "M"), periods=goal_months, freq="M")
+    goal_users = np.repeat(users, goal_months)
+    target_minutes = rng.choice([300, 600, 900, 1200], len(goal_users))
+    target_books = rng.integers(1, 8, len(goal_users))
+    target_reviews = rng.integers(0, 5, len(goal_users))
+    rate = rng.beta(4, 2, len(goal_users))
+    goals = pd.DataFrame({
+        "user_id": goal_users,
+        "year": np.tile(periods.year, len(users)),
+        "month": np.tile(periods.month, len(users)),
+        "target_minutes": target_minutes,
+        "completed_minutes": (target_minutes * rate * 1.2).round().astype(int),
+        "target_books": target_books,
+        "completed_books": (target_books * rate * 1.2).round().astype(int),
+        "target_reviews": target_reviews,
+        "completed_reviews": (target_reviews * rate).round().astype(int),
+    })
+    return logs, reviews, goals
+
+
+def generate_database(path, n_users, meta, logs_per_user=20, reviews_per_user=5, goal_months=6, seed=0,
+                      now=None, chunk_users=INSERT_CHUNK_USERS):
+    """
+    ✅ 로컬 SQLite에 합성 테이블 생성 (사용자 chunk 단위로 생성·삽입 → 메모리는 chunk 크기만큼)
+    - books: 카탈로그 행 순서대로 book_id = 행 번호 + 1
+    반환: 테이블별 행 수
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    create_schema(path)
+    now = pd.Timestamp(now or pd.Timestamp.now().floor('s'))
+    rng = np.random.default_rng(seed)
+    counts = {"books": len(meta), "reading_logs": 0, "reviews": 0, "reading_goals": 0}
+
+    conn = connect_local(path)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        _insert(conn, "books", pd.DataFrame({
+            "book_id": np.arange(len(meta)) + 1,
+            "title": meta["BOOK_TITLE_NM"].values,
+            "author": meta["AUTHR_NM"].values,
+            "category_name": meta["KDC_NM"].values,
+            "cover": meta["COVER_URL"].values,
+        }))
+        for start in range(0, n_users, chunk_users):
+            users = np.arange(start, min(start + chunk_users, n_users)) + 1
+            logs, reviews, goals = _user_rows(rng, users, len(meta), logs_per_user, reviews_per_user,
+                                              goal_months, now, counts["reading_logs"])
+            for table, df in (("reading_logs", logs), ("reviews", reviews), ("reading_goals", goals)):
+                _insert(conn, table, df)
+                counts[table] += len(df)
+            conn.commit()
+    finally:
+        conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 벤치마크 DB 생성 (로컬 SQLite)")
+    parser.add_argument("--db", default="data/bench.db")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--logs-per-user", type=float, default=20)
+    parser.add_argument("--reviews-per-user", type=float, default=5)
+    parser.add_argument("--goal-months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    meta, _ = generate_catalogue(args.books, seed=args.seed)
+    counts = generate_database(args.db, args.users, meta, args.logs_per_user, args.reviews_per_user,
+                               args.goal_months, args.seed)
+    print(f"✅ 합성 DB 생성: {args.db} {counts} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
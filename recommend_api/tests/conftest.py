@@ -0,0 +1,35 @@
+## pytest 공통 설정
+#
+# 실행 (recommend_api 디렉터리에서): python -m pytest -q tests
+# MySQL 대신 로컬 SQLite(recommender.local_db) + 합성 데이터(scripts.synthetic_data) 사용
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MODEL_WARMUP", "lazy")
+
+import pytest
+
+from recommender.local_db import connect_local, use_local_db
+from recommender.utils import get_pool
+from scripts.synthetic_data import generate_catalogue, generate_database
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    """ ✅ 합성 데이터가 들어 있는 SQLite DB로 커넥션 풀 교체 → DB 경로 """
+    path = str(tmp_path / "test.db")
+    meta, _ = generate_catalogue(200, 8)
+    generate_database(path, 40, meta, logs_per_user=15, reviews_per_user=3, goal_months=4)
+    use_local_db(path, size=2)
+    yield path
+    get_pool().close_all()
+
+
+@pytest.fixture
+def db_conn(local_db):
+    """ 풀과 별개인 커넥션 (테스트에서 직접 데이터 수정) """
+    conn = connect_local(local_db)
+    yield conn
+    conn.close()
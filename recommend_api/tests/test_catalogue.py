@@ -0,0 +1,146 @@
+import faiss
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender.ann_index import build_index
+from recommender.book_store import BookStore, build_book_store
+from recommender.catalogue import CATALOGUE_REGISTRY_NAMES, embed_texts_of, ingest_catalogue
+from recommender.registry import registry
+from scripts.build_neighbours import active_rows_of
+from scripts.synthetic_data import RandomEncoder, generate_catalogue, install_catalogue
+
+N_BOOKS = 60
+DIM = 16
+
+
+@pytest.fixture
+def files(tmp_path):
+    """ 합성 카탈로그 파일 (메타 / 임베딩 / 행 번호 id 인덱스) """
+    meta, embeddings = generate_catalogue(N_BOOKS, DIM)
+    meta["BOOK_INTRCN_CN"] = [f"소개 {i}" for i in range(N_BOOKS)]
+    paths = {
+        "meta_path": str(tmp_path / "book_meta.pkl"),
+        "embeddings_path": str(tmp_path / "book_embeddings.npy"),
+        "index_path": str(tmp_path / "book_index.faiss"),
+        "store_path": str(tmp_path / "book_store"),  # 없음 → 컬럼형 저장소 갱신 생략
+    }
+    meta.to_pickle(paths["meta_path"])
+    np.save(paths["embeddings_path"], embeddings)
+    faiss.write_index(build_index(embeddings, "flat", ids=np.arange(N_BOOKS)), paths["index_path"])
+    return meta, embeddings, paths
+
+
+def encode_fn(texts, batch_size=None):
+    return RandomEncoder(DIM).encode(texts)
+
+
+def indexed_ids(index):
+    """ 인덱스에 들어 있는 id 전체 (ntotal개 모두 검색) """
+    _, ids = index.search(np.ones((1, DIM), dtype="float32"), index.ntotal)
+    return set(ids[0].tolist())
+
+
+def ingest(incoming, paths, **kwargs):
+    summary = ingest_catalogue(incoming, encode_fn, **paths, **kwargs)
+    meta = pd.read_pickle(paths["meta_path"])
+    embeddings = np.load(paths["embeddings_path"])
+    index = faiss.read_index(paths["index_path"])
+    return summary, meta, embeddings, index
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat"])
+def test_ingest_changed_new_and_removed_rows(files, index_type):
+    original, old_embeddings, paths = files
+    faiss.write_index(build_index(old_embeddings, index_type, ids=np.arange(N_BOOKS)), paths["index_path"])
+    incoming = original.copy()
+    incoming.loc[3, "BOOK_INTRCN_CN"] = "바뀐 소개"
+    new_books = pd.DataFrame({
+        "BOOK_TITLE_NM": ["새 책 A", "새 책 B"], "AUTHR_NM": ["새 저자", "새 저자"],
+        "BOOK_INTRCN_CN": ["a", "b"], "PUBLISHER_NM": ["출판사", "출판사"], "KDC_NM": ["문학", "예술"],
+        "ISBN_THIRTEEN_NO": ["9790000000998", "9790000000999"],
+    })
+    incoming = pd.concat([incoming.drop(index=[5, 6]), new_books], ignore_index=True)
+
+    summary, meta, embeddings, index = ingest(incoming, paths, prune=True)
+
+    assert (summary["changed"], summary["new"], summary["revived"], summary["removed"]) == (1, 2, 0, 2)
+    # IDMap2,Flat / IVF는 행 번호 id 유지 → 증분 갱신
+    assert summary["index_update"] == "incremental"
+    assert len(meta) == len(embeddings) == N_BOOKS + 2
+    assert meta["REMOVED"].tolist() == [i in (5, 6) for i in range(N_BOOKS + 2)]
+    assert summary["ntotal"] == index.ntotal == N_BOOKS
+    assert indexed_ids(index) == set(range(N_BOOKS + 2)) - {5, 6}
+
+    # 임베딩 행 정렬: 변경·신규 행만 새로 인코딩, 나머지(제거 포함)는 그대로
+    encoded = [3, N_BOOKS, N_BOOKS + 1]
+    kept = np.setdiff1d(np.arange(N_BOOKS), [3])
+    np.testing.assert_array_equal(embeddings[kept], old_embeddings[kept])
+    np.testing.assert_allclose(embeddings[encoded], encode_fn(embed_texts_of(meta.iloc[encoded]).tolist()))
+    assert meta.loc[N_BOOKS, "BOOK_TITLE_NM"] == "새 책 A"
+
+    # 신규 책 임베딩으로 검색하면 해당 행 번호가 첫 결과
+    _, ids = index.search(embeddings[[N_BOOKS]], 1)
+    assert ids[0, 0] == N_BOOKS
+
+
+def test_removed_rows_are_revived_without_reencoding(files):
+    original, old_embeddings, paths = files
+    ingest(original.drop(index=[5, 6]), paths, prune=True)
+
+    summary, meta, embeddings, index = ingest(original, paths, prune=True)
+
+    assert (summary["changed"], summary["new"], summary["revived"], summary["removed"]) == (0, 0, 2, 0)
+    assert not meta["REMOVED"].any()
+    assert index.ntotal == N_BOOKS
+    assert indexed_ids(index) == set(range(N_BOOKS))
+    np.testing.assert_array_equal(embeddings, old_embeddings)
+
+
+def test_plain_flat_index_is_rebuilt_from_active_rows(files):
+    original, old_embeddings, paths = files
+    faiss.write_index(build_index(old_embeddings, "flat"), paths["index_path"])  # id 없는 IndexFlatIP
+
+    summary, meta, embeddings, index = ingest(original.drop(index=[0]), paths, prune=True)
+
+    assert summary["index_update"] == "rebuild"
+    assert index.ntotal == N_BOOKS - 1
+    assert indexed_ids(index) == set(range(1, N_BOOKS))
+
+
+def test_unchanged_catalogue_is_a_no_op(files):
+    original, _, paths = files
+
+    summary = ingest_catalogue(original, encode_fn, **paths)
+
+    assert summary["index_update"] is None
+    assert summary["changed"] == summary["new"] == summary["removed"] == 0
+
+
+def test_columnar_store_keeps_removed_flags(files):
+    original, old_embeddings, paths = files
+    build_book_store(original, old_embeddings, paths["store_path"])
+    assert active_rows_of(BookStore(paths["store_path"])) is None
+
+    ingest(original.drop(index=[5, 6]), paths, prune=True)
+    store = BookStore(paths["store_path"])
+
+    assert store.frame(["REMOVED"])["REMOVED"].tolist() == [i in (5, 6) for i in range(N_BOOKS)]
+    assert store.take([4, 5], ["REMOVED", "BOOK_TITLE_NM"]) == {"REMOVED": [False, True],
+                                                                "BOOK_TITLE_NM": ["책 4", "책 5"]}
+    # 이웃 테이블 생성 시 제거된 책 제외
+    np.testing.assert_array_equal(active_rows_of(store), np.setdiff1d(np.arange(N_BOOKS), [5, 6]))
+
+
+def test_install_catalogue_unloads_derived_entries(local_db):
+    meta, embeddings = generate_catalogue(N_BOOKS, DIM)
+    install_catalogue(meta, embeddings)
+    registry.get("book_categories")  # 이전 카탈로그 기준으로 로드된 상태
+
+    meta, embeddings = generate_catalogue(N_BOOKS + 5, DIM, seed=1)
+    install_catalogue(meta, embeddings)
+
+    status = registry.status()
+    for name in set(CATALOGUE_REGISTRY_NAMES) & set(status) - {"books", "embeddings", "index"}:
+        assert not status[name]["loaded"], name
+    assert len(registry.get("book_categories")) == N_BOOKS + 5
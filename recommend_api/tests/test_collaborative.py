@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender.collaborative import CFModel, SparseCFModel
+
+
+def review(user_id, book_id, rating):
+    return {"user_id": user_id, "book_id": book_id, "rating": rating, "title": f"책 {book_id}",
+            "author": "저자", "category_name": "문학", "book_cover_url": None}
+
+
+def random_reviews(seed, n=400, n_users=40, n_books=60):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame([
+        review(int(u), int(b), float(r))
+        for u, b, r in zip(rng.integers(1, n_users, n), rng.integers(1, n_books, n), rng.integers(1, 6, n))
+    ])
+
+
+NEW_REVIEWS = {
+    "new_user": [review(500, 3, 4.0), review(500, 7, 2.0)],
+    "new_item": [review(2, 900, 5.0), review(5, 900, 3.0)],
+    # 이미 있는 (user, book) 칸에 평점 추가 + 같은 배치 안의 중복 → 평균
+    "repeat_cell": [review(1, 1, 1.0), review(1, 1, 5.0), review(3, 2, 2.0)],
+    "mixed": [review(500, 900, 4.0), review(1, 1, 2.0), review(4, 901, 1.0)],
+}
+
+
+def with_repeat_cells(df):
+    return pd.concat([df, pd.DataFrame([review(1, 1, 4.0), review(3, 2, 5.0)])], ignore_index=True)
+
+
+def dense_frame(model):
+    return pd.DataFrame(model.matrix.toarray(), index=model.user_index, columns=model.book_index) \
+        .sort_index().sort_index(axis=1)
+
+
+def sparse_counts(model):
+    rows = np.repeat(np.arange(model.matrix.shape[0]), np.diff(model.matrix.indptr))
+    index = pd.MultiIndex.from_arrays([model.user_index[rows], model.book_index[model.matrix.indices]])
+    return pd.Series(model.counts, index=index).sort_index()
+
+
+@pytest.mark.parametrize("case", list(NEW_REVIEWS))
+def test_sparse_add_reviews_matches_rebuild(case):
+    base = with_repeat_cells(random_reviews(0))
+    new = pd.DataFrame(NEW_REVIEWS[case])
+
+    incremental = SparseCFModel(k=10).build(base)
+    incremental.add_reviews(new)
+    rebuilt = SparseCFModel(k=10).build(pd.concat([base, new], ignore_index=True))
+
+    pd.testing.assert_frame_equal(dense_frame(incremental), dense_frame(rebuilt))
+    normalised = lambda m: pd.DataFrame(m.Rn.toarray(), index=m.user_index, columns=m.book_index) \
+        .sort_index().sort_index(axis=1)
+    pd.testing.assert_frame_equal(normalised(incremental), normalised(rebuilt), atol=1e-6)
+    pd.testing.assert_series_equal(sparse_counts(incremental), sparse_counts(rebuilt))
+    for user_id in [1, 2, 3, 500]:
+        assert [r["book_id"] for r in incremental.recommend(user_id, 5)] == \
+               [r["book_id"] for r in rebuilt.recommend(user_id, 5)]
+    assert incremental.book_meta.loc[new["book_id"].unique(), "title"].tolist() == \
+           [f"책 {b}" for b in new["book_id"].unique()]
+
+
+@pytest.mark.parametrize("case", list(NEW_REVIEWS))
+def test_dense_add_reviews_matches_rebuild(case):
+    base = with_repeat_cells(random_reviews(1))
+    new = pd.DataFrame(NEW_REVIEWS[case])
+
+    incremental = CFModel().build(base)
+    incremental.add_reviews(new)
+    rebuilt = CFModel().build(pd.concat([base, new], ignore_index=True))
+
+    sort = lambda df: df.sort_index().sort_index(axis=1)
+    pd.testing.assert_frame_equal(sort(incremental.matrix), sort(rebuilt.matrix), check_names=False)
+    pd.testing.assert_frame_equal(sort(incremental.sim_df), sort(rebuilt.sim_df), check_names=False, atol=1e-9)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from recommender.fusion import diversify, factorize_keys, fuse_scores, normalize_scores, top_k_indices
+
+
+def reference_fuse(sources, n_candidates, method, duplicate_agg):
+    """ 후보별 dict 루프로 계산한 결합 점수 (fuse_scores 비교용) """
+    total = np.zeros(n_candidates)
+    for codes, scores, weight in sources:
+        agg = {}
+        for code, score in zip(codes, scores):
+            if code in agg:
+                agg[code] = agg[code] + score if duplicate_agg == "sum" else max(agg[code], score)
+            else:
+                agg[code] = score
+        if not agg:
+            continue
+        present = sorted(agg)
+        normalised = normalize_scores([agg[code] for code in present], method)
+        for code, value in zip(present, normalised):
+            total[code] += weight * value
+    return total
+
+
+# ============================================================
+# 🔹 top_k_indices
+# ============================================================
+@pytest.mark.parametrize("k", [0, 1, 5, 20, 50])
+def test_top_k_indices_matches_stable_argsort(k):
+    scores = np.random.default_rng(0).integers(0, 5, 20).astype(float)  # 동점 많음
+
+    expected = np.argsort(-scores, kind="stable")[:k]
+    np.testing.assert_array_equal(top_k_indices(scores, k), expected)
+
+
+def test_top_k_indices_empty():
+    assert len(top_k_indices(np.array([]), 3)) == 0
+
+
+# ============================================================
+# 🔹 fuse_scores
+# ============================================================
+@pytest.mark.parametrize("method", ["minmax", "zscore", "rrf"])
+@pytest.mark.parametrize("duplicate_agg", ["max", "sum"])
+def test_fuse_scores_matches_reference(method, duplicate_agg):
+    rng = np.random.default_rng(1)
+    n_candidates = 30
+    sources = [
+        (rng.integers(0, n_candidates, 40), rng.random(40), 0.8),
+        (rng.integers(0, n_candidates, 15), rng.random(15) * 5, 0.2),
+        ([], [], 0.5),
+    ]
+
+    top, scores = fuse_scores(sources, n_candidates, top_k=10, method=method, duplicate_agg=duplicate_agg)
+    expected = reference_fuse(sources, n_candidates, method, duplicate_agg)
+
+    np.testing.assert_array_equal(top, top_k_indices(expected, 10))
+    np.testing.assert_allclose(scores, expected[top])
+
+
+def test_fuse_scores_rejects_unknown_options():
+    sources = [([0, 1], [1.0, 2.0], 1.0)]
+    with pytest.raises(ValueError):
+        fuse_scores(sources, 2, 2, method="unknown")
+    with pytest.raises(ValueError):
+        fuse_scores(sources, 2, 2, duplicate_agg="mean")
+
+
+def test_normalize_scores_constant_input():
+    np.testing.assert_array_equal(normalize_scores([3.0, 3.0], "minmax"), [1.0, 1.0])
+    np.testing.assert_array_equal(normalize_scores([3.0, 3.0], "zscore"), [0.0, 0.0])
+
+
+# ============================================================
+# 🔹 factorize_keys / diversify
+# ============================================================
+def test_factorize_keys_shares_codes_across_sources():
+    (first, second), uniques = factorize_keys([10, "a", 10], ["a", 20])
+
+    assert first.tolist() == [0, 1, 0]
+    assert second.tolist() == [1, 2]
+    assert list(uniques) == [10, "a", 20]
+
+
+def test_diversify_caps_each_category():
+    categories = ["문학", "문학", "예술", "문학", None, None, "예술"]
+
+    assert diversify(categories, 2, 10).tolist() == [0, 1, 2, 4, 5, 6]
+    assert diversify(categories, 1, 2).tolist() == [0, 2]
+    assert diversify(categories, 0, 3).tolist() == [0, 1, 2]
@@ -0,0 +1,83 @@
+import fcntl
+import threading
+
+import pandas as pd
+import pytest
+
+from recommender import goal_incremental
+from recommender.goal_incremental import update_goals_incremental
+from recommender.goal_recommender import compute_all_recommendations_streaming, iter_log_chunks, load_goals
+
+
+def full_recommendations():
+    return compute_all_recommendations_streaming(iter_log_chunks(), load_goals())["recommendations"]
+
+
+def without_inactivity(rec):
+    # 독서 중단 일수는 계산 시각에 따라 달라지므로 비교에서 제외
+    return {key: value for key, value in rec.items() if key != "inactivity"}
+
+
+def add_log(conn, user_id, minutes):
+    log_id = conn.execute("SELECT MAX(log_id) FROM reading_logs").fetchone()[0] + 1
+    read_at = (pd.Timestamp.now() + pd.Timedelta(minutes=1)).strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute(
+        "INSERT INTO reading_logs (log_id, user_id, book_id, read_at, minutes_read, pages_read) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        (log_id, user_id, 1, read_at, minutes, 10)
+    )
+    conn.commit()
+
+
+def test_rebuild_matches_full(local_db, tmp_path):
+    result = update_goals_incremental(path=str(tmp_path / "state.pkl"), rebuild=True)
+    full = full_recommendations()
+
+    assert set(result["recommendations"]) == set(full)
+    for user_id, rec in full.items():
+        assert without_inactivity(result["recommendations"][user_id]) == without_inactivity(rec)
+
+
+def test_incremental_recomputes_changed_users_only(local_db, db_conn, tmp_path):
+    state = str(tmp_path / "state.pkl")
+    update_goals_incremental(path=state, rebuild=True)
+
+    add_log(db_conn, 3, 45)
+    # 합계가 그대로인 목표 수정도 감지 (행 체크섬)
+    first, second = db_conn.execute(
+        "SELECT goal_id FROM reading_goals WHERE user_id = 5 ORDER BY goal_id LIMIT 2"
+    ).fetchall()
+    db_conn.execute("UPDATE reading_goals SET target_minutes = target_minutes + 60 WHERE goal_id = %s", first)
+    db_conn.execute("UPDATE reading_goals SET target_minutes = target_minutes - 60 WHERE goal_id = %s", second)
+    db_conn.commit()
+
+    result = update_goals_incremental(path=state)
+    full = full_recommendations()
+
+    assert set(result["recommendations"]) == {3, 5}
+    for user_id, rec in result["recommendations"].items():
+        assert without_inactivity(rec) == without_inactivity(full[user_id])
+
+    assert update_goals_incremental(path=state)["recommendations"] == {}
+
+
+def test_incremental_refuses_log_window(local_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(goal_incremental, "GOAL_LOG_WINDOW_DAYS", 30)
+
+    with pytest.raises(ValueError):
+        update_goals_incremental(path=str(tmp_path / "state.pkl"))
+
+
+def test_update_waits_for_state_file_lock(local_db, tmp_path):
+    state = str(tmp_path / "state.pkl")
+    done = threading.Event()
+    with open(state + ".lock", "a") as held:
+        # 다른 열린 파일의 flock = 다른 프로세스(워커/크론)가 잡고 있는 상태
+        fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+        thread = threading.Thread(target=lambda: (update_goals_incremental(path=state), done.set()))
+        thread.start()
+        assert not done.wait(0.3)
+        fcntl.flock(held.fileno(), fcntl.LOCK_UN)
+    thread.join(10)
+
+    assert done.is_set()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender.goal_recommender import compute_all_recommendations, compute_all_recommendations_vectorized
+
+
+def random_logs_and_goals(seed, n_users=40, n_logs=600, n_goals=150):
+    rng = np.random.default_rng(seed)
+    logs = pd.DataFrame({
+        "log_id": np.arange(n_logs),
+        "user_id": rng.integers(0, n_users, n_logs),
+        "read_at": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 200 * 24 * 60, n_logs), unit="min"),
+        "minutes_read": rng.integers(0, 90, n_logs),
+        "pages_read": rng.integers(0, 50, n_logs),
+    })
+    goals = pd.DataFrame({
+        "user_id": rng.integers(0, n_users + 5, n_goals),
+        "year": 2025,
+        "month": rng.integers(1, 13, n_goals),
+        "target_minutes": rng.choice([0, 100, 200, 300], n_goals),
+        "completed_minutes": rng.integers(0, 400, n_goals),
+        "target_books": rng.integers(1, 6, n_goals),
+        "completed_books": rng.integers(0, 6, n_goals),
+        "target_reviews": rng.integers(1, 4, n_goals),
+        "completed_reviews": rng.integers(0, 4, n_goals),
+    })
+    return logs, goals
+
+
+# ============================================================
+# 🔹 벡터화 결과 == 기존 사용자별 루프
+# ============================================================
+@pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_vectorized_matches_legacy(seed):
+    logs, goals = random_logs_and_goals(seed)
+    legacy = compute_all_recommendations(logs, goals)
+    vectorized = compute_all_recommendations_vectorized(logs, goals)
+
+    assert vectorized["recommendations"] == legacy["recommendations"]
+    pd.testing.assert_frame_equal(
+        vectorized["inactivity_df"].sort_values("user_id").reset_index(drop=True),
+        legacy["inactivity_df"].sort_values("user_id").reset_index(drop=True),
+        check_dtype=False,
+    )
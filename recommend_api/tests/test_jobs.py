@@ -0,0 +1,151 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import app as api
+from recommender.batch import run_in_chunks
+from recommender.jobs import JobManager, run_goals_job
+
+
+def wait_for(manager, job_id, statuses, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"{job_id}: {manager.get(job_id).status}")
+
+
+@pytest.fixture
+def processed():
+    """ 처리된 사용자 id 기록 (중복 처리 확인용) """
+    return []
+
+
+@pytest.fixture
+def manager(tmp_path, processed):
+    gate = threading.Event()
+    lock = threading.Lock()
+
+    def users(done_ranges, on_start, on_chunk_done, should_stop, high_water=None, n=10, delay=0.05, gated=False):
+        user_ids = list(range(1, manager.extra_users + n + 1))
+        on_start(len(user_ids), max(user_ids))
+
+        def process_chunk(chunk):
+            if gated:
+                gate.wait(5)
+            time.sleep(delay)
+            with lock:
+                processed.extend(chunk)
+
+        run_in_chunks(user_ids, process_chunk, 1, 1, done_ranges, on_chunk_done, should_stop, high_water)
+
+    def broken(done_ranges, on_start, on_chunk_done, should_stop, high_water=None):
+        raise RuntimeError("boom")
+
+    manager = JobManager({"users": users, "broken": broken}, workers=2, checkpoint_dir=str(tmp_path))
+    manager.gate = gate
+    manager.extra_users = 0  # 작업 시작 후 새로 생긴 사용자 수
+    return manager
+
+
+def test_job_succeeds_and_checkpoints(manager, processed, tmp_path):
+    job = manager.submit("users", {"n": 5, "delay": 0})
+    job = wait_for(manager, job.job_id, {"succeeded"})
+
+    assert sorted(processed) == [1, 2, 3, 4, 5]
+    assert job.done_users == job.total_users == 5
+    with open(tmp_path / f"{job.job_id}.json") as f:
+        assert json.load(f)["status"] == "succeeded"
+
+
+def test_cancel_then_resume_processes_every_user_once(manager, processed):
+    job = manager.submit("users", {"n": 10, "delay": 0.05})
+    time.sleep(0.12)
+    manager.cancel(job.job_id)
+    job = wait_for(manager, job.job_id, {"cancelled"})
+    assert 0 < job.done_users < 10
+
+    manager.resume(job.job_id)
+    job = wait_for(manager, job.job_id, {"succeeded"})
+
+    assert sorted(processed) == list(range(1, 11))
+    assert job.done_users == 10
+
+
+def test_cancel_after_last_chunk_is_not_cancelled(manager):
+    job = manager.submit("users", {"n": 1, "delay": 0, "gated": True})
+    time.sleep(0.1)
+    manager.cancel(job.job_id)
+    manager.gate.set()
+
+    assert wait_for(manager, job.job_id, {"succeeded", "cancelled"}).status == "succeeded"
+
+
+def test_failed_job_records_error(manager):
+    job = wait_for(manager, manager.submit("broken").job_id, {"failed"})
+
+    assert job.error == "boom"
+    with pytest.raises(ValueError):
+        manager.submit("unknown")
+
+
+def test_orphaned_job_is_failed_and_resumable(manager, processed, tmp_path):
+    job = wait_for(manager, manager.submit("users", {"n": 3, "delay": 0}).job_id, {"succeeded"})
+    data = job.to_dict()
+    data.update(job_id="orphan", status="running", owner=f"{socket.gethostname()}:999999",
+                heartbeat_at=time.time(), done_ranges=[[1, 1]], done_users=1)
+    with open(tmp_path / "orphan.json", "w") as f:
+        json.dump(data, f)
+
+    # 다른 프로세스(새 JobManager)에서 조회 → 소유 프로세스가 없으므로 failed
+    other = JobManager(manager.runners, checkpoint_dir=str(tmp_path))
+    orphan = other.get("orphan")
+    assert orphan.status == "failed"
+
+    processed.clear()
+    other.resume("orphan")
+    wait_for(other, "orphan", {"succeeded"})
+    assert sorted(processed) == [2, 3]
+
+
+def test_job_with_live_heartbeat_is_not_orphaned(manager, tmp_path):
+    job = wait_for(manager, manager.submit("users", {"n": 1, "delay": 0}).job_id, {"succeeded"})
+    data = job.to_dict()
+    data.update(job_id="remote", status="running", owner="other-host:1", heartbeat_at=time.time())
+    with open(tmp_path / "remote.json", "w") as f:
+        json.dump(data, f)
+
+    assert manager.get("remote").status == "running"
+    assert os.path.exists(tmp_path / "remote.json")
+
+
+def test_resume_keeps_first_high_water(manager, processed):
+    job = manager.submit("users", {"n": 10, "delay": 0.1})
+    time.sleep(0.35)
+    manager.cancel(job.job_id)
+    job = wait_for(manager, job.job_id, {"cancelled"})
+    assert job.high_water == 10 and job.total_users == 10
+
+    manager.extra_users = 3  # 작업 시작 후 11~13번 사용자 추가
+    manager.resume(job.job_id)
+    job = wait_for(manager, job.job_id, {"succeeded"})
+
+    # resume은 처음 실행 대상만 처리 → 새 사용자는 다음 작업에서 처리
+    assert sorted(processed) == list(range(1, 11))
+    assert job.done_users == job.total_users == 10
+
+
+def test_unknown_goal_mode_is_rejected(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        run_goals_job([], None, None, None, mode="fast")
+
+    monkeypatch.setattr(api, "get_job_manager", lambda: pytest.fail("제출되면 안 됨"))
+    response = api.app.test_client().post("/jobs", json={"kind": "goals", "mode": "fast"})
+    assert response.status_code == 400
+    assert "mode" in response.get_json()["message"]
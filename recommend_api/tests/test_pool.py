@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from recommender.local_db import connect_local, create_schema, use_local_db
+from recommender.utils import ConnectionPool, db_connection, get_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "pool.db")
+    create_schema(path)
+    pool = ConnectionPool(factory=lambda: connect_local(path), size=1, timeout=0.1, retries=0)
+    yield pool
+    pool.close_all()
+
+
+def count_books(conn):
+    return conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+
+def test_release_rolls_back_uncommitted_work(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO books (book_id, title) VALUES (1, 'a')")
+
+    with pool.connection() as conn:
+        assert count_books(conn) == 0
+        assert not conn.in_transaction
+
+
+def test_committed_work_survives_release(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO books (book_id, title) VALUES (1, 'a')")
+        conn.commit()
+
+    with pool.connection() as conn:
+        assert count_books(conn) == 1
+
+
+def test_exception_rolls_back_and_reuses_connection(pool):
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            first = conn
+            conn.execute("INSERT INTO books (book_id, title) VALUES (2, 'b')")
+            raise ValueError
+
+    with pool.connection() as conn:
+        assert conn is first
+        assert count_books(conn) == 0
+    assert pool._created == 1
+
+
+def test_broken_release_closes_connection(pool):
+    conn = pool.acquire()
+    pool.release(conn, broken=True)
+    assert pool._created == 0
+
+    with pool.connection() as fresh:
+        assert fresh is not conn
+
+
+def test_failed_rollback_discards_connection(pool):
+    conn = pool.acquire()
+    conn.close()  # rollback이 실패하는 커넥션
+    pool.release(conn)
+    assert pool._created == 0
+
+
+def test_acquire_times_out_when_exhausted(pool):
+    held = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    pool.release(held)
+
+
+def test_forked_child_gets_fresh_pool(tmp_path):
+    path = str(tmp_path / "fork.db")
+    create_schema(path)
+    use_local_db(path, size=3)
+    with db_connection() as conn:
+        parent_conn = id(conn)
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # 자식: 새 풀 (같은 설정, 빈 커넥션) → 새 커넥션으로 조회
+        pool = get_pool()
+        with db_connection() as conn:
+            ok = pool._created == 1 and pool.size == 3 and id(conn) != parent_conn and count_books(conn) == 0
+        os.write(write, b"1" if ok else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read, 1) == b"1"
+    with db_connection() as conn:
+        assert id(conn) == parent_conn
@@ -0,0 +1,54 @@
+import pytest
+
+import app as api
+from recommender import store
+from recommender import utils
+from recommender.store import invalidate_recommendations, load_stored_recommendations
+from recommender.utils import save_recommendations_bulk
+
+RECS = [{"book_title": "책 1", "author": "저자", "book_cover_url": None, "hybrid_score": 0.5}]
+
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+
+def test_read_through_serves_saved_until_invalidated(local_db, monkeypatch):
+    monkeypatch.setattr(store, "RECOMMEND_SERVING_MODE", "read_through")
+    save_recommendations_bulk({1: RECS})
+
+    assert load_stored_recommendations(1) == RECS
+    assert load_stored_recommendations(1, max_age=-60) is None
+
+    invalidate_recommendations(1)
+    assert load_stored_recommendations(1) is None
+
+
+def test_compute_mode_does_not_touch_invalidation_table(local_db, db_conn):
+    invalidate_recommendations(1)
+
+    assert db_conn.execute("SELECT COUNT(*) FROM recommend_invalidation").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("body", [None, {}, {"user_id": "abc"}])
+def test_recommend_books_requires_user_id(client, body):
+    response = client.post("/recommend/books", json=body) if body is not None else client.post("/recommend/books")
+
+    assert response.status_code == 400
+
+
+def test_recommend_books_falls_back_when_lookup_fails(client, monkeypatch):
+    def broken_lookup(user_id):
+        raise RuntimeError("Table 'recommend_invalidation' doesn't exist")
+
+    monkeypatch.setattr(api, "RECOMMEND_SERVING_MODE", "read_through")
+    monkeypatch.setattr(api, "get_fresh_recommendations", broken_lookup)
+    monkeypatch.setattr(utils, "get_recent_books_from_db", lambda user_id, limit=4: [])
+    monkeypatch.setattr(api, "hybrid_recommend", lambda user_id, recent_books, alpha=0.8: RECS)
+    monkeypatch.setattr(api, "save_recommendations_to_db", lambda user_id, recs: None)
+
+    response = client.post("/recommend/books", json={"user_id": 7})
+
+    assert response.status_code == 200
+    assert response.get_json() == RECS
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender.goal_recommender import LogAggregates, compute_all_recommendations_streaming, \
+    compute_all_recommendations_vectorized
+from recommender.streaming import TreeFold, median_from_counts, sum_from_counts
+from test_goal_recommender import random_logs_and_goals
+
+
+# ============================================================
+# 🔹 chunk 스트리밍 결과 == 전체 로그 한 번에 계산
+# ============================================================
+@pytest.mark.parametrize("chunk_rows", [37, 600])
+def test_streaming_matches_vectorized(chunk_rows):
+    logs, goals = random_logs_and_goals(3)
+    vectorized = compute_all_recommendations_vectorized(logs, goals)
+    chunks = [logs.iloc[start:start + chunk_rows] for start in range(0, len(logs), chunk_rows)]
+    streaming = compute_all_recommendations_streaming(chunks, goals)
+
+    assert streaming["recommendations"] == vectorized["recommendations"]
+
+
+# ============================================================
+# 🔹 값별 개수 → 중앙값 / 합계
+# ============================================================
+@pytest.mark.parametrize("values", [
+    [5.0],
+    [3.0, 1.0],
+    [1.0, 2.0, 2.0, 9.0],
+    [4.5, 0.0, 4.5, 7.25, 1.0],
+])
+def test_median_from_counts_matches_series_median(values):
+    logs = pd.DataFrame({"user_id": [7] * len(values), "minutes_read": values})
+    counts = logs.groupby(["user_id", "minutes_read"]).size()
+
+    assert median_from_counts(counts)[7] == pd.Series(values).median()
+    assert sum_from_counts(counts)[7] == pytest.approx(sum(values))
+
+
+def test_median_from_counts_per_user():
+    rng = np.random.default_rng(4)
+    logs = pd.DataFrame({"user_id": rng.integers(0, 30, 2000), "minutes_read": rng.integers(0, 40, 2000)})
+    counts = logs.groupby(["user_id", "minutes_read"]).size()
+
+    expected = logs.groupby("user_id")["minutes_read"].median()
+    pd.testing.assert_series_equal(median_from_counts(counts), expected, check_names=False, check_dtype=False)
+
+
+def test_median_from_counts_ignores_zero_counts():
+    counts = pd.Series([0, 2, 1], index=pd.MultiIndex.from_tuples([(1, 1.0), (1, 5.0), (1, 8.0)]))
+
+    assert median_from_counts(counts)[1] == 5.0
+
+
+def test_log_aggregates_match_groupby():
+    logs, _ = random_logs_and_goals(5)
+    agg = LogAggregates()
+    for start in range(0, len(logs), 50):
+        agg.add(logs.iloc[start:start + 50])
+    stats = agg.stats()
+
+    by_user = logs.groupby("user_id")["minutes_read"]
+    pd.testing.assert_series_equal(stats["median_minutes"].sort_index(), by_user.median(),
+                                   check_names=False, check_dtype=False)
+    pd.testing.assert_series_equal(stats["mean_minutes"].sort_index(), by_user.mean(),
+                                   check_names=False, check_dtype=False)
+    assert stats["sessions"].sort_index().tolist() == by_user.size().tolist()
+
+
+def test_tree_fold_matches_single_groupby():
+    rng = np.random.default_rng(6)
+    parts = [pd.Series(rng.integers(0, 100, 20), index=rng.integers(0, 10, 20)) for _ in range(13)]
+    everything = pd.concat(parts)
+
+    for how in ("sum", "max"):
+        fold = TreeFold(how)
+        for part in parts:
+            fold.add(part)
+        assert len(fold.levels) <= 4
+        expected = everything.groupby(level=0).sum() if how == "sum" else everything.groupby(level=0).max()
+        pd.testing.assert_series_equal(fold.value(), expected)